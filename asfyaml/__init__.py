@@ -14,3 +14,9 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+
+import sys
+
+# Directory of the on-disk state of .asf.yaml: the validation cache, the deferred queue, the GitHub settings
+# cache and so on. The test suite keeps its state in /tmp instead.
+BASE_CACHE_PATH = "/x1/asfyaml" if "pytest" not in sys.modules else "/tmp"
@@ -16,16 +16,29 @@
 # under the License.
 
 import abc
+import concurrent.futures
+import contextvars
+import hashlib
+import json
+import os
 import typing
 
 import strictyaml
-import strictyaml.ruamel.scanner
+import strictyaml.ruamel.error
+import strictyaml.yamllocation
 import easydict
+from asfyaml import BASE_CACHE_PATH
 import asfyaml.dataobjects as dataobjects
 import asfyaml.envvars as envvars
+import asfyaml.feature as feature_registry
+import asfyaml.output as output
+import asfyaml.tracing as tracing
+import asfyaml.validation_cache as validation_cache
+
+if typing.TYPE_CHECKING:
+    import asfyaml.deferred as deferred
 
 DEFAULT_ENVIRONMENT = "production"
-DEBUG = False
 
 # Default priority for features. If set to this, they will be executed in the order they appear
 # in the YAML. If a priority other than this (five) is set, the feature will be moved ahead or
@@ -33,6 +46,15 @@ DEBUG = False
 # according to their priority level, going from priority 0 to 10.
 DEFAULT_PRIORITY = 5
 
+# Where the configuration hashes of idempotent features (see ASFYamlFeature.idempotent) are kept, one file per
+# repository, with an entry for each branch. Features whose configuration is unchanged since their last successful
+# run on a branch are not run again.
+FEATURE_STATE_DIR = os.path.join(BASE_CACHE_PATH, "feature-state")
+
+# Maximum number of features to run in parallel. Features only run in parallel if they have the same priority and
+# do not depend on each other.
+MAX_PARALLEL_FEATURES = 4
+
 
 class ASFYAMLException(Exception):
     def __init__(self, repository: dataobjects.Repository, branch: str, feature: str = "", error_message: str = ""):
@@ -59,12 +81,40 @@ class FeatureList(dict):
         super(FeatureList, self).__setitem__(key, value)
 
 
+def validate_subtree(
+    subtree: strictyaml.YAML, schema: strictyaml.validators.Validator, label: str = "<unicode string>"
+) -> strictyaml.YAML:
+    """Validates a sub-tree of an already loaded YAML document against a schema, without serializing it to
+    text and parsing it again. The sub-tree is treated as a document of its own, so error labels and line
+    numbers are reported relative to the sub-tree, just as if it had been loaded on its own with
+    :func:`strictyaml.dirty_load`."""
+    return schema(strictyaml.yamllocation.YAMLChunk(subtree._chunk.contents, label=label))
+
+
+def config_hash(feature: "ASFYamlFeature") -> str:
+    """Returns a canonical hash of the validated configuration of a feature. As the schema fingerprint of the
+    feature is included, changes to the feature itself also change the hash."""
+    canonical = json.dumps(
+        [feature.name, validation_cache.schema_fingerprint(type(feature)), feature.yaml_raw],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 class ASFYamlInstance:
     """This is the base instance class for a .asf.yaml process. It contains all the enabled features,
     as well as the repository and committer data needed to process events.
     """
 
-    def __init__(self, repo: dataobjects.Repository, committer: str, config_data: str, branch: str | None = None):
+    def __init__(
+        self,
+        repo: dataobjects.Repository,
+        committer: str,
+        config_data: str,
+        branch: str | None = None,
+        environ: typing.Mapping[str, str] | None = None,
+    ):
         self.repository = repo
         self.committer = dataobjects.Committer(committer)
         self.is_tag = False
@@ -78,43 +128,53 @@ class ASFYamlInstance:
             self.branch = dataobjects.UNKNOWN_BRANCH  # Not a valid branch pattern, set to the "unknown branch" marker
             # to avoid treating it as the main branch.
 
-        # Load YAML and, if any parsing errors happen, bail and raise exception
-        try:
-            self.yaml = strictyaml.dirty_load(config_data, label=f"{repo.name}.git/.asf.yaml", allow_flow_style=True)
-        except strictyaml.ruamel.scanner.ScannerError as e:
-            raise ASFYAMLException(repository=self.repository, branch=self.branch, feature="main", error_message=str(e))
-
         self.features = FeatureList()  # Placeholder for enabled and verified features during runtime.
-        self.environment = envvars.Environment()
+        self.environment = envvars.Environment(environ)  # Hook environment, taken from os.environ if not given.
         self.no_cache = False  # Set "cache: false" in the meta section to force a complete parse in all features.
         # TODO: Set up repo details inside this class (repo name, file-path, project, private/public, etc)
+        self.config_data = config_data
+        # The parsed YAML document. This is not loaded if a valid cached validation of it exists.
+        self.yaml: strictyaml.YAML | None = None
+        self._validated_features: list | None = None  # Cached (feature name, validated data) pairs, if any.
 
         # Sort out which environments we are going to be using. This will determine which
         # features to add, or which version of a feature to use.
         self.environments_enabled = {DEFAULT_ENVIRONMENT}
-        if "meta" in self.yaml:
-            # environment: fooenv
-            # merges a single environment with production
-            if "environment" in self.yaml["meta"]:
-                self.environments_enabled.add(str(self.yaml["meta"]["environment"]))
-                self.no_cache = self.yaml["meta"].get("cache", True) is False
-            # environments:
-            #   - foobar
-            #   - barbaz
-            # merges a list of environments with production.
-            # Merging happens in order of appearance in the yaml configuration, so having environments
-            # a, b, c in the configuration will be based off production, with features then added or
-            # overridden by a, then b, then c.
-            if "environments" in self.yaml["meta"]:
-                for env in self.yaml["meta"]["environments"]:
-                    self.environments_enabled.add(str(env))
-                self.no_cache = self.yaml["meta"].get("cache", True) is False
-        if DEBUG:
-            print("")
-            print(f"Using environment(s): {', '.join(self.environments_enabled)}")
+
+        # If this exact configuration was validated before, the cache knows which environments it uses.
+        cached = validation_cache.get(config_data)
+        if cached:
+            self.environments_enabled.update(cached["environments"])
+            self.no_cache = cached["no_cache"]
+        else:
+            self.yaml = self.load_yaml()
+            if "meta" in self.yaml:
+                # environment: fooenv
+                # merges a single environment with production
+                if "environment" in self.yaml["meta"]:
+                    self.environments_enabled.add(str(self.yaml["meta"]["environment"]))
+                # environments:
+                #   - foobar
+                #   - barbaz
+                # merges a list of environments with production.
+                # Merging happens in order of appearance in the yaml configuration, so having environments
+                # a, b, c in the configuration will be based off production, with features then added or
+                # overridden by a, then b, then c.
+                if "environments" in self.yaml["meta"]:
+                    for env in self.yaml["meta"]["environments"]:
+                        self.environments_enabled.add(str(env))
+                # cache: false
+                # runs every feature in full, even if its configuration is unchanged since it last ran.
+                if "cache" in self.yaml["meta"]:
+                    self.no_cache = self.load_meta_bool("cache") is False
+        # Keep a copy of the environments and cache setting from the configuration itself, as callers may
+        # add more (such as noop) before running, and those should not end up in the validation cache.
+        self._config_environments = set(self.environments_enabled)
+        self._config_no_cache = self.no_cache
 
         self.enabled_features = {}
         """: FeatureList: This variable contains all features that are enabled for this run, as an object with of all the features that are enabled and their class instances as attributes.
+        Only features with a top-level key in the .asf.yaml file are loaded, so others will not be listed here.
         Each feature is accessible as an attribute with the feature name as key, for instance :code:`self.instance.enabled_features.gitub`.
         If a feature is not available (not enabled or not configured), a None value will be returned instead,
         allowing you to easily test for whether a feature is enabled or not without running into key errors.
@@ -140,6 +200,12 @@ class ASFYamlInstance:
                 print(f"The following is enabled: {features_we_have}")  # Could be "notifications, github, jekyll"
         """
 
+        # Only import the feature modules for the top-level keys we actually see in the configuration.
+        if cached:
+            feature_registry.load_features(*cached["fingerprints"])
+        elif self.yaml is not None:
+            feature_registry.load_features(*(str(key) for key in self.yaml.keys()))
+
         # Make a list of enabled features for this repo, based on the environments enabled for it.
         # Features are loaded in environment order, sop later environments can override features from other envs.
         # For instance, a production+test env list would load all production features and mix in test
@@ -148,9 +214,50 @@ class ASFYamlInstance:
             for feat in ASFYamlFeature.features:
                 if feat.env == env:
                     self.enabled_features[feat.name] = feat
-        if DEBUG:
-            print(f"Enabled features for this run: {', '.join(self.enabled_features.keys())}")
-            print(f"Features seen inside .asf.yaml: {', '.join([str(x) for x in self.yaml.keys()])}")
+
+        # Use the cached validation only if every feature in it still validates against the same schema.
+        # If not, parse the YAML after all and validate it from scratch when running.
+        if cached:
+            if validation_cache.is_current(cached, self.enabled_features):
+                self._validated_features = cached["features"]
+            else:
+                self.yaml = self.load_yaml()
+        if tracing.enabled():
+            if self._validated_features is not None:
+                seen = [name for name, _data in self._validated_features]
+            else:
+                seen = [str(x) for x in self.yaml.keys()] if self.yaml is not None else []
+            tracing.event(
+                "configuration",
+                repo=self.repository.name,
+                branch=self.branch,
+                environments=sorted(self.environments_enabled),
+                enabled_features=sorted(self.enabled_features),
+                configured_features=seen,
+                cached=self._validated_features is not None,
+            )
+
+    def load_meta_bool(self, key: str) -> bool:
+        """Returns a boolean setting from the meta section. As the YAML is loaded without a schema, values are
+        strings until validated, so "false" would otherwise count as true."""
+        assert self.yaml is not None
+        node = self.yaml["meta"][key]
+        try:
+            node.revalidate(strictyaml.Bool())
+        except strictyaml.YAMLValidationError as e:
+            raise ASFYAMLException(repository=self.repository, branch=self.branch, feature="meta", error_message=str(e))
+        return node.data
+
+    def load_yaml(self) -> strictyaml.YAML:
+        """Loads the raw .asf.yaml configuration. If any parsing errors happen, an ASFYAMLException is raised"""
+        try:
+            with tracing.span("load_yaml", repo=self.repository.name):
+                return strictyaml.dirty_load(
+                    self.config_data, label=f"{self.repository.name}.git/.asf.yaml", allow_flow_style=True
+                )
+        # Broken YAML (such as an unclosed list), or YAML that strictyaml does not allow (such as duplicate keys)
+        except (strictyaml.ruamel.error.YAMLError, strictyaml.StrictYAMLError) as e:
+            raise ASFYAMLException(repository=self.repository, branch=self.branch, feature="main", error_message=str(e))
 
     def run_parts(self, validate_only: bool = False):
         """Runs every enabled and configured feature for the .asf.yaml file.
@@ -162,59 +269,287 @@ class ASFYamlInstance:
         if self.is_tag:
             return
 
-        # For each enabled feature, spin up validation and runtime processing if directives are found
-        # for the feature inside our .asf.yaml file.
-        features_to_run = []
-        for feature_name, feature_yaml in self.yaml.items():
-            if feature_name in self.enabled_features:
-                feature_yaml_as_string = feature_yaml.as_yaml()
-                feature_class = self.enabled_features[feature_name]
-                # If the feature has a schema, validate the sub-yaml before running the feature.
-                if hasattr(feature_class, "schema"):
-                    try:
-                        yaml_parsed = strictyaml.dirty_load(
-                            feature_yaml_as_string,
-                            feature_class.schema,
-                            label=f"{self.repository.name}.git/.asf.yaml::{feature_name}",
-                            allow_flow_style=True,
-                        )
-                    except strictyaml.exceptions.YAMLValidationError as e:
-                        # feature_start = feature_yaml.start_line
-                        # problem_line = feature_start + e.problem_mark.line
-                        # problem_column = e.problem_mark.column
-                        # TODO: Make this much more reader friendly!
-                        raise ASFYAMLException(
-                            repository=self.repository, branch=self.branch, feature=feature_name, error_message=str(e)
-                        )
-                else:
-                    yaml_parsed = strictyaml.load(feature_yaml_as_string)
-                # Everything seems in order, spin up an instance of the feature class for future use.
-                feature = feature_class(self, yaml_parsed)
-                features_to_run.append(feature)
-                # Log that this feature is enabled, configured, and validated. For cross-feature access.
-                self.features[str(feature_name)] = feature
-            elif (
-                feature_name != "meta"
-            ):  # meta is reserved for asfyaml.py, all else needs a feature or it should break.
-                raise KeyError(f"No such .asf.yaml feature: {feature_name}")
+        features_to_run = self.validate_parts()
+
         # If validate_only, exit now
         if validate_only:
             return
 
-        # If everything validated okay, we will sort the features by priority and then run them
-        for feature in sorted(features_to_run, key=lambda x: x.priority):
-            if DEBUG:
-                print(f"Running feature: {feature.name}")
-            try:
-                feature.run()
-            except strictyaml.YAMLValidationError as e:
-                raise ASFYAMLException(
-                    repository=self.repository, branch=self.branch, feature=feature.name, error_message=str(e)
-                )
-            except Exception as e:
+        # If everything validated okay, we will run the features according to their priority and dependencies
+        self.run_features(self.changed_features(features_to_run))
+
+    async def run_parts_async(self, validate_only: bool = False):
+        """Asynchronous version of :func:`run_parts`, for running many .asf.yaml instances from a single event loop.
+        Validation works the same way, after which the features are run as asyncio tasks (see
+        :func:`run_features_async`)."""
+        if self.is_tag:
+            return
+        features_to_run = self.validate_parts()
+        if validate_only:
+            return
+        await self.run_features_async(self.changed_features(features_to_run))
+
+    def defer_parts(self, queue: "deferred.JobQueue | None" = None) -> int | None:
+        """Validates every configured feature like :func:`run_parts`, but instead of running the features,
+        queues the run to be applied by a deferred worker (see :mod:`asfyaml.deferred`). This lets the push
+        hook return as soon as the configuration has been found to be valid. Returns the id of the queued job."""
+        import asfyaml.deferred as deferred  # Not needed on the regular hook path, so not imported up front
+
+        if self.is_tag:
+            return None
+        self.validate_parts()
+        job_id = (queue or deferred.JobQueue()).put(self.as_job())
+        print(f"The .asf.yaml configuration is valid, and has been queued for applying (job {job_id}).")
+        return job_id
+
+    def as_job(self) -> dict:
+        """Returns everything needed to repeat this run elsewhere, as a JSON-serializable dictionary"""
+        return {
+            "repo": str(self.repository.path),
+            "reflog": self.repository._reflog,
+            "org": self.repository.org_id,
+            "committer": self.committer.username,
+            "config": self.config_data,
+            "ref": f"refs/heads/{self.branch}" if self.branch != dataobjects.UNKNOWN_BRANCH else "",
+            "environ": self.environment.variables,
+            "environments": sorted(self.environments_enabled - self._config_environments),
+            "no_cache": self.no_cache,
+        }
+
+    def validate_parts(self) -> list["ASFYamlFeature"]:
+        """Validates every configured feature in the .asf.yaml file, and returns an instance of each feature,
+        in order of appearance. If a feature does not validate, an ASFYAMLException is raised."""
+        # If this configuration was validated before, with the same schemas, spin up the features straight
+        # from the cached data.
+        features_to_run = []
+        if self._validated_features is not None:
+            for feature_name, feature_data in self._validated_features:
+                feature = self.enabled_features[feature_name](self, feature_data)
+                features_to_run.append(feature)
+                self.features[feature_name] = feature
+
+        # For each enabled feature, spin up validation and runtime processing if directives are found
+        # for the feature inside our .asf.yaml file.
+        elif self.yaml is not None:
+            validated_features = []
+            for feature_name, feature_yaml in self.yaml.items():
+                if feature_name in self.enabled_features:
+                    feature_class = self.enabled_features[feature_name]
+                    # If the feature has a schema, validate the sub-yaml before running the feature.
+                    if hasattr(feature_class, "schema"):
+                        try:
+                            with tracing.span("validate", repo=self.repository.name, feature=str(feature_name)):
+                                yaml_parsed = validate_subtree(
+                                    feature_yaml,
+                                    feature_class.schema,
+                                    label=f"{self.repository.name}.git/.asf.yaml::{feature_name}",
+                                )
+                        except strictyaml.exceptions.YAMLValidationError as e:
+                            # feature_start = feature_yaml.start_line
+                            # problem_line = feature_start + e.problem_mark.line
+                            # problem_column = e.problem_mark.column
+                            # TODO: Make this much more reader friendly!
+                            raise ASFYAMLException(
+                                repository=self.repository,
+                                branch=self.branch,
+                                feature=feature_name,
+                                error_message=str(e),
+                            )
+                    else:
+                        yaml_parsed = feature_yaml
+                    # Everything seems in order, spin up an instance of the feature class for future use.
+                    feature = feature_class(self, yaml_parsed)
+                    features_to_run.append(feature)
+                    validated_features.append((str(feature_name), feature_class, yaml_parsed.data))
+                    # Log that this feature is enabled, configured, and validated. For cross-feature access.
+                    self.features[str(feature_name)] = feature
+                elif (
+                    feature_name != "meta"
+                ):  # meta is reserved for asfyaml.py, all else needs a feature or it should break.
+                    raise ASFYAMLException(
+                        repository=self.repository,
+                        branch=self.branch,
+                        feature="main",
+                        error_message=f"No such .asf.yaml feature: {feature_name}",
+                    )
+            # Everything validated, so remember that for the next time we see this exact configuration.
+            validation_cache.put(self.config_data, self._config_environments, self._config_no_cache, validated_features)
+        return features_to_run
+
+    @property
+    def feature_state_path(self) -> str:
+        """The file holding the configuration hashes of the idempotent features last run for this repository"""
+        return os.path.join(FEATURE_STATE_DIR, f"{self.repository.name}.json")
+
+    def load_feature_state(self) -> dict[str, dict[str, str]]:
+        """Returns the configuration hashes of the idempotent features last run for this repository, per branch"""
+        try:
+            with open(self.feature_state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def changed_features(self, features: list["ASFYamlFeature"]) -> list["ASFYamlFeature"]:
+        """Filters out idempotent features whose configuration has not changed since they last ran successfully
+        on this branch. If caching is disabled through the meta section, every feature is kept."""
+        if self.no_cache:
+            return list(features)
+        branch_state = self.load_feature_state().get(self.branch, {})
+        to_run = []
+        for feature in features:
+            if feature.idempotent and branch_state.get(feature.name) == config_hash(feature):
+                tracing.event("skip", repo=self.repository.name, feature=feature.name, reason="unchanged")
+                continue
+            to_run.append(feature)
+        return to_run
+
+    def save_feature_state(self, completed: list["ASFYamlFeature"]):
+        """Records the configuration hashes of the idempotent features that just ran successfully on this branch.
+        Features no longer configured are forgotten, so they run again in full if they are ever added back.
+        Nothing is recorded in noop mode, as no changes were actually applied."""
+        if "noop" in self.environments_enabled or not os.path.isdir(BASE_CACHE_PATH):
+            return
+        state = self.load_feature_state()
+        old_branch_state = state.get(self.branch, {})
+        branch_state = {name: value for name, value in old_branch_state.items() if name in self.features}
+        for feature in completed:
+            if feature.idempotent:
+                branch_state[feature.name] = config_hash(feature)
+        if branch_state == old_branch_state:
+            return
+        if branch_state:
+            state[self.branch] = branch_state
+        else:
+            state.pop(self.branch, None)
+        try:
+            os.makedirs(FEATURE_STATE_DIR, exist_ok=True)
+            tmp_path = f"{self.feature_state_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.feature_state_path)
+        except OSError as e:
+            print(f"Could not save feature state for {self.repository.name}: {e}")
+
+    @staticmethod
+    def _ready_features(pending: list["ASFYamlFeature"], running: list["ASFYamlFeature"]) -> list["ASFYamlFeature"]:
+        """Returns the pending features that can be started, as no unfinished feature has a higher priority
+        (lower number) or is depended on by them."""
+        ready = []
+        for feature in pending:
+            unfinished = [x for x in [*pending, *running] if x is not feature]
+            if not any(x.priority < feature.priority or x.name in feature.depends_on for x in unfinished):
+                ready.append(feature)
+        return ready
+
+    def _check_run(
+        self,
+        pending: list["ASFYamlFeature"],
+        run_order: list["ASFYamlFeature"],
+        failures: dict["ASFYamlFeature", BaseException],
+    ):
+        """Raises an ASFYAMLException for the first feature (in run order) that failed, or for the features that
+        could never be started because their dependencies are circular."""
+        for feature in run_order:
+            if feature in failures:
                 raise ASFYAMLException(
-                    repository=self.repository, branch=self.branch, feature=feature.name, error_message=str(e)
+                    repository=self.repository,
+                    branch=self.branch,
+                    feature=feature.name,
+                    error_message=str(failures[feature]),
                 )
+        if pending:
+            raise ASFYAMLException(
+                repository=self.repository,
+                branch=self.branch,
+                feature=pending[0].name,
+                error_message=f"Could not run {', '.join(x.name for x in pending)}: circular feature dependencies",
+            )
+
+    def run_features(self, features_to_run: list["ASFYamlFeature"]):
+        """Runs a list of validated features. Features are run according to their priority level, from 0 to 10,
+        and only once every feature they depend on (see :func:`ASFYamlFeature.__init_subclass__`) has finished.
+        Features that are ready to run at the same time are run in parallel, up to MAX_PARALLEL_FEATURES at a time,
+        with the output of each feature printed in one go once it has finished.
+        If a feature fails, no further features are started, and an ASFYAMLException is raised for the failed
+        feature once the features still running have finished."""
+        pending = sorted(features_to_run, key=lambda x: x.priority)
+        run_order = list(pending)
+        running: dict[concurrent.futures.Future, ASFYamlFeature] = {}
+        failures: dict[ASFYamlFeature, BaseException] = {}
+        completed: list[ASFYamlFeature] = []
+
+        def run_feature(feature: ASFYamlFeature):
+            with router.capture(), tracing.span("run", repo=self.repository.name, feature=feature.name):
+                feature.run()
+
+        with (
+            output.routed_stdout() as router,
+            concurrent.futures.ThreadPoolExecutor(max_workers=MAX_PARALLEL_FEATURES) as executor,
+        ):
+            while pending or running:
+                if not failures:
+                    for feature in self._ready_features(pending, list(running.values())):
+                        pending.remove(feature)
+                        # Run in a copy of our context, so the output of the feature ends up wherever ours goes.
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, run_feature, feature)] = feature
+                if not running:
+                    break  # Either something failed, or the remaining features can never be started.
+                finished, _not_done = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    feature = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        failures[feature] = error
+                    else:
+                        completed.append(feature)
+
+        self.save_feature_state(completed)
+        self._check_run(pending, run_order, failures)
+
+    async def run_features_async(self, features_to_run: list["ASFYamlFeature"]):
+        """Asynchronous version of :func:`run_features`, with the same ordering and failure handling.
+        Each feature is run through :func:`ASFYamlFeature.arun`, so features with asynchronous I/O can
+        overlap it with other features (and other instances) without tying up a thread."""
+        # Imported here, as asyncio is slow to import, and the git hook does not need it.
+        import asyncio
+
+        pending = sorted(features_to_run, key=lambda x: x.priority)
+        run_order = list(pending)
+        running: dict[asyncio.Task, ASFYamlFeature] = {}
+        failures: dict[ASFYamlFeature, BaseException] = {}
+        completed: list[ASFYamlFeature] = []
+        slots = asyncio.Semaphore(MAX_PARALLEL_FEATURES)
+
+        async def run_feature(feature: ASFYamlFeature):
+            async with slots:
+                with router.capture(), tracing.span("run", repo=self.repository.name, feature=feature.name):
+                    await feature.arun()
+
+        with output.routed_stdout() as router:
+            while pending or running:
+                if not failures:
+                    for feature in self._ready_features(pending, list(running.values())):
+                        pending.remove(feature)
+                        running[asyncio.create_task(run_feature(feature))] = feature
+                if not running:
+                    break  # Either something failed, or the remaining features can never be started.
+                try:
+                    finished, _not_done = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                except asyncio.CancelledError:
+                    for task in running:
+                        task.cancel()
+                    raise
+                for task in finished:
+                    feature = running.pop(task)
+                    error = task.exception()
+                    if error is not None:
+                        failures[feature] = error
+                    else:
+                        completed.append(feature)
+
+        self.save_feature_state(completed)
+        self._check_run(pending, run_order, failures)
 
 
 class ClassProperty:
@@ -242,6 +577,19 @@ class ASFYamlFeature:
     name: str
     env: str
     priority: int
+    depends_on: tuple[str, ...]
+
+    idempotent: bool = False
+    """: bool: Set to True if running the feature again with an unchanged configuration would not change anything.
+        Such features are skipped if their validated configuration is the same as when they last ran successfully
+        on the same branch, unless the .asf.yaml file disables caching (``meta: cache: false``).
+        If this depends on the configuration, it can be a property instead.
+
+        Example use::
+
+            class ASFTestFeature(ASFYamlFeature, name="test"):
+                idempotent = True  # Only ever pushes the configuration to an external service
+    """
 
     features: typing.ClassVar[list[type["ASFYamlFeature"]]] = []
     """: list: List for tracking all ASFYamlFeature sub-classes we come across in any environment.
@@ -256,12 +604,15 @@ class ASFYamlFeature:
         :meta hide-value:
     """
 
-    def __init__(self, parent: ASFYamlInstance, yaml: strictyaml.YAML):
+    def __init__(self, parent: ASFYamlInstance, yaml: strictyaml.YAML | typing.Any):
+        # Validated YAML comes either straight from strictyaml, or as plain data from the validation cache.
+        data = yaml.data if isinstance(yaml, strictyaml.YAML) else yaml
+
         #: dict: The YAML configuration for this feature, in raw format.
-        self.yaml_raw = yaml.data
+        self.yaml_raw = data
 
         #: easydict.EasyDict: The YAML, but in `EasyDict` format.
-        self.yaml = easydict.EasyDict(yaml.data)
+        self.yaml = easydict.EasyDict(data)
 
         #: ASFYamlInstance: This is the parent .asf.yaml instance class. Useful for accessing other features and their data.
         self.instance = parent
@@ -272,7 +623,14 @@ class ASFYamlFeature:
         #: repository.Committer: The committer (userid+email) that pushed this commit.
         self.committer = parent.committer
 
-    def __init_subclass__(cls, name: str, env: str = "production", priority: int = DEFAULT_PRIORITY, **kwargs):
+    def __init_subclass__(
+        cls,
+        name: str,
+        env: str = "production",
+        priority: int = DEFAULT_PRIORITY,
+        depends_on: typing.Iterable[str] = (),
+        **kwargs,
+    ):
         """Instantiates a new sub-class of ASFYamlFeature. The :attr:`name` argument should be the
         top dict keyword for this feature in .asf.yaml, for instance :kbd:`github` or :kbd:`pelican`.
         The :attr:`env` variable can be used to denote which environment this .asf.yaml feature will
@@ -280,11 +638,15 @@ class ASFYamlFeature:
         If a priority other than the default (5) is set, the feature will be run based on
         that priority level (0 is highest, 10 lowest)m otherwise it will be run in order of
         appearance in the YAML with the rest of the default priority features.
+        Features with the same priority may run in parallel. If a feature needs the results of other features,
+        such as the validated mailing list targets of :kbd:`notifications`, it should list their names in
+        :attr:`depends_on`. It will then only run once those features (if configured) have finished.
 
         Example sub-class definition::
 
-            # Create a new feature that runs after most other features (priority 9)
-            class ASFTestFeature(ASFYamlFeature, name="test", priority=9):
+            # Create a new feature that runs after most other features (priority 9), and after the
+            # notifications feature in any case.
+            class ASFTestFeature(ASFYamlFeature, name="test", priority=9, depends_on=("notifications",)):
                 schema = ... # If you want to supply a YAML schema, you can do so here. Otherwise, leave it out.
                 def run(self):  # This is where your magic happens
                     pass
@@ -294,6 +656,7 @@ class ASFYamlFeature:
         cls.env = env
         cls.features.append(cls)
         cls.priority = priority
+        cls.depends_on = tuple(depends_on)
         super().__init_subclass__(**kwargs)
 
     def noop(self, directivename):
@@ -318,6 +681,21 @@ class ASFYamlFeature:
     @abc.abstractmethod
     def run(self): ...
 
+    async def arun(self):
+        """Asynchronous version of :func:`run`, used when features are run from an event loop through
+        :func:`ASFYamlInstance.run_parts_async`. By default, this calls :func:`run` in a worker thread.
+        Features that spend most of their time waiting for remote services can override this to await
+        that I/O instead.
+
+        Example use::
+
+            class ASFTestFeature(ASFYamlFeature, name="test"):
+                def run(self):
+                    asyncio.run(self.arun())  # Synchronous runs still work.
+
+                async def arun(self):
+                    await asyncio.sleep(1)  # Lets the other features run while we wait.
+        """
+        import asyncio
 
-# Import all the feature classes. TODO: move this import elsewhere.
-from asfyaml.feature import *
+        await asyncio.to_thread(self.run)
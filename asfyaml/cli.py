@@ -19,7 +19,7 @@ import os
 import argparse
 from pathlib import Path
 
-from asfyaml import dataobjects
+from asfyaml import dataobjects, revisions, tracing
 from asfyaml.asfyaml import ASFYamlInstance, ASFYAMLException
 
 
@@ -30,23 +30,37 @@ def dir_path(path):
         raise argparse.ArgumentTypeError(f"readable_dir:{path} is not a valid path")
 
 
+def read_config(repo: dataobjects.Repository, revision: str | None) -> str:
+    """Reads .asf.yaml from the working directory of a repository, or from the object database at a revision"""
+    if revision is not None:
+        config_data = repo.read_file(revision, revisions.CONFIG_PATH)
+        if config_data is None:
+            raise Exception(f".asf.yaml does not exist at revision '{revision}' of '{repo.path}'")
+        return config_data
+    yml_file = os.path.join(repo.path, ".asf.yaml")
+    if not os.path.exists(yml_file):
+        raise Exception(f".asf.yaml does not exist at location '{yml_file}'")
+    with open(yml_file) as f:
+        return f.read()
+
+
 def cli():
     parser = argparse.ArgumentParser()
     parser.add_argument("--repo", type=dir_path, help="path to the repo to process", required=True)
     parser.add_argument("--org", type=str, default="apache", help="the organization this repo belongs to")
     parser.add_argument("--token", type=str, help="token to access the repo via the GH API")
     parser.add_argument("--noop", action=argparse.BooleanOptionalAction, default=False, help="do not perform changes")
+    parser.add_argument("--defer", action="store_true", help="only validate, and queue changes for asfyaml-worker")
+    parser.add_argument("--trace", type=str, help="append timing spans as JSON lines to this file, - for stderr")
+    parser.add_argument("--revision", type=str, help="read .asf.yaml from git at this ref or sha instead")
     args = parser.parse_args()
 
+    if args.trace:
+        tracing.configure(args.trace)
+
     repo_path = Path(os.path.abspath(args.repo))
     repo = dataobjects.Repository(str(repo_path), org_id=args.org)
-
-    yml_file = os.path.join(repo_path, ".asf.yaml")
-    if not os.path.exists(yml_file):
-        raise Exception(f".asf.yaml does not exist at location '{yml_file}'")
-
-    with open(yml_file) as f:
-        yml_content = f.read()
+    yml_content = read_config(repo, args.revision)
 
     os.environ["PATH_INFO"] = repo_path.name
     os.environ["GIT_PROJECT_ROOT"] = str(repo_path.parent)
@@ -66,7 +80,10 @@ def cli():
     else:
         a.environments_enabled.add("production")
 
-    a.run_parts()
+    if args.defer:
+        a.defer_parts()
+    else:
+        a.run_parts()
 
 
 def validate():
@@ -74,17 +91,30 @@ def validate():
     parser = argparse.ArgumentParser()
     parser.add_argument("--repo", type=dir_path, help="path to the repo to process", required=True)
     parser.add_argument("--org", type=str, default="apache", help="the organization this repo belongs to")
+    parser.add_argument("--trace", type=str, help="append timing spans as JSON lines to this file, - for stderr")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--revision", type=str, help="read .asf.yaml from git at this ref or sha instead")
+    group.add_argument("--history", type=str, help="validate .asf.yaml in every commit of this revision range")
     args = parser.parse_args()
 
+    if args.trace:
+        tracing.configure(args.trace)
+
     repo_path = Path(os.path.abspath(args.repo))
     repo = dataobjects.Repository(str(repo_path), org_id=args.org)
 
-    yml_file = os.path.join(repo_path, ".asf.yaml")
-    if not os.path.exists(yml_file):
-        raise Exception(f".asf.yaml does not exist at location '{yml_file}'")
-
-    with open(yml_file, mode="r") as f:
-        yml_content = f.read()
+    if args.history:
+        for result in revisions.validate_history(repo, args.history.split()):
+            if result.blob is None:
+                print(f"{result.revision}: no .asf.yaml file")
+            elif result.valid:
+                print(f"{result.revision}: valid")
+            else:
+                print(f"{result.revision}: invalid ({result.feature}): {result.error}")
+        return
+
+    yml_file = f"{args.revision}:.asf.yaml" if args.revision else os.path.join(repo_path, ".asf.yaml")
+    yml_content = read_config(repo, args.revision)
 
     os.environ["PATH_INFO"] = repo_path.name
     os.environ["GIT_PROJECT_ROOT"] = str(repo_path.parent)
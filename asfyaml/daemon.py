@@ -0,0 +1,283 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Long-running .asf.yaml daemon, and the client used by git hooks to hand pushes to it.
+
+Starting a fresh interpreter for every push means importing strictyaml, PyGithub and the feature modules,
+and building every schema, over and over again. The daemon does all of that once, and then processes push
+events sent to it over a local Unix socket, streaming the output of each run back to the hook.
+
+The protocol is line-based JSON. The client sends a single push event::
+
+    {"repo": "/x1/repos/asf/foo.git", "committer": "humbedooh", "ref": "refs/heads/main",
+     "reflog": "oldsha newsha refs/heads/main", "environ": {"PATH_INFO": "foo.git", ...}}
+
+Optionally, the event can also carry the .asf.yaml contents (``config``, read from the pushed ref otherwise),
+the GitHub organization (``org``) and extra environments to enable (``environments``, e.g. ``["noop"]``).
+The daemon answers with any number of ``{"output": "..."}`` lines, followed by a single status line, either
+``{"status": "ok"}`` or ``{"status": "error", "feature": "...", "error": "..."}``.
+
+As the daemon runs features with the credentials of the infrastructure, the socket is only accessible to its
+owner and group (see SOCKET_MODE), and the daemon can further be limited to connections from given users.
+
+Only the standard library is imported at module level, so hooks using :func:`submit` stay lightweight.
+"""
+
+import argparse
+import collections
+import io
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    import asfyaml.output
+
+SOCKET_PATH = "/x1/asfyaml/asfyaml.sock"
+# Permissions of the socket. Anyone able to connect can have the daemon run any configuration on any repository.
+SOCKET_MODE = 0o660
+
+
+class DaemonError(Exception):
+    """Raised by :func:`submit` if processing a push failed, or the daemon could not finish it"""
+
+    def __init__(self, feature: str = "", error_message: str = ""):
+        self.feature = feature
+        self.error_message = error_message
+
+    def __str__(self):
+        return self.error_message
+
+
+class ResponseStream(io.TextIOBase):
+    """Stream that sends everything written to it to the client as output lines. If the client has gone
+    away, the output is dropped, but the run itself carries on."""
+
+    def __init__(self, wfile: typing.BinaryIO):
+        self.wfile = wfile
+        self.lock = threading.Lock()
+        self.connected = True
+
+    def send(self, **message):
+        with self.lock:
+            if not self.connected:
+                return
+            try:
+                self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except OSError:
+                self.connected = False
+
+    def write(self, s: str) -> int:
+        if s:
+            self.send(output=s)
+        return len(s)
+
+
+class PushHandler(socketserver.StreamRequestHandler):
+    """Handles a single push event sent to the daemon"""
+
+    server: "PushServer"
+
+    def handle(self):
+        response = ResponseStream(self.wfile)
+        try:
+            event = json.loads(self.rfile.readline())
+        except ValueError as e:
+            response.send(status="error", feature="", error=f"Invalid push event: {e}")
+            return
+        if self.server.allowed_uids is not None:
+            uid = self.server.peer_uid(self.request)
+            if uid not in self.server.allowed_uids:
+                response.send(status="error", feature="", error=f"User {uid} is not allowed to use the daemon")
+                return
+
+        import asfyaml.asfyaml
+
+        with self.server.router.redirect(response):
+            try:
+                self.server.process(event)
+            except asfyaml.asfyaml.ASFYAMLException as e:
+                response.send(status="error", feature=e.feature, error=e.error_message)
+            except Exception as e:
+                response.send(status="error", feature="", error=f"{type(e).__name__}: {e}")
+            else:
+                response.send(status="ok")
+
+
+class PushServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server processing push events, one thread per connection. Pushes to the same repository
+    are processed one at a time, in the order they arrive."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, allowed_uids: typing.Iterable[int] | None = None):
+        if os.path.exists(socket_path):  # Left behind by an earlier daemon
+            os.unlink(socket_path)
+        #: set[int] | None: The users that may send push events, or None to leave this to the socket permissions.
+        self.allowed_uids = set(allowed_uids) if allowed_uids is not None else None
+        super().__init__(socket_path, PushHandler)
+        #: asfyaml.output.OutputRouter: The router output is sent through. This is set by :func:`serve`.
+        self.router: asfyaml.output.OutputRouter
+        self._repo_locks: collections.defaultdict[str, threading.Lock] = collections.defaultdict(threading.Lock)
+        self._repo_locks_lock = threading.Lock()
+
+    def server_bind(self):
+        # Bind with a umask leaving out everyone else, so the socket is never accessible to them, not even briefly.
+        umask = os.umask(0o777 & ~SOCKET_MODE)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.server_address, SOCKET_MODE)
+
+    def peer_uid(self, request: socket.socket) -> int:
+        """Returns the id of the user on the other end of a connection"""
+        credentials = request.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        _pid, uid, _gid = struct.unpack("3i", credentials)
+        return uid
+
+    def repo_lock(self, repo_path: str) -> threading.Lock:
+        with self._repo_locks_lock:
+            return self._repo_locks[os.path.realpath(repo_path)]
+
+    def process(self, event: dict):
+        """Runs .asf.yaml for a push event"""
+        import asfyaml.asfyaml
+        import asfyaml.dataobjects
+
+        repo = asfyaml.dataobjects.Repository(
+            event["repo"], reflog=event.get("reflog", ""), org_id=event.get("org", "apache")
+        )
+        try:
+            config_data = event.get("config")
+            if config_data is None:
+                config_data = repo.read_file(event["ref"], ".asf.yaml") or ""
+            with self.repo_lock(event["repo"]):
+                a = asfyaml.asfyaml.ASFYamlInstance(
+                    repo, event["committer"], config_data, event["ref"], environ=event.get("environ", {})
+                )
+                a.environments_enabled.update(event.get("environments", []))
+                a.run_parts()
+        finally:
+            repo.close()
+
+
+def warm_up():
+    """Does everything a run would otherwise do the first time around: imports every feature, and works out
+    the schema fingerprints used by the validation cache."""
+    import asfyaml.asfyaml
+    import asfyaml.feature
+    import asfyaml.validation_cache
+
+    asfyaml.feature.load_all_features()
+    for feature_class in asfyaml.asfyaml.ASFYamlFeature.features:
+        asfyaml.validation_cache.schema_fingerprint(feature_class)
+
+
+def serve(socket_path: str = SOCKET_PATH, allowed_uids: typing.Iterable[int] | None = None):
+    """Processes push events sent to the socket at socket_path, until interrupted. If allowed_uids is given,
+    only push events from those users are processed."""
+    import asfyaml.output
+
+    warm_up()
+    with PushServer(socket_path, allowed_uids) as server, asfyaml.output.routed_stdout() as router:
+        server.router = router
+        print(f"Listening for push events on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+def submit(
+    repo: str,
+    committer: str,
+    ref: str,
+    reflog: str = "",
+    environ: typing.Mapping[str, str] | None = None,
+    config_data: str | None = None,
+    org_id: str = "apache",
+    environments: typing.Iterable[str] = (),
+    socket_path: str = SOCKET_PATH,
+    output: typing.TextIO | None = None,
+):
+    """Hands a push event to the daemon, and writes the output of the run to output (sys.stdout by default) as
+    it comes in. If the run fails, a DaemonError is raised. If the daemon is not running, this raises an OSError,
+    in which case the caller can fall back to processing the push itself.
+
+    Example use, from a git hook::
+
+        asfyaml.daemon.submit(repo_path, committer, "refs/heads/main", reflog=reflog, environ=os.environ)
+    """
+    event = {
+        "repo": repo,
+        "committer": committer,
+        "ref": ref,
+        "reflog": reflog,
+        "environ": dict(os.environ if environ is None else environ),
+        "org": org_id,
+        "environments": list(environments),
+    }
+    if config_data is not None:
+        event["config"] = config_data
+    output = output or sys.stdout
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(event).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as rfile:
+            for line in rfile:
+                message = json.loads(line)
+                if "output" in message:
+                    output.write(message["output"])
+                elif message.get("status") == "ok":
+                    output.flush()
+                    return
+                else:
+                    output.flush()
+                    raise DaemonError(feature=message.get("feature", ""), error_message=message.get("error", ""))
+    raise DaemonError(error_message="The .asf.yaml daemon closed the connection before finishing the run")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the .asf.yaml daemon")
+    parser.add_argument("--socket", type=str, default=SOCKET_PATH, help="path of the Unix socket to listen on")
+    parser.add_argument(
+        "--allow-uid",
+        type=int,
+        action="append",
+        help="only accept push events from this user id (can be given more than once)",
+    )
+    parser.add_argument("--trace", type=str, help="append timing spans as JSON lines to this file, - for stderr")
+    args = parser.parse_args()
+    if args.trace:
+        import asfyaml.tracing
+
+        asfyaml.tracing.configure(args.trace)
+    try:
+        serve(args.socket, args.allow_uid)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
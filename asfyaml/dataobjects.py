@@ -18,7 +18,10 @@
 import pathlib
 import asfyaml.mappings as mappings
 import os
+import re
 import subprocess
+import sys
+import threading
 
 DEFAULT_BRANCH = "refs/heads/main"
 UNKNOWN_BRANCH = "--unknown-branch--"
@@ -42,6 +45,47 @@ COMMIT_FIELDS = [
 ]
 
 
+# Every field a Commit can load, with the diffstat (from git's --stat) last
+ALL_FIELDS = [key for key, _ in COMMIT_FIELDS] + ["stats"]
+# Fields worked out from the committer_email field
+DERIVED_FIELDS = {"committer_uname": "committer_email", "committer_domain": "committer_email"}
+# Fields that tend to repeat across the commits of a push, and are interned so each value is only kept once
+INTERNED_FIELDS = {"author", "author_name", "author_email", "committer", "committer_email"}
+
+
+def commit_format(fields=None):
+    """Returns the format string for git show/log for the given fields (all of the COMMIT_FIELDS by default),
+    with each field terminated by a NUL byte"""
+    specs = dict(COMMIT_FIELDS)
+    return "".join(f"{specs[key]}%x00" for key in fields or specs)
+
+
+def select_fields(fields):
+    """Returns the fields to load for a commit, in the order they are listed in by commit_format. Fields derived
+    from others (such as committer_uname) add the field they are worked out from."""
+    if fields is None:
+        return ALL_FIELDS
+    wanted = set()
+    for field in fields:
+        field = DERIVED_FIELDS.get(field, field)
+        if field not in ALL_FIELDS:
+            raise ValueError(f"Unknown commit field: {field}")
+        wanted.add(field)
+    return [key for key in ALL_FIELDS if key in wanted]
+
+
+# Format string for git show/log, with each of the COMMIT_FIELDS terminated by a NUL byte
+COMMIT_FORMAT = commit_format()
+# Marks the start of each commit in batched git log output. As commit messages may contain this character as
+# well, a record only starts where it is followed by a commit sha and the NUL byte after it, which can never be
+# part of a message or a file name.
+RECORD_SEPARATOR = "\x1e"
+RECORD_START = re.compile(RECORD_SEPARATOR + r"(?=[0-9a-f]+\x00)")
+# The most diff text (in characters) kept in memory when loading the diffs of many commits at once with
+# load_files. Diffs beyond that are left out, and loaded one by one if asked for.
+MAX_DIFF_BYTES = 4 * 1024 * 1024
+
+
 def gitcmd(*args):
     """Runs a git command and returns the output as a string"""
     xargs = list(args)
@@ -54,9 +98,19 @@ def gitcmd(*args):
     return rv
 
 
+def git_dir_args(ref):
+    """Returns the --git-dir argument for the repository a ref update belongs to, so git commands for it do not
+    depend on the current directory (which is not the repository in the daemon or the deferred worker). This is
+    empty if the repository is not known."""
+    repository = getattr(ref, "repository", None)
+    return [f"--git-dir={repository.path}"] if repository is not None else []
+
+
 class Committer:
     """ "Simple info class for committer(pusher) of code"""
 
+    __slots__ = ("email", "username")
+
     def __init__(self, username):
         #: str: The ASF user id of the person that pushed this commit, for instance :samp:`humbedooh`
         self.username = username
@@ -65,25 +119,52 @@ class Committer:
 
 
 class Commit:
-    def __init__(self, ref, sha):
+    # Pushes can hold tens of thousands of commits, so these are kept as small as possible.
+    __slots__ = ("_changes", "_diffs", "ref", "sha", *ALL_FIELDS, *DERIVED_FIELDS)
+
+    def __init__(self, ref, sha, parts=None, fields=None):
+        """Loads a commit. If the output of git show (or log) for it in the commit_format format, along
+        with its stats, has already been split into parts, those are used instead of running git show.
+        If those parts only hold some fields (as listed by select_fields), any other field is loaded with
+        git show the first time it is used."""
         self.ref = ref
         self.sha = sha
+        # The (status, path) of each changed file and the diffs of those files, if loaded by load_files
+        self._changes = None
+        self._diffs = {}
 
-        fmt = "--format=format:%s%%x00" % r"%x00".join([s for _, s in COMMIT_FIELDS])
-        args = ["show", "--stat=75", fmt, self.sha]
-        parts = gitcmd(*args).split("\x00")
-
-        self.stats = "\n".join(filter(None, parts.pop(-1).splitlines()))
-        for pos, (key, _) in enumerate(COMMIT_FIELDS):
-            setattr(self, key, parts[pos])
-
-        self.committed_unix = int(self.committed_unix)
-        parts = self.committer_email.split("@")
-        self.committer_uname = parts[0]
-        if len(parts) > 1:
-            self.committer_domain = parts[1]
+        if parts is None:
+            self._load()
         else:
-            self.committer_domain = ""
+            self._set_fields(parts, fields or ALL_FIELDS)
+
+    def _load(self):
+        args = [*git_dir_args(self.ref), "show", "--stat=75", f"--format=format:{COMMIT_FORMAT}", self.sha]
+        self._set_fields(gitcmd(*args).split("\x00"), ALL_FIELDS)
+
+    def _set_fields(self, parts, fields):
+        if "stats" in fields:
+            # The diffstat follows the last field, and is not terminated by a NUL byte
+            parts = [*parts[: len(fields) - 1], parts[-1]]
+        for key, value in zip(fields, parts):
+            if key == "stats":
+                value = "\n".join(filter(None, value.splitlines()))
+            elif key == "committed_unix":
+                value = int(value)
+            elif key == "committer_email":
+                uname, _, domain = value.partition("@")
+                self.committer_uname = sys.intern(uname)
+                self.committer_domain = sys.intern(domain)
+            if key in INTERNED_FIELDS:
+                value = sys.intern(value)
+            setattr(self, key, value)
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not set, such as fields that were left out when listing commits
+        if name not in ALL_FIELDS and name not in DERIVED_FIELDS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        self._load()
+        return object.__getattribute__(self, name)
 
     def __cmp__(self, other):
         return self.committed_unix == other.committed_unix
@@ -92,21 +173,218 @@ class Commit:
     def is_merge(self):
         return len(self.parents.split()) > 1
 
+    @property
+    def changes(self):
+        """Lists the files changed in this commit as (status, path) tuples, where status is the letter git
+        uses for the change (A, M, D and so on, or one letter per parent for merges)"""
+        if self._changes is None:
+            load_files([self])
+        return self._changes
+
     @property
     def files(self):
-        files = gitcmd("show", "--name-only", "--format=format:", self.sha)
-        return [line.strip() for line in files.splitlines() if line.strip()]
+        return [path for _status, path in self.changes]
 
     def diff(self, fname):
-        args = ["show", "--format=format:", self.sha, "--", fname]
+        if fname in self._diffs:
+            return self._diffs[fname]
+        args = [*git_dir_args(self.ref), "show", "--format=format:", self.sha, "--", fname]
         return gitcmd(*args).lstrip()
 
 
+def log_commits(ref, *args, revisions=None, fields=None):
+    """Yields a Commit for every commit listed by a single git log invocation, with args passed on to git log,
+    for instance a revision range. The output is parsed as it comes in, so memory use does not grow with the
+    number of commits, and only one git process is used no matter how many commits there are. Revisions can
+    also be given as a list, which is fed to git log through stdin, so it can be of any length.
+
+    If fields is set, only those fields (see ALL_FIELDS) are loaded, and any other field is loaded for each
+    commit on its own, if it is used. Leaving out the body and stats saves both time and memory."""
+    fields = select_fields(fields)
+    fmt = f"--format=format:{RECORD_SEPARATOR}%H%x00{commit_format(key for key in fields if key != 'stats')}"
+    # git show gives merges the diffstat against their first parent, where git log would give them none.
+    stat_args = ["--stat=75", "--diff-merges=first-parent"] if "stats" in fields else []
+    stdin_args = ["--stdin"] if revisions is not None else []
+    proc = subprocess.Popen(
+        [GIT_CMD, *git_dir_args(ref), "log", *stat_args, fmt, *stdin_args, *args],
+        stdin=subprocess.PIPE if revisions is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    assert proc.stdout is not None and proc.stderr is not None
+    try:
+        if revisions is not None:
+            assert proc.stdin is not None
+            # git log reads all of stdin before it starts listing commits, so this cannot fill up stdout.
+            try:
+                proc.stdin.write("".join(f"{revision}\n" for revision in revisions))
+                proc.stdin.close()
+            except OSError:  # git exited early, the error is printed below
+                pass
+        pending = ""
+        for chunk in iter(lambda: proc.stdout.read(65536), ""):
+            records = RECORD_START.split(pending + chunk)
+            pending = records.pop()  # May not be complete yet
+            for record in records:
+                if record:
+                    sha, *parts = record.split("\x00")
+                    yield Commit(ref, sha, parts, fields)
+        if pending:
+            sha, *parts = pending.split("\x00")
+            yield Commit(ref, sha, parts, fields)
+        if proc.wait() != 0:
+            print(proc.stderr.read())
+    finally:
+        # If we were not iterated to the end, there is no need for git to carry on.
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def _diff_path(header):
+    """Returns the path of the file a diff header line is for, or None if it cannot be told for sure"""
+    if header.startswith("diff --cc "):
+        path = header[len("diff --cc ") :]
+        return None if path.startswith('"') else path
+    names = header[len("diff --git ") :]
+    if names.startswith('"'):  # Quoted because of unusual characters
+        return None
+    # Without rename detection, this is "a/path b/path", with the same path twice.
+    length = (len(names) - 5) // 2
+    path = names[2 : 2 + length]
+    return path if names == f"a/{path} b/{path}" else None
+
+
+def load_files(commits, diffs=False, max_diff_bytes=MAX_DIFF_BYTES):
+    """Loads the files changed by each of the given commits through a single git diff-tree, instead of running
+    git show for every commit. The results are kept by each commit, for its files and changes properties.
+    If diffs is set, the diff of each file is kept as well, so Commit.diff does not have to run git. The output
+    is parsed as it comes in, and once max_diff_bytes worth of diffs have been kept, any further diffs are
+    skipped (and loaded one by one if Commit.diff asks for them).
+
+    Example use::
+
+        commits = list(changeset.commits)
+        load_files(commits, diffs=True)
+        for commit in commits:
+            for path in commit.files:
+                print(commit.diff(path))
+    """
+    by_sha = {}
+    for commit in commits:
+        commit._changes = []
+        by_sha[commit.sha] = commit
+    if not by_sha:
+        return
+    # The commits are all from the same repository, so any of them tells which one to run git in.
+    args = [GIT_CMD, *git_dir_args(commit.ref), "diff-tree", "--stdin", "-r", "--root", "--always", "--cc"]
+    args += ["--raw", "-p"] if diffs else ["--name-status"]
+    proc = subprocess.Popen(
+        args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True
+    )
+    assert proc.stdin is not None and proc.stdout is not None and proc.stderr is not None
+
+    def feed():
+        # Written from a separate thread, so git never blocks on a full stdout pipe while we are still writing.
+        try:
+            for sha in by_sha:
+                proc.stdin.write(sha + "\n")
+            proc.stdin.close()
+        except OSError:
+            pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    diff_bytes = 0
+    commit = None
+    section = None  # Path and lines of the diff currently being read
+
+    def keep_section():
+        nonlocal diff_bytes
+        if section is None or section[0] is None:
+            return
+        text = "\n".join(section[1]) + "\n"
+        if diff_bytes + len(text) <= max_diff_bytes:
+            commit._diffs[section[0]] = text
+            diff_bytes += len(text)
+
+    try:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if line in by_sha:  # Each commit starts with a line holding just its sha
+                keep_section()
+                section = None
+                commit = by_sha[line]
+            elif commit is None:
+                continue
+            elif section is None and "\t" in line:
+                status, path = line.split("\t", 1)
+                commit._changes.append((status.split()[-1], path))
+            elif line.startswith(("diff --git ", "diff --cc ")):
+                keep_section()
+                section = (_diff_path(line), [line])
+            elif section is not None:
+                section[1].append(line)
+        keep_section()
+        if proc.wait() != 0:
+            print(proc.stderr.read())
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        writer.join()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+class RefSnapshot:
+    """The refs of a repository and the commits they point to, as listed by a single git for-each-ref. A push
+    shares one snapshot between all of its ChangeSets, so the refs are only listed once, however many branches
+    the push creates."""
+
+    def __init__(self, refs):
+        #: dict: The sha of each ref, by name, for instance :samp:`{"refs/heads/main": "4f3c..."}`
+        self.refs = refs
+
+    @classmethod
+    def load(cls, path=None):
+        """Lists the refs of the repository at path, or of the one in the current directory if path is None"""
+        refs = {}
+        git_dir = [f"--git-dir={path}"] if path is not None else []
+        for line in gitcmd(*git_dir, "for-each-ref", "--format=%(objectname) %(refname)").splitlines():
+            sha, _, name = line.partition(" ")
+            refs[name] = sha
+        return cls(refs)
+
+    def branch_heads(self, exclude=None):
+        """Returns the shas that branches (other than the one named exclude) point to, without duplicates"""
+        return list(
+            dict.fromkeys(sha for name, sha in self.refs.items() if name.startswith("refs/heads/") and name != exclude)
+        )
+
+
 class ChangeSet:
-    def __init__(self, name, oldsha, newsha):
+    __slots__ = ("_refs", "name", "newsha", "oldsha", "repository")
+
+    def __init__(self, name, oldsha, newsha, repository=None):
         self.name = name
         self.oldsha = oldsha
         self.newsha = newsha
+        # The repository the push belongs to, which holds the RefSnapshot shared by all ref updates of the push
+        self.repository = repository
+        self._refs = None
+
+    @property
+    def refs(self):
+        """Returns the RefSnapshot of the repository this ref update was pushed to"""
+        if self.repository is not None:
+            return self.repository.refs
+        if self._refs is None:
+            self._refs = RefSnapshot.load()
+        return self._refs
 
     @property
     def created(self):
@@ -133,44 +411,290 @@ class ChangeSet:
         """Returns true if this is a history rewrite"""
         return self.merge_base != self.oldsha
 
+    def revisions(self):
+        """Returns the git revisions selecting the commits in this ref update. For new refs, this excludes every
+        other branch, which can be a long list, so it should be passed to git through stdin (see log_commits)."""
+        if not self.created:
+            return ["%s..%s" % (self.oldsha, self.newsha)]
+        # Only report commits that aren't reachable from any other branch
+        return [*(f"^{sha}" for sha in self.refs.branch_heads(exclude=self.name)), self.newsha]
+
     @property
-    def commits(self, num=None, reverse=False):
-        """Lists all commits in this ref update as Commit objects"""
+    def commits(self):
+        """Lists all commits in this ref update as Commit objects, newest first"""
+        return self.iter_commits()
+
+    def iter_commits(self, limit=None, reverse=False, fields=None):
+        """Lists the commits in this ref update as Commit objects, as they are read from a single git log.
+        Nothing is kept around once a commit has been handed out, so this can go through any number of commits.
+
+        :parameter limit: The most commits to list. As with git log, these are the newest ones, even if reversed.
+        :parameter reverse: Set to True to list the commits oldest first.
+        :parameter fields: The fields to load right away (see ALL_FIELDS), all of them by default. Other fields
+                           are loaded one commit at a time if they are used.
+
+        Example use::
+
+            for commit in changeset.iter_commits(reverse=True, fields=("subject", "committer")):
+                print(f"{commit.sha[:10]} {commit.subject} ({commit.committer})")
+        """
         # Deleted refs have no commits.
         if self.deleted:
             return
-        # Only report commits that aren't reachable from any other branch
-        refs = []
-        args = ["for-each-ref", "--format=%(refname)"]
-
-        for r in gitcmd(*args).splitlines():
-            if r.strip() == self.name:
-                continue
-            if r.strip().startswith("refs/heads/"):
-                refs.append("^%s" % r.strip())
-        args = ["rev-list"]
-        if num is not None:
-            args += ["-n", str(num)]
+        args = []
+        if limit is not None:
+            args += ["-n", str(limit)]
         if reverse:
             args.append("--reverse")
-        if self.created:
-            args += refs
-            args.append(self.newsha)
-        else:
-            args.append("%s..%s" % (self.oldsha, self.newsha))
-        for line in gitcmd(*args).splitlines():
-            sha = line.strip()
-            yield Commit(self, sha)
+        # Load all commits from a single git log, rather than running git show for each one.
+        yield from log_commits(self, *args, revisions=self.revisions(), fields=fields)
+
+    def commits_with_files(self, diffs=False, max_diff_bytes=MAX_DIFF_BYTES):
+        """Lists all commits in this ref update, with the files they changed (and optionally the diffs of those
+        files) already loaded, using a single git process for all of them. See :func:`load_files`."""
+        commits = list(self.commits)
+        load_files(commits, diffs=diffs, max_diff_bytes=max_diff_bytes)
+        return commits
+
+    def commits_touching(self, paths):
+        """Lists the commits in this ref update that changed any of the given paths (relative to the root of the
+        repository), as Commit objects. This takes a single git log limited to those paths, rather than looking
+        at the files of every commit in turn.
+
+        Example use::
+
+            for commit in changeset.commits_touching([".asf.yaml"]):
+                print(f"{commit.sha} changed .asf.yaml")
+        """
+        if self.deleted:
+            return
+        # --full-history keeps git from leaving out commits on merged branches that touched the paths.
+        pathspecs = [f":(literal){path}" for path in paths]
+        for commit in log_commits(self, "--full-history", "--", *pathspecs, revisions=self.revisions()):
+            # That also lists every merge that brought in a change to the paths from one of its sides. As with
+            # git show, merges only count if their own (combined) diff changes the paths, as when resolving a
+            # conflict. As with the pathspecs, a directory covers every file in it.
+            if commit.is_merge:
+                load_files([commit])
+                if not any(
+                    file == path or file.startswith(path.rstrip("/") + "/") for file in commit.files for path in paths
+                ):
+                    continue
+            yield commit
 
     @property
     def merge_base(self):
         """finds the best common ancestor(s) between two commits to use in a three-way merge."""
         if ("0" * 40) in (self.oldsha, self.newsha):
             return "0" * 40
-        sha = gitcmd("merge-base", self.oldsha, self.newsha)
+        sha = gitcmd(*git_dir_args(self), "merge-base", self.oldsha, self.newsha)
         return sha.strip()
 
 
+class BatchProcess:
+    """A git cat-file process in one of its batch modes, kept open to answer any number of queries.
+    Queries are answered one at a time, so this can be shared between threads. If the process dies,
+    it is started again."""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                [GIT_CMD, f"--git-dir={self.path}", "cat-file", self.mode],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def query(self, name):
+        """Looks up an object. Returns the header fields git gives for it (sha, type, size) and, in --batch
+        mode, the contents of the object. Returns None if there is no such object."""
+        if "\n" in name:
+            raise ValueError(f"Invalid object name: {name!r}")
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    proc = self._start()
+                    proc.stdin.write(name.encode("utf-8") + b"\n")
+                    proc.stdin.flush()
+                    header = proc.stdout.readline().decode("utf-8").split()
+                    if not header:
+                        raise EOFError("git cat-file exited")
+                    if header[-1] in ("missing", "ambiguous"):
+                        return None
+                    if self.mode != "--batch":
+                        return header, None
+                    size = int(header[2])
+                    contents = proc.stdout.read(size)
+                    proc.stdout.read(1)  # Each object is followed by a newline
+                    if len(contents) != size:
+                        raise EOFError("git cat-file exited")
+                    return header, contents
+                except (OSError, EOFError):
+                    self.close()
+                    if attempt:
+                        raise
+
+    def close(self):
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.wait()
+            self._proc.stdin.close()
+            self._proc.stdout.close()
+            self._proc = None
+
+
+class ObjectReader:
+    """Reads objects from a repository through git cat-file processes that are kept open, so each read does not
+    need to start a new git process. Object names are anything git understands, like :samp:`HEAD:.asf.yaml`.
+
+    Example use::
+
+        reader = ObjectReader("/x1/repos/asf/whimsy-website.git")
+        config = reader.blob("refs/heads/main:.asf.yaml")
+        for mode, kind, sha, name in reader.tree("refs/heads/main"):
+            print(name)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._batch = BatchProcess(path, "--batch")
+        self._batch_check = BatchProcess(path, "--batch-check")
+
+    def info(self, name):
+        """Returns the (sha, type, size) of an object, or None if there is no such object"""
+        result = self._batch_check.query(name)
+        if result is None:
+            return None
+        sha, kind, size = result[0]
+        return sha, kind, int(size)
+
+    def read(self, name):
+        """Returns the (sha, type, contents as bytes) of an object, or None if there is no such object"""
+        result = self._batch.query(name)
+        if result is None:
+            return None
+        header, contents = result
+        return header[0], header[1], contents
+
+    def blob(self, name):
+        """Returns the contents of a file (such as :samp:`refs/heads/main:.asf.yaml`) as a string, or None if
+        it does not exist"""
+        result = self.read(name)
+        if result is None or result[1] != "blob":
+            return None
+        return result[2].decode("utf-8", errors="replace")
+
+    def commit(self, name):
+        """Returns the headers of a commit as a dictionary (with a list of parents), along with its message.
+        Returns None if there is no such commit."""
+        result = self.read(f"{name}^{{commit}}")
+        if result is None:
+            return None
+        raw_headers, _, message = result[2].decode("utf-8", errors="replace").partition("\n\n")
+        headers = {"sha": result[0], "parent": []}
+        for line in raw_headers.splitlines():
+            if line.startswith(" "):  # Continuation of a multi-line header, like a signature
+                continue
+            key, _, value = line.partition(" ")
+            if key == "parent":
+                headers["parent"].append(value)
+            else:
+                headers[key] = value
+        return headers, message
+
+    def tree(self, name):
+        """Returns the entries of a tree (such as :samp:`HEAD` or :samp:`HEAD:docs`) as a list of
+        (mode, type, sha, name) tuples. Returns None if there is no such tree."""
+        result = self.read(f"{name}^{{tree}}")
+        if result is None:
+            return None
+        data = result[2]
+        entries = []
+        pos = 0
+        while pos < len(data):
+            space = data.index(b" ", pos)
+            nul = data.index(b"\0", space)
+            mode = data[pos:space].decode("ascii")
+            sha = data[nul + 1 : nul + 21].hex()
+            kind = "tree" if mode == "40000" else "commit" if mode == "160000" else "blob"
+            entries.append((mode, kind, sha, data[space + 1 : nul].decode("utf-8", errors="replace")))
+            pos = nul + 21
+        return entries
+
+    def close(self):
+        """Stops the git processes. They are started again if needed."""
+        self._batch.close()
+        self._batch_check.close()
+
+
+# Files in the git directory of a repository that features keep their own state in
+METADATA_FILES = ("notifications.yaml", "github_collaborators.txt", "description")
+
+
+class RepositoryContext:
+    """Read-only snapshot of what features need to know about a repository: its names, the project owning it,
+    its default branch, and the contents of its METADATA_FILES. This is made once per Repository, reading all
+    of those files in one go, and is shared by every feature through :attr:`Repository.context`. Changes made to
+    the files during a run are not reflected in it.
+
+    Example use::
+
+        context = repo.context
+        if context.default_branch == "main":
+            old_collaborators = context.metadata_file("github_collaborators.txt") or ""
+    """
+
+    __slots__ = ("_metadata", "default_branch", "hostname", "is_private", "name", "org_id", "path", "project")
+
+    def __init__(self, path, name, org_id, head, metadata):
+        init = super().__setattr__
+        init("path", path)
+        init("name", name)
+        init("org_id", org_id)
+        init("is_private", "private" in path.parts)
+        match = mappings.REPO_RE.match(name)
+        # Weird repo names default to infra owning them.
+        init("project", match.group(1) if match else "infrastructure")
+        init("hostname", mappings.LDAP_TO_HOSTNAME.get(self.project, self.project))
+        if head is not None:
+            init("default_branch", head.removeprefix("ref: refs/heads/").strip())
+        else:
+            init("default_branch", DEFAULT_BRANCH.removeprefix("refs/heads/"))
+        init("_metadata", metadata)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    @classmethod
+    def load(cls, repository):
+        """Reads HEAD and the METADATA_FILES of a repository, and returns the context for it"""
+        contents = {}
+        for filename in ("HEAD", *METADATA_FILES):
+            try:
+                with open(os.path.join(repository.path, filename), encoding="utf-8") as f:
+                    contents[filename] = f.read()
+            except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+                contents[filename] = None
+        head = contents.pop("HEAD")
+        return cls(repository.path, repository.name, repository.org_id, head, contents)
+
+    def metadata_file(self, filename):
+        """Returns the contents of one of the METADATA_FILES as they were when the context was made, or None if
+        the file did not exist"""
+        return self._metadata[filename]
+
+
 class Repository:
     """Simple class that holds information about the repository (and branch) being processed.
 
@@ -195,34 +719,81 @@ class Repository:
         self._reflog = reflog or ""
         #: str: The GitHub organization this repository belongs to, by default `apache`.
         self.org_id = org_id
+        self._objects = None
+        self._objects_lock = threading.Lock()
+        self._context = None
+        self._context_lock = threading.Lock()
+        self._refs = None
+        self._refs_lock = threading.Lock()
+
+    @property
+    def objects(self):
+        """Returns the :class:`ObjectReader` for this repository. This is shared by everything using the
+        repository, so objects can be read without starting a new git process each time."""
+        with self._objects_lock:
+            if self._objects is None:
+                self._objects = ObjectReader(self.path)
+            return self._objects
+
+    @property
+    def context(self):
+        """Returns the :class:`RepositoryContext` for this repository, which is loaded the first time it is needed
+        and then shared by every feature"""
+        with self._context_lock:
+            if self._context is None:
+                self._context = RepositoryContext.load(self)
+            return self._context
+
+    @property
+    def refs(self):
+        """Returns the :class:`RefSnapshot` for this push, which is listed the first time it is needed and then
+        shared by all of its ChangeSets"""
+        with self._refs_lock:
+            if self._refs is None:
+                self._refs = RefSnapshot.load(self.path)
+            return self._refs
+
+    def rev_list(self, *args):
+        """Returns the shas of the commits git rev-list lists for args (such as a revision range), newest first"""
+        return gitcmd(f"--git-dir={self.path}", "rev-list", *args).split()
+
+    def read_file(self, revision, path):
+        """Returns the contents of a file at a given revision, or None if it does not exist there"""
+        return self.objects.blob(f"{revision}:{path}")
+
+    def file_sha(self, revision, path):
+        """Returns the sha of the blob for a file at a given revision, or None if it does not exist there. This
+        only looks up the trees, and does not read the file itself."""
+        info = self.objects.info(f"{revision}:{path}")
+        if info is None or info[1] != "blob":
+            return None
+        return info[0]
+
+    def close(self):
+        """Stops any git processes kept open for reading objects from this repository"""
+        with self._objects_lock:
+            if self._objects is not None:
+                self._objects.close()
 
     @property
     def is_private(self):
         """ "Set to True if the repository is a private repository, False if it is public"""
-        return "private" in self.path.parts
+        return self.context.is_private
 
     @property
     def project(self):
         """Returns the LDAP name of the project owning this repository, for instance httpd or openoffice"""
-        match = mappings.REPO_RE.match(self.name)
-        if match:
-            return match.group(1)
-        return "infrastructure"  # Weird repo name, default to infra owning it.
+        return self.context.project
 
     @property
     def hostname(self):
         """Returns the hostname for the project. httpd for httpd, but whimsical for whimsy."""
-        return mappings.LDAP_TO_HOSTNAME.get(self.project, self.project)
+        return self.context.hostname
 
     @property
     def default_branch(self):
         """Returns the default branch for this repository."""
-        head_path = os.path.join(self.path, "HEAD")
-        if os.path.isfile(head_path):
-            hb = open(head_path).read().removeprefix("ref: refs/heads/").strip()
-        else:
-            hb = DEFAULT_BRANCH.removeprefix("refs/heads/")
-        return hb
+        return self.context.default_branch
 
     @property
     def changesets(self):
@@ -230,4 +801,4 @@ class Repository:
         Each ChangeSet can have several commits bundled"""
         for line in self._reflog.splitlines():
             oldsha, newsha, name = line.split(None, 2)
-            yield ChangeSet(name.strip(), oldsha, newsha)
+            yield ChangeSet(name.strip(), oldsha, newsha, repository=self)
@@ -0,0 +1,208 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Durable queue of .asf.yaml runs to apply later, and the worker that applies them.
+
+A push hook can validate .asf.yaml and hand the rest of the run (GitHub API calls, builds, pubsub payloads and
+so on) to this queue with :func:`asfyaml.asfyaml.ASFYamlInstance.defer_parts`, instead of waiting for it.
+Jobs are kept in a SQLite database, and are picked up by :func:`work`, which runs them with a pool of threads.
+Failed jobs are retried with exponential backoff, up to MAX_ATTEMPTS times. Jobs for the same repository are
+always run one at a time, in the order they were queued, so the latest configuration is applied last.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import contextvars
+import json
+import os
+import sqlite3
+import time
+
+from asfyaml import BASE_CACHE_PATH
+
+QUEUE_PATH = os.path.join(BASE_CACHE_PATH, "deferred.sqlite")
+MAX_ATTEMPTS = 5
+# Seconds to wait before retrying a failed job. This doubles after each failed attempt.
+BACKOFF_BASE = 30
+# Jobs that have been running for longer than this many seconds are assumed to belong to a worker that died,
+# and are queued again.
+LEASE_TIME = 3600
+DEFAULT_WORKERS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    repo TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    next_attempt REAL NOT NULL,
+    started REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, next_attempt);
+CREATE INDEX IF NOT EXISTS jobs_repo ON jobs (repo, status);
+"""
+
+
+class JobQueue:
+    """A queue of deferred .asf.yaml runs, stored in a SQLite database at path. Each job is a dictionary, as
+    returned by :func:`asfyaml.asfyaml.ASFYamlInstance.as_job`. Jobs are queued, then running, and either removed
+    once done or marked as failed once they have run out of attempts."""
+
+    def __init__(self, path: str = QUEUE_PATH):
+        self.path = path
+        with contextlib.closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def put(self, job: dict) -> int:
+        """Adds a job to the queue, and returns its id"""
+        now = time.time()
+        with contextlib.closing(self._connect()) as db:
+            cursor = db.execute(
+                "INSERT INTO jobs (repo, payload, created, next_attempt) VALUES (?, ?, ?, ?)",
+                (job["repo"], json.dumps(job), now, now),
+            )
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def claim(self) -> tuple[int, dict] | None:
+        """Marks the next job that is ready to run as running, and returns its id and the job itself.
+        Returns None if no job is ready."""
+        now = time.time()
+        with contextlib.closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND started < ?", (now - LEASE_TIME,)
+            )
+            row = db.execute(
+                """SELECT id, payload FROM jobs AS job WHERE status = 'queued' AND next_attempt <= ?
+                   AND NOT EXISTS (SELECT 1 FROM jobs AS earlier WHERE earlier.repo = job.repo AND earlier.id < job.id
+                                   AND earlier.status IN ('queued', 'running'))
+                   ORDER BY id LIMIT 1""",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, started = ? WHERE id = ?",
+                    (now, row[0]),
+                )
+            db.execute("COMMIT")
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def finish(self, job_id: int):
+        """Removes a job that ran successfully"""
+        with contextlib.closing(self._connect()) as db:
+            db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def fail(self, job_id: int, error: str) -> bool:
+        """Records a failed attempt at running a job. Returns True if it will be retried, or False if the job has
+        run out of attempts, in which case it is kept as failed."""
+        with contextlib.closing(self._connect()) as db:
+            (attempts,) = db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if attempts >= MAX_ATTEMPTS:
+                db.execute("UPDATE jobs SET status = 'failed', last_error = ? WHERE id = ?", (error, job_id))
+                return False
+            next_attempt = time.time() + BACKOFF_BASE * 2 ** (attempts - 1)
+            db.execute(
+                "UPDATE jobs SET status = 'queued', next_attempt = ?, last_error = ? WHERE id = ?",
+                (next_attempt, error, job_id),
+            )
+            return True
+
+    def counts(self) -> dict[str, int]:
+        """Returns the number of jobs in the queue, by status"""
+        with contextlib.closing(self._connect()) as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def run_job(job: dict):
+    """Runs the features of a deferred .asf.yaml run"""
+    import asfyaml.asfyaml
+    import asfyaml.dataobjects
+
+    repo = asfyaml.dataobjects.Repository(job["repo"], reflog=job["reflog"], org_id=job["org"])
+    a = asfyaml.asfyaml.ASFYamlInstance(repo, job["committer"], job["config"], job["ref"], environ=job["environ"])
+    a.environments_enabled.update(job["environments"])
+    a.no_cache = a.no_cache or job["no_cache"]
+    a.run_parts()
+
+
+def work(queue: JobQueue, workers: int = DEFAULT_WORKERS, once: bool = False, poll_interval: float = 1.0):
+    """Runs queued jobs, up to workers at a time. Unless once is set, this keeps waiting for new jobs forever.
+    With once set, it returns as soon as no more jobs are ready to run."""
+    import asfyaml.output
+
+    def process(job_id: int, job: dict):
+        with router.capture():
+            print(f"Running deferred .asf.yaml job {job_id} for {job['repo']} (branch {job['ref']})")
+            try:
+                run_job(job)
+            except Exception as e:
+                if queue.fail(job_id, str(e)):
+                    print(f"Job {job_id} failed, will retry: {e}")
+                else:
+                    print(f"Job {job_id} failed {MAX_ATTEMPTS} times, giving up: {e}")
+            else:
+                queue.finish(job_id)
+
+    running: set[concurrent.futures.Future] = set()
+    with (
+        asfyaml.output.routed_stdout() as router,
+        concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor,
+    ):
+        while True:
+            while len(running) < workers:
+                claimed = queue.claim()
+                if claimed is None:
+                    break
+                job_id, job = claimed
+                running.add(executor.submit(contextvars.copy_context().run, process, job_id, job))
+            if not running:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            _done, not_done = concurrent.futures.wait(
+                running, timeout=poll_interval, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            running = set(not_done)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Applies deferred .asf.yaml runs")
+    parser.add_argument("--queue", type=str, default=QUEUE_PATH, help="path of the job queue database")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="number of jobs to run at a time")
+    parser.add_argument("--once", action="store_true", help="exit once no more jobs are ready to run")
+    args = parser.parse_args()
+    try:
+        work(JobQueue(args.queue), workers=args.workers, once=args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@
 """Environment variables carried over from earlier Git platforms."""
 
 import os
+import typing
 
 DEBUG = False
 
@@ -32,12 +33,26 @@ if DEBUG:
     os.environ["AUTH_FILE"] = "debug"
 
 
-def _repo_name():
-    path = filter(None, os.environ.get("PATH_INFO", "").split("/"))
+# The variables that make up the environment of a git hook, see Environment.
+HOOK_VARIABLES = (
+    "PATH_INFO",
+    "GIT_PROJECT_ROOT",
+    "GIT_COMMITTER_NAME",
+    "GIT_COMMITTER_EMAIL",
+    "SCRIPT_NAME",
+    "WEB_HOST",
+    "WRITE_LOCK",
+    "AUTH_FILE",
+    "REMOTE_ADDR",
+)
+
+
+def _repo_name(environ: typing.Mapping[str, str] = os.environ):
+    path = filter(None, environ.get("PATH_INFO", "").split("/"))
     path = filter(lambda p: p != "git-receive-pack", list(path))
     plist = list(path)
     if len(plist) != 1:
-        raise ValueError("Invalid PATH_INFO: %s" % os.environ.get("PATH_INFO"))
+        raise ValueError("Invalid PATH_INFO: %s" % environ.get("PATH_INFO"))
     return plist[0].removesuffix(".git")
 
 
@@ -47,14 +62,22 @@ def getvar(key, default: str | None = None):
 
 
 class Environment:
-    def __init__(self):
-        self.repo_name = _repo_name()
-        self.repo_dir = os.path.join(getvar("GIT_PROJECT_ROOT"), "%s.git" % self.repo_name)
-        self.committer = getvar("GIT_COMMITTER_NAME")
-        self.remote_user = getvar("GIT_COMMITTER_EMAIL")
-        self.script_name = getvar("SCRIPT_NAME")
-        self.web_host = getvar("WEB_HOST")
+    """The git hook environment of a push. This is read from the OS environment, unless another mapping
+    of variables is given, as is the case for pushes handled by a long-running daemon."""
+
+    def __init__(self, environ: typing.Mapping[str, str] | None = None):
+        if environ is None:
+            environ = os.environ
+        #: dict: The hook variables this environment was created from, for recreating it elsewhere.
+        self.variables = {key: environ[key] for key in HOOK_VARIABLES if key in environ}
+        self.repo_name = _repo_name(environ)
+        self.repo_dir = os.path.join(environ.get("GIT_PROJECT_ROOT", ""), "%s.git" % self.repo_name)
+        self.committer = environ.get("GIT_COMMITTER_NAME")
+        self.remote_user = environ.get("GIT_COMMITTER_EMAIL")
+        self.script_name = environ.get("SCRIPT_NAME")
+        self.web_host = environ.get("WEB_HOST")
         self.archived_lock = os.path.join(self.repo_dir, "nocommit")  # Lock file for archived read-only repositories
-        self.write_locks = [getvar("WRITE_LOCK"), self.archived_lock]  # Global maintenance lock, plus archived locks
-        self.auth_file = getvar("AUTH_FILE")
-        self.ip = os.environ.get("REMOTE_ADDR", "127.0.0.1")
+        # Global maintenance lock, plus archived locks
+        self.write_locks = [environ.get("WRITE_LOCK"), self.archived_lock]
+        self.auth_file = environ.get("AUTH_FILE")
+        self.ip = environ.get("REMOTE_ADDR", "127.0.0.1")
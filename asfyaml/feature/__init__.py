@@ -15,7 +15,34 @@
 # specific language governing permissions and limitations
 # under the License.
 
-# Simple init that gathers all the features and short-circuits ASFYamlFeature so it won't shadow itself inside
-# the features.
+"""Registry of .asf.yaml features. Feature modules are only imported once a .asf.yaml file makes use of them."""
 
-from . import testfeature, notifications, website_publish, website_staging, github, pelican, jekyll, project
+import importlib
+
+#: dict: Maps the top-level .asf.yaml key of each feature to the module (in this package) implementing it.
+#: New features must be added here, or they will never be loaded.
+FEATURE_MODULES = {
+    "test": "testfeature",
+    "notifications": "notifications",
+    "publish": "website_publish",
+    "staging": "website_staging",
+    "github": "github",
+    "pelican": "pelican",
+    "pelicantest": "pelican",
+    "jekyll": "jekyll",
+    "project": "project",
+}
+
+
+def load_features(*names: str):
+    """Imports the feature modules for the given top-level .asf.yaml keys, registering their features.
+    Keys without a registered feature (such as :kbd:`meta`) are ignored."""
+    for name in names:
+        module_name = FEATURE_MODULES.get(name)
+        if module_name:
+            importlib.import_module(f"{__name__}.{module_name}")
+
+
+def load_all_features():
+    """Imports every registered feature module"""
+    load_features(*FEATURE_MODULES)
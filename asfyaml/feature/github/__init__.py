@@ -17,26 +17,92 @@
 
 """This is the GitHub feature for .asf.yaml."""
 
-from asfyaml.asfyaml import ASFYamlFeature, ASFYamlInstance, DEBUG
+from asfyaml import BASE_CACHE_PATH
+from asfyaml.asfyaml import ASFYamlFeature, ASFYamlInstance
+import asfyaml.tracing as tracing
 import asfyaml.validators
 import strictyaml
+import hashlib
+import json
 import os
-import sys
+import typing
 import yaml
 import string
 import github as pygithub
 import github.Repository as pygithubrepo
 import github.Auth as pygithubAuth
-from . import constants
+from github.GithubObject import is_defined
+from . import connection, constants
+from .plan import Plan
+from .snapshot import RepoSnapshot
 
-BASE_CACHE_PATH = "/x1/asfyaml" if "pytest" not in sys.modules else "/tmp"
 GH_TOKEN_FILE = "/x1/gitbox/tokens/asfyaml.txt"  # Path to .asf.yaml github token
 _features = []
+# The keys of the github block each directive reads, by directive name. None means the whole block.
+_inputs: dict[str, tuple[str, ...] | None] = {}
+# The directives that always run together, by directive name. See directive().
+_coupled: dict[str, set[str]] = {}
+# Functions returning the settings from outside the github block a directive reads, by directive name.
+_extra_inputs: dict[str, typing.Callable[["ASFGitHubFeature"], typing.Any]] = {}
 
+# PyGithub reuses the keep-alive connections of the shared transport, rather than opening new ones for every run.
+connection.install()
 
-def directive(func):
-    _features.append(func)
-    return func
+
+def directive(
+    func=None,
+    *,
+    inputs: tuple[str, ...] | None = None,
+    coupled_with: tuple[str, ...] = (),
+    extra_inputs: typing.Callable[["ASFGitHubFeature"], typing.Any] | None = None,
+):
+    """Registers a directive of the github feature. A directive only runs if one of its inputs (keys of the
+    github block) changed since the last run, or if it has to run along with a directive it is coupled with,
+    because they read each other's settings or manage the same things on GitHub. Without inputs, a directive
+    runs whenever anything in the github block changed. Directives that also read settings from elsewhere
+    (such as other features) pass extra_inputs, a function of the feature returning those settings.
+
+    Example use::
+
+        @directive(inputs=("copilot_code_review",), coupled_with=("rulesets",))
+        def copilot_code_review(self: ASFGitHubFeature):
+            ...
+    """
+
+    def register(func):
+        _features.append(func)
+        _inputs[func.__name__] = inputs
+        _coupled.setdefault(func.__name__, set()).update(coupled_with)
+        if extra_inputs is not None:
+            _extra_inputs[func.__name__] = extra_inputs
+        for other in coupled_with:
+            _coupled.setdefault(other, set()).add(func.__name__)
+        return func
+
+    return register if func is None else register(func)
+
+
+def directive_fingerprint(name: str, config: dict, feature: "ASFGitHubFeature | None" = None) -> str:
+    """Returns a fingerprint of the settings a directive reads from the github block, along with its extra
+    inputs (see directive) if the feature is given"""
+    inputs = _inputs[name]
+    settings: typing.Any = config if inputs is None else {key: config.get(key) for key in inputs}
+    if feature is not None and name in _extra_inputs:
+        settings = [settings, _extra_inputs[name](feature)]
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def directives_to_run(fingerprints: dict[str, str], previous_fingerprints: dict[str, str]) -> set[str]:
+    """Returns the names of the directives whose inputs changed since the fingerprints of the previous run, along
+    with every directive coupled to those"""
+    changed = {name for name, fingerprint in fingerprints.items() if previous_fingerprints.get(name) != fingerprint}
+    pending = list(changed)
+    while pending:
+        for other in _coupled.get(pending.pop(), ()):
+            if other not in changed:
+                changed.add(other)
+                pending.append(other)
+    return changed
 
 
 class JiraSpaceString(strictyaml.Str):
@@ -50,7 +116,7 @@ class JiraSpaceString(strictyaml.Str):
         return chunk.contents
 
 
-class ASFGitHubFeature(ASFYamlFeature, name="github"):
+class ASFGitHubFeature(ASFYamlFeature, name="github", depends_on=("notifications",)):
     """.asf.yaml GitHub feature class."""
 
     schema = strictyaml.Map(
@@ -193,7 +259,14 @@ class ASFGitHubFeature(ASFYamlFeature, name="github"):
     def __init__(self, parent: ASFYamlInstance, yaml: strictyaml.YAML, **kwargs):
         super().__init__(parent, yaml)
         self._gh: pygithub.Github | None = None
+        #: str: The GitHub token of the run, or None if there is none (in noop mode)
+        self.gh_token: str | None = None
         self._ghrepo: pygithubrepo.Repository | None = None
+        self._snapshot: RepoSnapshot | None = None
+        # Repository settings queued by each directive, to be sent to GitHub in a single request. See edit_repo.
+        self._repo_edits: dict[str, dict] = {}
+        #: Plan: The changes the directives found to be needed. These are made once all directives have run.
+        self.plan = Plan()
 
     @property
     def gh(self) -> pygithub.Github:
@@ -209,6 +282,75 @@ class ASFGitHubFeature(ASFYamlFeature, name="github"):
         else:
             return self._ghrepo
 
+    @property
+    def snapshot(self) -> RepoSnapshot:
+        """The live state of the repository on GitHub, fetched the first time a directive needs any of it"""
+        if self._snapshot is None:
+            self._snapshot = RepoSnapshot(self.ghrepo, self.repository.org_id, self.repository.name)
+        return self._snapshot
+
+    def edit_repo(self, directive: str, **settings):
+        """Queues changes to the repository settings, taking the same arguments as PyGithub's Repository.edit.
+        The changes queued by all directives are sent to GitHub in a single request once they have all run,
+        instead of one request per directive. Settings that are NotSet are left out. If two directives set
+        the same setting to different values, this raises an exception.
+
+        Example use::
+
+            if not self.noop("features"):
+                self.edit_repo("features", has_wiki=False)
+        """
+        settings = {key: value for key, value in settings.items() if is_defined(value)}
+        for other, queued in self._repo_edits.items():
+            for key, value in settings.items():
+                if other != directive and key in queued and queued[key] != value:
+                    raise Exception(f"{directive}: '{key}' is also set by {other}, to a different value")
+        self._repo_edits.setdefault(directive, {}).update(settings)
+
+    def plan_repo_edits(self):
+        """Drops the queued repository settings that already have the wanted value on GitHub, and adds the
+        ones left to the plan, to be sent by :func:`flush_repo_edits`"""
+        if not self._repo_edits:
+            return
+        live = self.snapshot.get("settings", dict)
+        for settings in self._repo_edits.values():
+            for key in [key for key, value in settings.items() if key in live and live[key] == value]:
+                del settings[key]
+        changed = {key: value for settings in self._repo_edits.values() for key, value in settings.items()}
+        if changed:
+            description = ", ".join(f"{key}={value!r}" for key, value in changed.items())
+            self.plan.add("edit_repo", f"Update repository settings: {description}", self.flush_repo_edits)
+
+    def apply_plan(self):
+        """Prints the plan, and makes the changes in it"""
+        if self.plan:
+            print(f"[github] {self.plan}")
+        self.plan.apply(repo=self.repository.name, feature=self.name)
+
+    def flush_repo_edits(self):
+        """Sends the repository settings queued by the directives to GitHub in a single request. If GitHub
+        rejects it, the settings of each directive are sent on their own, so that the error can be attributed
+        to the directive(s) it belongs to."""
+        edits, self._repo_edits = self._repo_edits, {}
+        merged = {key: value for settings in edits.values() for key, value in settings.items()}
+        if not merged:
+            return
+        with tracing.span("directive", repo=self.repository.name, feature=self.name, directive="edit_repo"):
+            try:
+                self.ghrepo.edit(**merged)
+                return
+            except pygithub.GithubException as e:
+                if len(edits) == 1:
+                    raise Exception(f"{next(iter(edits))}: could not update the repository settings: {e}")
+            errors = []
+            for directive, settings in edits.items():
+                try:
+                    self.ghrepo.edit(**settings)
+                except pygithub.GithubException as e:
+                    errors.append(f"{directive}: could not update the repository settings: {e}")
+            if errors:
+                raise Exception("\n".join(errors))
+
     def run(self):
         """GitHub features"""
         # Test if we need to process this (only works on the default branch)
@@ -218,43 +360,76 @@ class ASFGitHubFeature(ASFYamlFeature, name="github"):
             )
             return
 
-        # Check if cached yaml exists, compare if changed
+        # Check which directives have settings that changed since the last run. The previous settings are kept for
+        # the directives that need to know what they set up before (such as rulesets).
         self.previous_yaml = {}
+        previous_fingerprints = {}
         yaml_filepath = f"{BASE_CACHE_PATH}/ghsettings.{self.repository.name}.yml"
+        fingerprints_filepath = f"{BASE_CACHE_PATH}/ghsettings.{self.repository.name}.fingerprints.json"
         if not self.instance.no_cache:
             try:
                 if os.path.exists(yaml_filepath):
                     self.previous_yaml = yaml.safe_load(open(yaml_filepath).read())
                     self.previous_yaml.pop("refname", "")
-                    if self.previous_yaml == self.yaml:
-                        if DEBUG:
-                            print("[github] Saw no changes to GitHub settings, skipping this run.")
-                        return
             except yaml.YAMLError as _e:  # Failed to parse old yaml? bah.
                 print("[github] Failed to parse previous GitHub settings, please notify users@infra.apache.org")
+            try:
+                if os.path.exists(fingerprints_filepath):
+                    previous_fingerprints = json.loads(open(fingerprints_filepath).read())
+            except ValueError:  # Ignore broken fingerprints, as that only means every directive runs
+                pass
+        fingerprints = {_feat.__name__: directive_fingerprint(_feat.__name__, self.yaml, self) for _feat in _features}
+        changed_directives = directives_to_run(fingerprints, previous_fingerprints)
+        if not changed_directives:
+            tracing.annotate(skipped="unchanged")
+            return
+        tracing.annotate(directives=len(changed_directives))
 
         # Update items
         print(f"[github] GitHub meta-data changed for {self.repository.name}, updating...")
+        if len(changed_directives) < len(_features):
+            print(f"[github] Only running directives with changed settings: {', '.join(sorted(changed_directives))}")
         gh_token = os.environ.get("GH_TOKEN")
+        # The repository object is lazy, as the directives read the live state they need from self.snapshot
         if not self.noop("github"):
             # if a GH_TOKEN is set as environment variable, use this, otherwise load it from file
             if not gh_token:
                 gh_token = open(GH_TOKEN_FILE).read().strip()
 
+            self.gh_token = gh_token
             self._gh = pygithub.Github(auth=pygithubAuth.Token(gh_token))
-            self._ghrepo = self.gh.get_repo(f"{self.repository.org_id}/{self.repository.name}")
+            self._ghrepo = self.gh.withLazy(True).get_repo(f"{self.repository.org_id}/{self.repository.name}")
         elif gh_token:  # If supplied from OS env, load the ghrepo object anyway
+            self.gh_token = gh_token
             self._gh = pygithub.Github(auth=pygithubAuth.Token(gh_token))
-            self._ghrepo = self.gh.get_repo(f"{self.repository.org_id}/{self.repository.name}")
+            self._ghrepo = self.gh.withLazy(True).get_repo(f"{self.repository.org_id}/{self.repository.name}")
 
         # For each sub-feature we see (with the @directive decorator on it), run it
-        for _feat in _features:
-            _feat(self)
+        # These only plan the changes they need, see plan.py
+        try:
+            for _feat in _features:
+                if _feat.__name__ not in changed_directives:
+                    continue
+                with tracing.span("directive", repo=self.repository.name, feature=self.name, directive=_feat.__name__):
+                    _feat(self)
+            self.plan_repo_edits()
+        except Exception:
+            # Still apply the changes planned by the directives that did run, as they would have been applied
+            # straight away before, but report the error of the directive that failed.
+            try:
+                self.plan_repo_edits()
+                self.apply_plan()
+            except Exception as e:
+                print(f"[github] {e}")
+            raise
+        self.apply_plan()
 
         # Save cached version of this YAML for next time.
         if os.path.exists(BASE_CACHE_PATH):
             with open(yaml_filepath, "w") as f:
                 f.write(yaml.dump(self.yaml_raw, default_flow_style=False))
+            with open(fingerprints_filepath, "w") as f:
+                f.write(json.dumps(fingerprints, indent=2, sort_keys=True))
         else:
             print(f"CACHE Path '{BASE_CACHE_PATH}' does not exist, skip caching")
 
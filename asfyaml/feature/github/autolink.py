@@ -17,10 +17,11 @@
 
 """GitHub auto-link feature"""
 
+import functools
 from . import directive, ASFGitHubFeature
 
 
-@directive
+@directive(inputs=("autolink_jira",))
 def autolink(self: ASFGitHubFeature):
     # Jira auto-linking
     autolink_jira = self.yaml.get("autolink_jira")
@@ -29,8 +30,12 @@ def autolink(self: ASFGitHubFeature):
         if not isinstance(autolink_jira, list):
             autolink_jira = [autolink_jira]
         # Grab any existing auto-links (to ensure we don't recreate them over and over)
-        if not self.instance.no_cache:
-            existing_autolinks = [x for x in self.ghrepo.get_autolinks()]  # Paginated (Iter) result -> list
+        noop = self.noop("autolink_jira")
+        if not noop:
+            existing_autolinks = self.snapshot.get(
+                "autolinks",
+                lambda: [x for x in self.ghrepo.get_autolinks()],  # Paginated (Iter) result -> list
+            )
         else:
             existing_autolinks = []
         # Now add the autolink if not already there
@@ -39,5 +44,11 @@ def autolink(self: ASFGitHubFeature):
             # Check whether the url_template matches an existing auto-link. If not, create the auto-link entry.
             if not any(jira_url == al.url_template for al in existing_autolinks):
                 print(f"Setting up new auto-link for {jira_space}-<num> -> {jira_url}")
-                if not self.noop("autolink_jira"):
-                    self.ghrepo.create_autolink(key_prefix=f"{jira_space}-", url_template=jira_url)
+                if not noop:
+                    self.plan.add(
+                        "autolink_jira",
+                        f"Create auto-link {jira_space}-<num> -> {jira_url}",
+                        functools.partial(
+                            self.ghrepo.create_autolink, key_prefix=f"{jira_space}-", url_template=jira_url
+                        ),
+                    )
@@ -17,6 +17,7 @@
 
 """GitHub branch protections"""
 
+import functools
 from typing import Mapping, Any
 import github as pygithub
 from github.GithubObject import NotSet, Opt, is_defined
@@ -83,7 +84,7 @@ query($endCursor: String, $organization: String!, $repository: String!, $refPref
         return []
 
 
-@directive
+@directive(inputs=("protected_branches",))
 def branch_protection(self: ASFGitHubFeature):
     # Branch protections
     if "protected_branches" not in self.yaml:
@@ -91,15 +92,20 @@ def branch_protection(self: ASFGitHubFeature):
 
     # Collect all branches and whether they have active branch protection rules
     try:
-        refs = get_head_refs(self)
+        refs = self.snapshot.get("refs", lambda: get_head_refs(self))
+        # The settings of each branch protection rule, by pattern, or None if they are not in the snapshot
+        protection_rules = self.snapshot.get("protection_rules", lambda: None)
     except Exception as ex:
         print(f"Error: failed to retrieve current refs: {ex!s}")
         refs = []
+        protection_rules = None
 
     protected_branches = set()
+    rule_patterns = {}
     for ref in refs:
         name = ref["name"]
         branch_protection_rule = ref.get("branchProtectionRule")
+        rule_patterns[name] = branch_protection_rule and branch_protection_rule["pattern"]
         if branch_protection_rule is not None:
             protected_branches.add(name)
 
@@ -115,15 +121,18 @@ def branch_protection(self: ASFGitHubFeature):
             protected_branches.remove(branch)
 
         branch_changes = []
-        try:
-            ghbranch = self.ghrepo.get_branch(branch=branch)
-        except pygithub.GithubException as e:
-            if e.status == 404:  # No such branch, skip to next rule
-                protection_changes[branch] = [f"Branch {branch} does not exist, protection could not be configured"]
-                continue
-            else:
-                # propagate other errors, GitHub API might have an outage
-                raise e
+        if branch in rule_patterns:  # Known to exist, no need to look it up
+            ghbranch = self.snapshot.branch(branch)
+        else:
+            try:
+                ghbranch = self.ghrepo.get_branch(branch=branch)
+            except pygithub.GithubException as e:
+                if e.status == 404:  # No such branch, skip to next rule
+                    protection_changes[branch] = [f"Branch {branch} does not exist, protection could not be configured"]
+                    continue
+                else:
+                    # propagate other errors, GitHub API might have an outage
+                    raise e
 
         # We explicitly disable force pushes when branch protections are enabled
         allow_force_push = False
@@ -178,10 +187,16 @@ def branch_protection(self: ASFGitHubFeature):
             required_checks = NotSet
 
         # Log changes that will be applied
-        try:
-            live_branch_protection_settings = ghbranch.get_protection()
-        except pygithub.GithubException:
-            live_branch_protection_settings = None
+        live_branch_protection_settings: Any
+        pattern = rule_patterns.get(branch)
+        if protection_rules is not None and branch in rule_patterns and pattern in (None, branch):
+            # Unprotected, or protected by a rule for just this branch, as set up here
+            live_branch_protection_settings = protection_rules.get(pattern)
+        else:
+            try:
+                live_branch_protection_settings = ghbranch.get_protection()
+            except pygithub.GithubException:
+                live_branch_protection_settings = None
 
         if (
             live_branch_protection_settings is None
@@ -246,57 +261,64 @@ def branch_protection(self: ASFGitHubFeature):
                     f"Set require branches to be up to date before merging (strict) to {require_strict}"
                 )
 
-            # Always log the required checks that will be set for now. We will need to parse
-            # the context field in a RequiredStatusChecks object.
-            if is_defined(required_checks):
+            if is_defined(required_checks) and (
+                live_status_checks is None or set(required_checks) != _live_checks(live_status_checks)
+            ):
                 branch_changes.append("Set required status contexts to the following:")
                 for ctx, appid in required_checks:
                     branch_changes.append(f"  - {ctx} (app_id: {appid})")
 
-        # Apply all the changes
-        if not self.noop("protected_branches"):
-            branch_protection_settings = ghbranch.edit_protection(
-                allow_force_pushes=allow_force_push,
-                required_linear_history=required_linear,
-                required_conversation_resolution=required_conversation_resolution,
-                required_approving_review_count=required_approving_review_count,
-                dismiss_stale_reviews=dismiss_stale_reviews,
-                require_code_owner_reviews=require_code_owner_reviews,
-                require_last_push_approval=require_last_push_approval,
-                strict=require_strict,
-                checks=required_checks,  # type: ignore
+        # if required pull requests or status checks are not enabled but present live, we need to explicitly remove them
+        remove_reviews = (
+            not is_defined(required_pull_request_reviews)
+            and live_branch_protection_settings is not None
+            and live_branch_protection_settings.required_pull_request_reviews is not None
+        )
+        if remove_reviews:
+            branch_changes.append("Remove required pull request reviews")
+        remove_status_checks = (
+            not is_defined(required_status_checks)
+            and live_branch_protection_settings is not None
+            and live_branch_protection_settings.required_status_checks is not None
+        )
+        if remove_status_checks:
+            branch_changes.append("Remove required status checks")
+
+        # Plan all the changes, if the live settings differ
+        if branch_changes and not self.noop("protected_branches"):
+            protection = {
+                "allow_force_pushes": allow_force_push,
+                "required_linear_history": required_linear,
+                "required_conversation_resolution": required_conversation_resolution,
+                "required_approving_review_count": required_approving_review_count,
+                "dismiss_stale_reviews": dismiss_stale_reviews,
+                "require_code_owner_reviews": require_code_owner_reviews,
+                "require_last_push_approval": require_last_push_approval,
+                "strict": require_strict,
+                "checks": required_checks,
+            }
+            self.plan.add(
+                "protected_branches",
+                f"Update the protection of branch {branch}",
+                functools.partial(
+                    _update_protection, ghbranch, protection, required_signatures, remove_reviews, remove_status_checks
+                ),
             )
 
-            if is_defined(required_signatures):
-                if required_signatures and branch_protection_settings.required_signatures is False:
-                    ghbranch.add_required_signatures()
-                elif not required_signatures and branch_protection_settings.required_signatures is True:
-                    ghbranch.remove_required_signatures()
-
-            # if required pull requests are not enabled but present live, we need to explicitly remove them
-            if (
-                not is_defined(required_pull_request_reviews)
-                and branch_protection_settings.required_pull_request_reviews is not None
-            ):
-                branch_changes.append("Remove required pull request reviews")
-                ghbranch.remove_required_pull_request_reviews()
-
-            # if required status checks are not enabled but present live, we need to explicitly remove them
-            if not is_defined(required_status_checks) and branch_protection_settings.required_status_checks is not None:
-                branch_changes.append("Remove required status checks")
-                ghbranch.remove_required_status_checks()
-
-        # Log all the changes we made to this branch
+        # Log all the changes we make to this branch
         if branch_changes:
             protection_changes[branch] = branch_changes
 
     # remove branch protection from all remaining protected branches
     for branch_name in protected_branches:
-        branch = self.ghrepo.get_branch(branch_name)
-        protection_changes[branch] = [f"Remove branch protection from branch '{branch_name}'"]
+        protection_changes[branch_name] = [f"Remove branch protection from branch '{branch_name}'"]
 
         if not self.noop("github::protected_branches"):
-            branch.remove_protection()
+            self.plan.add(
+                "protected_branches",
+                f"Remove the protection of branch {branch_name}",
+                self.snapshot.branch(branch_name).remove_protection,
+            )
 
     if protection_changes:
         summary = ""
@@ -305,3 +327,29 @@ def branch_protection(self: ASFGitHubFeature):
             for change in changes:
                 summary += f"  - {change}\n"
         print(summary)
+
+
+def _live_checks(live_status_checks: Any) -> set[tuple[str, int]]:
+    """Returns the required status checks of a branch, as (context, app id) tuples, with -1 for any app"""
+    return {(check.context, -1 if check.app_id is None else check.app_id) for check in live_status_checks.checks}
+
+
+def _update_protection(
+    ghbranch: pygithub.Branch.Branch,
+    protection: dict[str, Any],
+    required_signatures: Opt[bool],
+    remove_reviews: bool,
+    remove_status_checks: bool,
+):
+    branch_protection_settings = ghbranch.edit_protection(**protection)
+
+    if is_defined(required_signatures):
+        if required_signatures and branch_protection_settings.required_signatures is False:
+            ghbranch.add_required_signatures()
+        elif not required_signatures and branch_protection_settings.required_signatures is True:
+            ghbranch.remove_required_signatures()
+
+    if remove_reviews and branch_protection_settings.required_pull_request_reviews is not None:
+        ghbranch.remove_required_pull_request_reviews()
+    if remove_status_checks and branch_protection_settings.required_status_checks is not None:
+        ghbranch.remove_required_status_checks()
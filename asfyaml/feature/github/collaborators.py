@@ -23,7 +23,7 @@ from . import directive, ASFGitHubFeature, constants
 import github as pygithub
 
 
-@directive
+@directive(inputs=("collaborators",))
 def collaborators(self: ASFGitHubFeature):
     # Collaborator list for triage rights
     collabs = self.yaml.get("collaborators", [])
@@ -41,8 +41,9 @@ def collaborators(self: ASFGitHubFeature):
         if not re.match(r"^[A-Za-z\d](?:[-A-Za-z\d]|-(?=[A-Za-z\d])){0,38}$", user):
             raise Exception("Username %s in collaborator list is not a valid GitHub ID!" % user)
     collab_file = os.path.join(self.repository.path, "github_collaborators.txt")
-    if os.path.exists(collab_file):
-        old_collabs = set([x.strip() for x in open(collab_file) if x.strip()])
+    old_contents = self.repository.context.metadata_file("github_collaborators.txt")
+    if old_contents is not None:
+        old_collabs = set([x.strip() for x in old_contents.splitlines() if x.strip()])
     if new_collabs != old_collabs:
         print("Updating collaborator list for GitHub")
         to_remove = old_collabs - new_collabs
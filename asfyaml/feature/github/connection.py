@@ -0,0 +1,67 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Connections of the PyGithub requester, through the shared HTTP transport.
+
+PyGithub gives every requester its own requests session, and the github feature gets a new requester for each
+repository it runs on (every Github object, and every withLazy call, makes one), so each run would pay for
+a new TLS handshake with api.github.com. The connection class below sends PyGithub's requests through a
+shared session of :mod:`asfyaml.transport` instead, so connections are kept open across runs. As PyGithub
+brings its own retry policy, its requests get sessions of their own, separate from those of other callers.
+"""
+
+import typing
+
+import github.Requester as pygithubrequester
+
+from asfyaml import transport
+
+
+class PooledConnection(pygithubrequester.HTTPSRequestsConnectionClass):
+    """A PyGithub HTTPS connection using the shared session of its host"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int | None = None,
+        strict: bool = False,
+        timeout: int | None = None,
+        retry: typing.Any = None,
+        pool_size: int | None = None,
+        **kwargs: typing.Any,
+    ) -> None:
+        # The session of the parent class is not set up, as PyGithub makes a new connection for every request
+        # once the connection class is swapped out.
+        self.port = port if port else 443
+        self.host = host
+        self.protocol = "https"
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.retry = retry if retry is not None else transport.retry_policy()
+        self.pool_size = pool_size if pool_size is not None else transport.POOL_SIZE
+        # PyGithub's retry policy (which also waits out rate limits) is used for all of its connections to the host.
+        self.session = transport.session(f"https://{host}:{self.port}", retry=self.retry)
+        # Keeps requests from replacing the token with credentials from a .netrc file, as PyGithub does.
+        self.session.auth = pygithubrequester.Requester.noopAuth
+
+    def close(self) -> None:
+        """The shared session stays open for the next connection, see :func:`asfyaml.transport.close`"""
+
+
+def install():
+    """Makes PyGithub send its HTTPS requests through the shared transport"""
+    pygithubrequester.Requester.injectConnectionClasses(pygithubrequester.HTTPRequestsConnectionClass, PooledConnection)
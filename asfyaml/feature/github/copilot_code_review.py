@@ -60,7 +60,8 @@ def _rulesets_configure_copilot(rulesets: Any) -> bool:
     return any(ruleset_has_rule_type(ruleset, COPILOT_RULE_TYPE) for ruleset in rulesets)
 
 
-@directive
+# Coupled with rulesets, as both manage rulesets and check the settings of the other for overlaps
+@directive(inputs=("copilot_code_review",), coupled_with=("rulesets",))
 def copilot_code_review(self: ASFGitHubFeature):
     copilot = self.yaml.get("copilot_code_review")
     previous_yaml = self.previous_yaml if isinstance(self.previous_yaml, dict) else {}
@@ -99,4 +100,4 @@ def copilot_code_review(self: ASFGitHubFeature):
     desired_rulesets = [_build_copilot_ruleset_payload(review_drafts, review_on_push)] if enabled else []
     previous_managed_names = {RULESET_NAME} if was_previously_configured else set()
 
-    reconcile_rulesets(self, desired_rulesets, previous_managed_names)
+    reconcile_rulesets(self, desired_rulesets, previous_managed_names, directive="copilot_code_review")
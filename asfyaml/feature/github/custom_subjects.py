@@ -36,7 +36,7 @@ def validate_github_subject(subject):
         assert ref in constants.VALID_GITHUB_SUBJECT_VARIABLES, f"Unknown variable '{ref}' found in subject template."
 
 
-@directive
+@directive(inputs=("custom_subjects",))
 def config_custom_subjects(self: ASFGitHubFeature):
     # Custom subjects for events
     custom_subjects = self.yaml.get("custom_subjects")
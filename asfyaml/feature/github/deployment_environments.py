@@ -17,9 +17,11 @@
 
 """GitHub deployment environments"""
 
+import functools
 import json
 from typing import Mapping, Any
 
+from github.Environment import Environment
 from github.GithubObject import NonCompletableGithubObject, Attribute, NotSet
 from github.PaginatedList import PaginatedList
 from github.EnvironmentDeploymentBranchPolicy import EnvironmentDeploymentBranchPolicyParams
@@ -103,6 +105,39 @@ def _create_or_update_deployment_environment(self: ASFGitHubFeature, env_name, e
         deployment_branch_policy = None
         policies = []
 
+    noop = self.noop("environment")
+    if not noop and _environment_matches(
+        _get_environment(self, env_name),
+        wait_timer,
+        required_reviewers_with_id,
+        prevent_self_review,
+        deployment_branch_policy,
+    ):
+        print(f"Deployment environment {env_name} is up to date")
+    else:
+        _plan_deployment_environment(
+            self,
+            env_name,
+            wait_timer,
+            required_reviewers_with_id,
+            prevent_self_review,
+            deployment_branch_policy,
+            noop,
+        )
+
+    if not noop and deployment_branch_policy is not None and deployment_branch_policy.custom_branch_policies is True:
+        _create_or_update_deployment_branch_policy(self, env_name, policies)
+
+
+def _plan_deployment_environment(
+    self: ASFGitHubFeature,
+    env_name: str,
+    wait_timer: int,
+    required_reviewers_with_id: list[ReviewerParams],
+    prevent_self_review: bool,
+    deployment_branch_policy: EnvironmentDeploymentBranchPolicyParams | None,
+    noop: bool,
+) -> None:
     print(f"Updates to deployment environment {env_name}")
     print(f"  - Set required_reviewers to {[r.id for r in required_reviewers_with_id]}")
     print(f"  - Set wait_timer to {wait_timer}")
@@ -116,17 +151,65 @@ def _create_or_update_deployment_environment(self: ASFGitHubFeature, env_name, e
             f"custom_branch_policies={deployment_branch_policy.custom_branch_policies})"
         )
 
-    if not self.noop("environment"):
-        self.ghrepo.create_environment(
-            environment_name=env_name,
-            wait_timer=wait_timer,
-            reviewers=required_reviewers_with_id,
-            prevent_self_review=prevent_self_review,
-            deployment_branch_policy=deployment_branch_policy,
+    if not noop:
+        self.plan.add(
+            "environment",
+            f"Create or update deployment environment {env_name}",
+            functools.partial(
+                self.ghrepo.create_environment,
+                environment_name=env_name,
+                wait_timer=wait_timer,
+                reviewers=required_reviewers_with_id,
+                prevent_self_review=prevent_self_review,
+                deployment_branch_policy=deployment_branch_policy,
+            ),
         )
 
-        if deployment_branch_policy is not None and deployment_branch_policy.custom_branch_policies is True:
-            _create_or_update_deployment_branch_policy(self, env_name, policies)
+
+def _get_environment(self: ASFGitHubFeature, env_name: str) -> Environment | None:
+    """Returns the live deployment environment, or None if there is no such environment yet"""
+    if env_name not in _get_environment_names(self):
+        return None
+    return self.snapshot.get(("environment", env_name), lambda: self.ghrepo.get_environment(env_name))
+
+
+def _environment_matches(
+    live: Environment | None,
+    wait_timer: int,
+    required_reviewers_with_id: list[ReviewerParams],
+    prevent_self_review: bool,
+    deployment_branch_policy: EnvironmentDeploymentBranchPolicyParams | None,
+) -> bool:
+    """Returns whether a live deployment environment already has the wanted protection rules and branch policy"""
+    if live is None:
+        return False
+    live_wait_timer = 0
+    live_reviewers: set[tuple[str, int]] = set()
+    live_prevent_self_review = False
+    for rule in live.protection_rules or []:
+        if rule.type == "wait_timer":
+            live_wait_timer = rule.wait_timer
+        elif rule.type == "required_reviewers":
+            live_reviewers = {(reviewer.type, reviewer.reviewer.id) for reviewer in rule.reviewers}
+            live_prevent_self_review = rule.prevent_self_review
+    if wait_timer != live_wait_timer:
+        return False
+    if {(reviewer.type, reviewer.id) for reviewer in required_reviewers_with_id} != live_reviewers:
+        return False
+    # Without reviewers, there is nobody to prevent from reviewing, and GitHub does not report this setting
+    if required_reviewers_with_id and prevent_self_review != live_prevent_self_review:
+        return False
+    live_policy = live.deployment_branch_policy
+    if deployment_branch_policy is None or live_policy is None:
+        return deployment_branch_policy is None and live_policy is None
+    return (
+        deployment_branch_policy.protected_branches == live_policy.protected_branches
+        and deployment_branch_policy.custom_branch_policies == live_policy.custom_branch_policies
+    )
+
+
+def _get_environment_names(self: ASFGitHubFeature) -> list[str]:
+    return self.snapshot.get("environments", lambda: [env.name for env in self.ghrepo.get_environments()])
 
 
 def _get_user_id(self: ASFGitHubFeature, username: Any) -> int:
@@ -182,17 +265,25 @@ def _get_deployment_branch_policies(self: ASFGitHubFeature, env_name: str) -> li
 def _create_or_update_deployment_branch_policy(
     self: ASFGitHubFeature, env_name: str, deployment_branch_policies: list[Mapping[str, Any]]
 ) -> None:
-    current_policies = {p.name: p for p in _get_deployment_branch_policies(self, env_name)}
+    if env_name in _get_environment_names(self):
+        current_policies = {p.name: p for p in _get_deployment_branch_policies(self, env_name)}
+    else:  # Created by this run, so there are no policies to look up yet
+        current_policies = {}
     for policy in deployment_branch_policies:
         name = policy["name"]
         if name not in current_policies:
             print(f"  - Create deployment branch policy: {name}")
 
             if not self.noop("environments"):
-                self.ghrepo._requester.requestJson(
-                    "POST",
-                    f"/repos/{self.repository.org_id}/{self.repository.name}/environments/{env_name}/deployment-branch-policies",
-                    input=policy,
+                self.plan.add(
+                    "environments",
+                    f"Create deployment branch policy {name} of environment {env_name}",
+                    functools.partial(
+                        self.ghrepo._requester.requestJson,
+                        "POST",
+                        f"/repos/{self.repository.org_id}/{self.repository.name}/environments/{env_name}/deployment-branch-policies",
+                        input=policy,
+                    ),
                 )
         else:
             current_policies.pop(name)
@@ -201,13 +292,18 @@ def _create_or_update_deployment_branch_policy(
         print(f"  - Delete deployment branch policy: {name}")
 
         if not self.noop("environments"):
-            self.ghrepo._requester.requestJson(
-                "DELETE",
-                f"/repos/{self.repository.org_id}/{self.repository.name}/environments/{env_name}/deployment-branch-policies/{p.id}",
+            self.plan.add(
+                "environments",
+                f"Delete deployment branch policy {name} of environment {env_name}",
+                functools.partial(
+                    self.ghrepo._requester.requestJson,
+                    "DELETE",
+                    f"/repos/{self.repository.org_id}/{self.repository.name}/environments/{env_name}/deployment-branch-policies/{p.id}",
+                ),
             )
 
 
-@directive
+@directive(inputs=("environments",))
 def deployment_environments(self: ASFGitHubFeature):
     environments = self.yaml.get("environments", [])
 
@@ -20,19 +20,26 @@
 from . import directive, ASFGitHubFeature
 
 
-@directive
+def discussions_target(self: ASFGitHubFeature) -> str | None:
+    """Returns the mailing list target for GitHub discussions, if there is one"""
+    notifs = self.instance.features.notifications
+    return notifs.valid_targets.get("discussions") if notifs else None
+
+
+# Whether discussions may be enabled depends on the notifications feature, so that is an input as well.
+@directive(inputs=("features",), extra_inputs=discussions_target)
 def config_features(self: ASFGitHubFeature):
     # Generic features: issues, wiki, projects, discussions
     features = self.yaml.get("features")
     if features:
         if features.get("discussions", False):
-            notifs = self.instance.features.notifications
-            if (not notifs) or "discussions" not in notifs.valid_targets:
+            if not discussions_target(self):
                 raise Exception("GitHub discussions can only be enabled if a mailing list target exists for it.")
 
         # Apply the changes to GitHub, unless we are in no-op (test) mode.
         if not self.noop("features"):
-            self.ghrepo.edit(
+            self.edit_repo(
+                "features",
                 has_issues=features.get("issues", False),
                 has_wiki=features.get("wiki", False),
                 has_projects=features.get("projects", False),
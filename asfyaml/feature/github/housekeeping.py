@@ -20,7 +20,7 @@
 from . import directive, ASFGitHubFeature
 
 
-@directive
+@directive(inputs=("dependabot_alerts", "dependabot_updates"))
 def housekeeping_features(self: ASFGitHubFeature):
     dependabot_alerts = self.yaml.get("dependabot_alerts", None)
     if dependabot_alerts is not None and not self.noop("dependabot_alerts"):
@@ -22,7 +22,7 @@ from github.GithubObject import NotSet, Opt
 from . import directive, ASFGitHubFeature
 
 
-@directive
+@directive(inputs=("enabled_merge_buttons",))
 def enabled_merge_buttons(self: ASFGitHubFeature):
     # Merge buttons
     merges = self.yaml.get("enabled_merge_buttons")
@@ -103,7 +103,8 @@ def enabled_merge_buttons(self: ASFGitHubFeature):
             )
 
     if not self.noop("enabled_merge_buttons"):
-        self.ghrepo.edit(
+        self.edit_repo(
+            "enabled_merge_buttons",
             allow_squash_merge=allow_squash_merge,
             allow_merge_commit=allow_merge_commits,
             allow_rebase_merge=allow_rebase_merge,
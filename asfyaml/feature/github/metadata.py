@@ -22,7 +22,7 @@ import os
 from . import directive, ASFGitHubFeature
 
 
-@directive
+@directive(inputs=("labels",))
 def set_labels(self: ASFGitHubFeature):
     # Labels for repo
     labels = self.yaml.get("labels")
@@ -34,20 +34,21 @@ def set_labels(self: ASFGitHubFeature):
                 raise Exception(
                     f".asf.yaml: Invalid GitHub label '{label}' - must be lowercase alphanumerical and <= 35 characters!"
                 )
-        # Apply changes, unless we are in no-op (test) mode.
-        if not self.noop("labels"):
-            self.ghrepo.replace_topics(labels)
+        # Apply changes, unless we are in no-op (test) mode or the topics are already set.
+        if not self.noop("labels") and sorted(labels) != sorted(self.snapshot.get("topics", self.ghrepo.get_topics)):
+            self.plan.add("labels", f"Set topics to {', '.join(labels)}", lambda: self.ghrepo.replace_topics(labels))
 
 
-@directive
+@directive(inputs=("description", "homepage"))
 def set_homepage_desc(self: ASFGitHubFeature):
     desc = self.yaml.get("description")
     homepage = self.yaml.get("homepage")
     if desc and not self.noop("description"):
-        self.ghrepo.edit(description=desc)
-        # Update on gitbox as well
-        desc_path = os.path.join(self.repository.path, "description")
-        with open(desc_path, "w", encoding="utf8") as f:
-            f.write(desc)
+        self.edit_repo("description", description=desc)
+        # Update on gitbox as well, if it differs
+        if self.repository.context.metadata_file("description") != desc:
+            desc_path = os.path.join(self.repository.path, "description")
+            with open(desc_path, "w", encoding="utf8") as f:
+                f.write(desc)
     if homepage and not self.noop("homepage"):
-        self.ghrepo.edit(homepage=homepage)
+        self.edit_repo("homepage", homepage=homepage)
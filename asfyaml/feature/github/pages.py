@@ -17,11 +17,12 @@
 
 """GitHub pages feature"""
 
-from . import directive, ASFGitHubFeature, GH_TOKEN_FILE
+from . import directive, ASFGitHubFeature
+from asfyaml import transport
 import requests
 
 
-@directive
+@directive(inputs=("ghp_branch", "ghp_path"))
 def config_pages(self: ASFGitHubFeature):
     # GitHub pages
     ghp_branch = self.yaml.get("ghp_branch")
@@ -47,40 +48,27 @@ def config_pages(self: ASFGitHubFeature):
             return
 
         GHP_URL = f"https://api.github.com/repos/{self.repository.org_id}/{self.repository.name}/pages"
-        GHP_TOKEN = open(GH_TOKEN_FILE).read().strip()
+        headers = {
+            "Authorization": "token %s" % self.gh_token,
+            "Accept": "application/vnd.github.switcheroo-preview+json",
+        }
 
         # Test if GHP is enabled already
-        rv = requests.get(
-            GHP_URL,
-            headers={
-                "Authorization": "token %s" % GHP_TOKEN,
-                "Accept": "application/vnd.github.switcheroo-preview+json",
-            },
-        )
+        rv = transport.get(GHP_URL, headers=headers)
 
         # Not enabled yet, enable?!
         if rv.status_code == 404:
             try:
-                rv = requests.post(
-                    GHP_URL,
-                    headers={
-                        "Authorization": "token %s" % GHP_TOKEN,
-                        "Accept": "application/vnd.github.switcheroo-preview+json",
-                    },
-                    json={"source": ghps},
-                )
+                rv = transport.post(GHP_URL, headers=headers, json={"source": ghps})
                 print("GitHub Pages set to branch=%s, path=%s" % (ghp_branch, ghp_path))
             except requests.exceptions.RequestException as e:
                 raise Exception(f"Could not set GitHub Pages configuration for {self.repository.name}: {e}")
         # Enabled, update settings?
         elif 200 <= rv.status_code < 300:
             try:
-                rv = requests.put(
+                rv = transport.put(
                     GHP_URL,
-                    headers={
-                        "Authorization": "token %s" % GHP_TOKEN,
-                        "Accept": "application/vnd.github.switcheroo-preview+json",
-                    },
+                    headers=headers,
                     json={
                         "source": ghps,
                     },
@@ -0,0 +1,76 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Plan of the changes a run of the github feature makes on GitHub.
+
+The github feature runs in two phases. In the plan phase, each directive compares the state it wants with the
+live state in the snapshot (see :mod:`snapshot`), and adds a change to the plan only where the two differ. Once
+every directive has run, the plan is printed, and the apply phase sends the planned changes to GitHub, in the
+order they were planned. A run where nothing changed on either side therefore only costs the reads needed to
+find that out.
+
+Example use, in a directive::
+
+    if sorted(labels) != sorted(self.snapshot.get("topics", self.ghrepo.get_topics)):
+        self.plan.add("labels", f"Set topics to {labels}", lambda: self.ghrepo.replace_topics(labels))
+"""
+
+import typing
+
+import asfyaml.tracing as tracing
+
+
+class PlannedChange:
+    """A single change to make on GitHub"""
+
+    def __init__(self, directive: str, description: str, apply: typing.Callable[[], typing.Any]):
+        #: str: The directive the change belongs to
+        self.directive = directive
+        #: str: What the change does, as shown in the plan
+        self.description = description
+        #: callable: Makes the change
+        self.apply = apply
+
+    def __str__(self):
+        return f"[{self.directive}] {self.description}"
+
+
+class Plan:
+    """The changes planned by the directives of a run, in the order they are to be applied"""
+
+    def __init__(self):
+        self.changes: list[PlannedChange] = []
+
+    def add(self, directive: str, description: str, apply: typing.Callable[[], typing.Any]):
+        """Adds a change to the plan. The description should fit on a single line."""
+        self.changes.append(PlannedChange(directive, description, apply))
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __str__(self):
+        if not self.changes:
+            return "No changes to apply"
+        return "\n".join([f"{len(self.changes)} change(s) to apply:", *(f"  - {change}" for change in self.changes)])
+
+    def apply(self, repo: str = "", feature: str = "github"):
+        """Makes the planned changes, one at a time, and empties the plan. If a change fails, the changes
+        planned after it are dropped, and the error is raised."""
+        changes, self.changes = self.changes, []
+        for change in changes:
+            with tracing.span("apply", repo=repo, feature=feature, directive=change.directive):
+                change.apply()
@@ -21,7 +21,7 @@ in favor of rulesets, which has not been implemented in .asf.yaml yet."""
 from . import directive, ASFGitHubFeature
 
 
-@directive
+@directive(inputs=("protected_tags",))
 def configure_protected_tags(self: ASFGitHubFeature):
     # Jira auto-linking
     protected_tags = self.yaml.get("protected_tags", [])
@@ -22,7 +22,7 @@ from github.GithubObject import NotSet, is_defined
 from . import directive, ASFGitHubFeature
 
 
-@directive
+@directive(inputs=("pull_requests", "del_branch_on_merge"))
 def pull_requests(self: ASFGitHubFeature):
     # retrieve the legacy "del_branch_on_merge" setting from the github object
     legacy_del_branch_on_merge = self.yaml.get("del_branch_on_merge", NotSet)
@@ -58,7 +58,8 @@ def pull_requests(self: ASFGitHubFeature):
         if is_defined(del_branch_on_merge):
             print(f"Setting del_branch_on_merge to '{del_branch_on_merge}'")
 
-        self.ghrepo.edit(
+        self.edit_repo(
+            "pull_requests",
             allow_auto_merge=allow_auto_merge,
             allow_update_branch=allow_update_branch,
             delete_branch_on_merge=del_branch_on_merge,
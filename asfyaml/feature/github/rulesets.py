@@ -17,6 +17,7 @@
 
 """GitHub repository rulesets feature."""
 
+import functools
 import json
 from typing import Any
 
@@ -42,6 +43,9 @@ _CONVENIENCE_RULESET_KEYS = {
     "required_status_checks",
     "required_status_checks_strict",
 }
+# Top-level keys of a ruleset that are managed in full. A ruleset leaving one of these out should have none,
+# so it is compared with, and sent to GitHub as, the empty value, rather than leaving the live one in place.
+_OWNED_RULESET_KEYS = ("bypass_actors", "rules")
 _NUMERICAL_VALUE_KEYS = {  # Values that are expected to be integers but YAML gets it wrong..
     "max_entries_to_build",
     "min_entries_to_merge",
@@ -77,6 +81,36 @@ def list_rulesets(self: ASFGitHubFeature) -> list[dict[str, Any]]:
     return [ruleset for ruleset in payload if isinstance(ruleset, dict)]
 
 
+def get_ruleset(self: ASFGitHubFeature, ruleset_id: int, name: str) -> dict[str, Any]:
+    status, _headers, body = self.ghrepo._requester.requestJson("GET", f"{_rulesets_endpoint(self)}/{ruleset_id}")
+    _check_ruleset_response(
+        status,
+        200,
+        body=body,
+        not_found_msg=f"Ruleset '{name}' ({ruleset_id}) not found",
+        error_context=f"while fetching ruleset '{name}' ({ruleset_id})",
+        has_422=False,
+    )
+    return json.loads(body)
+
+
+def with_owned_keys(ruleset: dict[str, Any]) -> dict[str, Any]:
+    """Returns a ruleset with every key in _OWNED_RULESET_KEYS it leaves out set to an empty list"""
+    return {**{key: [] for key in _OWNED_RULESET_KEYS}, **ruleset}
+
+
+def ruleset_matches(desired: Any, live: Any) -> bool:
+    """Returns whether a live ruleset, as returned by the REST API, already has every setting of a desired ruleset.
+    Keys the desired ruleset leaves out are not compared, as GitHub adds its own (ids, links, defaults)."""
+    if isinstance(desired, dict):
+        return isinstance(live, dict) and all(
+            key in live and ruleset_matches(value, live[key]) for key, value in desired.items()
+        )
+    if isinstance(desired, list):
+        return isinstance(live, list) and len(desired) == len(live) and all(map(ruleset_matches, desired, live))
+    return desired == live
+
+
 def _check_ruleset_response(
     status: int, success_code: int, not_found_msg: str, error_context: str, body: str, *, has_422: bool = True
 ) -> None:
@@ -558,10 +592,11 @@ def reconcile_rulesets(
     self: ASFGitHubFeature,
     desired_rulesets: list[dict[str, Any]],
     previously_managed_names: set[str],
+    directive: str = "rulesets",
 ) -> None:
     existing_by_name: dict[str, dict[str, Any]] = {}
 
-    existing_rulesets = list_rulesets(self)
+    existing_rulesets = self.snapshot.get("rulesets", lambda: list_rulesets(self))
 
     for ruleset in existing_rulesets:
         name = ruleset.get("name")
@@ -579,13 +614,21 @@ def reconcile_rulesets(
             ruleset_id = existing_ruleset.get("id")
             if ruleset_id is None:
                 raise Exception(f"Found ruleset '{name}' without an id")
-            print(f"Updating GitHub ruleset '{name}' ({ruleset_id})")
-            update_ruleset(self, ruleset_id, ruleset)
+            # Only the id and name are listed, the rules themselves have to be fetched to compare them. Keys
+            # left out of an update keep their live value, so the ones we own are always compared and sent.
+            ruleset = with_owned_keys(ruleset)
+            if ruleset_matches(ruleset, with_owned_keys(get_ruleset(self, ruleset_id, name))):
+                continue
+            self.plan.add(
+                directive,
+                f"Update GitHub ruleset '{name}' ({ruleset_id})",
+                functools.partial(update_ruleset, self, ruleset_id, ruleset),
+            )
         else:
-            print(f"Creating GitHub ruleset '{name}'")
-            add_ruleset(self, ruleset)
+            self.plan.add(directive, f"Create GitHub ruleset '{name}'", functools.partial(add_ruleset, self, ruleset))
 
     removed_names = previously_managed_names - desired_names
+    deleted_names = set()
     for name in sorted(removed_names):
         existing_ruleset = existing_by_name.get(name)
         if not existing_ruleset:
@@ -593,11 +636,20 @@ def reconcile_rulesets(
         ruleset_id = existing_ruleset.get("id")
         if ruleset_id is None:
             raise Exception(f"Found ruleset '{name}' without an id")
-        print(f"Deleting GitHub ruleset '{name}' ({ruleset_id})")
-        delete_ruleset(self, ruleset_id, name)
+        self.plan.add(
+            directive,
+            f"Delete GitHub ruleset '{name}' ({ruleset_id})",
+            functools.partial(delete_ruleset, self, ruleset_id, name),
+        )
+        deleted_names.add(name)
+
+    if deleted_names:
+        self.snapshot.update(
+            "rulesets", [ruleset for ruleset in existing_rulesets if ruleset.get("name") not in deleted_names]
+        )
 
 
-@directive
+@directive(inputs=("rulesets",))
 def rulesets(self: ASFGitHubFeature):
     previous_yaml = self.previous_yaml if isinstance(self.previous_yaml, dict) else {}
     rulesets_configured = "rulesets" in self.yaml
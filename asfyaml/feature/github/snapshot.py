@@ -0,0 +1,242 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Snapshot of the live state of a GitHub repository.
+
+Rather than have every directive look up the bits of live state it needs with its own REST calls, the snapshot
+fetches the repository settings, topics, branches, branch protection rules, rulesets and deployment environments
+in a single GraphQL query, the first time any of them is needed. Connections with more than a page of nodes are
+then paged through with follow-up queries, which only ask for the connections that still have pages left.
+
+Autolinks and deployment branch policies are not available through GraphQL. These are fetched over REST by the
+loader the directive passes to :func:`RepoSnapshot.get`, and kept for the rest of the run, as is any section the
+GraphQL query did not return. A directive that plans changes to a section other directives also read should
+call :func:`RepoSnapshot.update` with the state that section will have once the changes are made.
+"""
+
+import typing
+import urllib.parse
+
+import github as pygithub
+import github.Branch as pygithubbranch
+import github.Repository as pygithubrepo
+
+import asfyaml.tracing as tracing
+
+# The repository settings, as named in the GraphQL API, and the names PyGithub's Repository.edit uses for them.
+SETTINGS_FIELDS = {
+    "description": "description",
+    "homepageUrl": "homepage",
+    "hasIssuesEnabled": "has_issues",
+    "hasWikiEnabled": "has_wiki",
+    "hasProjectsEnabled": "has_projects",
+    "hasDiscussionsEnabled": "has_discussions",
+    "squashMergeAllowed": "allow_squash_merge",
+    "mergeCommitAllowed": "allow_merge_commit",
+    "rebaseMergeAllowed": "allow_rebase_merge",
+    "deleteBranchOnMerge": "delete_branch_on_merge",
+    "autoMergeAllowed": "allow_auto_merge",
+    "allowUpdateBranch": "allow_update_branch",
+    "squashMergeCommitTitle": "squash_merge_commit_title",
+    "squashMergeCommitMessage": "squash_merge_commit_message",
+    "mergeCommitTitle": "merge_commit_title",
+    "mergeCommitMessage": "merge_commit_message",
+}
+
+# The paginated connections of the query, keyed by the section of the snapshot they fill.
+CONNECTIONS = {
+    "topics": ("repositoryTopics", "nodes { topic { name } }"),
+    "refs": ("refs", "nodes { name branchProtectionRule { pattern } }", 'refPrefix: "refs/heads/"'),
+    "protection_rules": (
+        "branchProtectionRules",
+        """nodes {
+        pattern allowsForcePushes requiresCommitSignatures requiresLinearHistory requiresConversationResolution
+        requiresApprovingReviews requiredApprovingReviewCount requiresCodeOwnerReviews dismissesStaleReviews
+        requireLastPushApproval requiresStatusChecks requiresStrictStatusChecks
+        requiredStatusChecks { context app { databaseId } }
+      }""",
+    ),
+    "rulesets": ("rulesets", "nodes { databaseId name target enforcement }"),
+    "environments": ("environments", "nodes { databaseId name }"),
+}
+
+# Every section of the snapshot that is fetched through GraphQL.
+GRAPHQL_SECTIONS = ("settings", *CONNECTIONS)
+
+PAGE_SIZE = 100
+
+
+class PullRequestReviewsState:
+    """The pull request review settings of a branch protection rule"""
+
+    def __init__(self, rule: typing.Mapping[str, typing.Any]):
+        self.required_approving_review_count: int = rule["requiredApprovingReviewCount"] or 0
+        self.require_code_owner_reviews: bool = rule["requiresCodeOwnerReviews"]
+        self.dismiss_stale_reviews: bool = rule["dismissesStaleReviews"]
+        self.require_last_push_approval: bool = rule["requireLastPushApproval"]
+
+
+class StatusCheckState:
+    """A required status check. The app id is None if any app may set it."""
+
+    def __init__(self, check: typing.Mapping[str, typing.Any]):
+        self.context: str = check["context"]
+        self.app_id: int | None = (check.get("app") or {}).get("databaseId")
+
+
+class StatusChecksState:
+    """The required status checks of a branch protection rule"""
+
+    def __init__(self, rule: typing.Mapping[str, typing.Any]):
+        self.strict: bool = rule["requiresStrictStatusChecks"]
+        self.checks = [StatusCheckState(check) for check in rule["requiredStatusChecks"] or []]
+
+
+class BranchProtectionState:
+    """A branch protection rule, as found in the snapshot. This has the same attributes as PyGithub's
+    BranchProtection, for the settings the protected_branches directive manages."""
+
+    def __init__(self, rule: typing.Mapping[str, typing.Any]):
+        self.pattern: str = rule["pattern"]
+        self.allow_force_pushes: bool = rule["allowsForcePushes"]
+        self.required_signatures: bool = rule["requiresCommitSignatures"]
+        self.required_linear_history: bool = rule["requiresLinearHistory"]
+        self.required_conversation_resolution: bool = rule["requiresConversationResolution"]
+        self.required_pull_request_reviews = PullRequestReviewsState(rule) if rule["requiresApprovingReviews"] else None
+        self.required_status_checks = StatusChecksState(rule) if rule["requiresStatusChecks"] else None
+
+
+def _connection_query(field: str, nodes: str, *arguments: str) -> str:
+    args = ", ".join((f"first: {PAGE_SIZE}", f"after: ${field}Cursor", *arguments))
+    return f"{field}({args}) {{ {nodes} pageInfo {{ hasNextPage endCursor }} }}"
+
+
+def build_query(connections: typing.Iterable[str], settings: bool = True) -> str:
+    """Returns the GraphQL query for the repository settings (if settings is set), and a page of each of the
+    given connections (sections of the snapshot)"""
+    fields = [CONNECTIONS[section][0] for section in connections]
+    parts = [_connection_query(*CONNECTIONS[section]) for section in connections]
+    if settings:
+        parts.insert(0, " ".join(SETTINGS_FIELDS))
+    cursors = "".join(f", ${field}Cursor: String" for field in fields)
+    body = "\n    ".join(parts)
+    return f"query($owner: String!, $name: String!{cursors}) {{\n  repository(owner: $owner, name: $name) {{\n    {body}\n  }}\n}}"
+
+
+class RepoSnapshot:
+    """The live state of a GitHub repository, fetched once and shared by all directives of a run. If prefetch
+    is not set, nothing is fetched through GraphQL, and every section is loaded by the loader passed to
+    :func:`get` instead."""
+
+    def __init__(self, ghrepo: pygithubrepo.Repository, org_id: str, name: str, prefetch: bool = True):
+        self.ghrepo = ghrepo
+        self.org_id = org_id
+        self.name = name
+        self.prefetch = prefetch
+        self._sections: dict[typing.Hashable, typing.Any] = {}
+        self._fetched = False
+
+    def _query(self, query: str, cursors: typing.Mapping[str, str | None]) -> dict:
+        variables: dict[str, str | None] = {"owner": self.org_id, "name": self.name}
+        variables.update({f"{CONNECTIONS[section][0]}Cursor": cursor for section, cursor in cursors.items()})
+        _headers, data = self.ghrepo._requester.graphql_query(query, variables)
+        return data["data"]["repository"]
+
+    def fetch(self) -> None:
+        """Fetches the state of the repository through GraphQL, paging through every connection"""
+        self._fetched = True
+        settings: dict[str, typing.Any] = {}
+        with tracing.span("github_snapshot", repo=self.name) as span:
+            repository = self._query(build_query(CONNECTIONS), dict.fromkeys(CONNECTIONS))
+            nodes: dict[str, list] = {section: [] for section in CONNECTIONS}
+            queries = 1
+            while True:
+                cursors = {}
+                for section, (field, *_rest) in CONNECTIONS.items():
+                    if field not in repository:  # Only the connections with pages left are in follow-up queries
+                        continue
+                    connection = repository[field]
+                    nodes[section].extend(connection["nodes"])
+                    if connection["pageInfo"]["hasNextPage"]:
+                        cursors[section] = connection["pageInfo"]["endCursor"]
+                if queries == 1:
+                    settings = {
+                        name: repository[field] for field, name in SETTINGS_FIELDS.items() if field in repository
+                    }
+                if not cursors:
+                    break
+                repository = self._query(build_query(cursors, settings=False), cursors)
+                queries += 1
+            span.set(queries=queries)
+
+        # Nothing is kept until every page is in, so a failed fetch leaves every section to its loader.
+        self._sections["settings"] = settings
+        self._sections["topics"] = [node["topic"]["name"] for node in nodes["topics"]]
+        self._sections["refs"] = nodes["refs"]
+        self._sections["protection_rules"] = {
+            node["pattern"]: BranchProtectionState(node) for node in nodes["protection_rules"]
+        }
+        # The same keys the REST API uses, so these can stand in for the list of rulesets from there.
+        self._sections["rulesets"] = [
+            {
+                "id": node["databaseId"],
+                "name": node["name"],
+                "target": node["target"].lower(),
+                "enforcement": node["enforcement"].lower(),
+            }
+            for node in nodes["rulesets"]
+        ]
+        self._sections["environments"] = [node["name"] for node in nodes["environments"]]
+
+    def get(self, section: typing.Hashable, load: typing.Callable[[], typing.Any]) -> typing.Any:
+        """Returns a section of the snapshot. Sections that are not fetched through GraphQL (or that were
+        forgotten since) are loaded by calling load, and kept for later calls. If the GraphQL query fails, every
+        section is loaded by its loader from then on.
+
+        Example use::
+
+            autolinks = self.snapshot.get("autolinks", lambda: list(self.ghrepo.get_autolinks()))
+        """
+        if self.prefetch and not self._fetched and section in GRAPHQL_SECTIONS:
+            try:
+                self.fetch()
+            except (pygithub.GithubException, KeyError, TypeError) as e:
+                # The token may not have access to everything in the query (rulesets or environments, for
+                # instance), or the response may not have the shape we expect. Fall back to the loaders.
+                print(f"Could not fetch the state of {self.name} through GraphQL, falling back to REST: {e}")
+                self.prefetch = False
+        if section not in self._sections:
+            self._sections[section] = load()
+        return self._sections[section]
+
+    def update(self, section: typing.Hashable, value: typing.Any):
+        """Replaces a section of the snapshot with the state it will have once the planned changes are made, for
+        directives planning after this one"""
+        self._sections[section] = value
+
+    def forget(self, *sections: typing.Hashable):
+        """Drops sections of the snapshot that are no longer up to date, so the next :func:`get` loads them anew"""
+        for section in sections:
+            self._sections.pop(section, None)
+
+    def branch(self, name: str) -> pygithubbranch.Branch:
+        """Returns a PyGithub Branch object for an existing branch, without fetching it, for changing its
+        protection settings"""
+        url = f"{self.ghrepo.url}/branches/{urllib.parse.quote(name)}"
+        return pygithubbranch.Branch(
+            self.ghrepo._requester, {}, {"name": name, "url": url, "protection_url": f"{url}/protection"}
+        )
@@ -17,7 +17,8 @@
 
 import strictyaml
 from asfyaml.asfyaml import ASFYamlFeature
-import requests
+from asfyaml import transport
+
 
 # Jekyll website builds via CI2
 
@@ -86,9 +87,13 @@ class ASFJekyllFeature(ASFYamlFeature, name="jekyll", env="production", priority
         if not self.noop("jekyll"):
             # Contact buildbot 2
             bbusr, bbpwd = open("/x1/gitbox/auth/bb2.txt").read().strip().split(":", 1)
-            s = requests.Session()
-            s.get("https://ci2.apache.org/auth/login", auth=(bbusr, bbpwd))
-            s.post("https://ci2.apache.org/api/v2/forceschedulers/jekyll_websites", json=payload)
+            # The shared sessions keep no cookies, so the login cookie is passed on to the call that follows
+            login = transport.get("https://ci2.apache.org/auth/login", auth=(bbusr, bbpwd))
+            transport.post(
+                "https://ci2.apache.org/api/v2/forceschedulers/jekyll_websites",
+                json=payload,
+                cookies=transport.cookies(login),
+            )
         else:
             print(payload)
         print("Done!")
@@ -26,7 +26,6 @@ import fnmatch
 import json
 import os
 import yaml
-import asfpy
 
 # Notification settings are stored locally in repo-dir.git/notifications.yaml
 NOTIFICATION_SETTINGS_FILE = "notifications.yaml"
@@ -139,8 +138,9 @@ class ASFNotificationsFeature(ASFYamlFeature, name="notifications", priority=0):
         # Update the notifications file on disk
         scheme_path = os.path.join(self.repository.path, NOTIFICATION_SETTINGS_FILE)
         old_yml = {}
-        if os.path.exists(scheme_path):
-            old_yml = yaml.safe_load(open(scheme_path))
+        old_contents = self.repository.context.metadata_file(NOTIFICATION_SETTINGS_FILE)
+        if old_contents is not None:
+            old_yml = yaml.safe_load(old_contents)
         if old_yml == self.yaml:  # No changes, just return straight away.
             return
         else:  # Changes made, save to disk
@@ -166,12 +166,11 @@ class ASFNotificationsFeature(ASFYamlFeature, name="notifications", priority=0):
 
         changesets = ""
         for push in self.repository.changesets:
-            for commit in push.commits:
-                if ".asf.yaml" in commit.files:
-                    perp = commit.committer_email
-                    if commit.committer_email != commit.author_email:
-                        perp = f"{commit.committer_email}/{commit.author_email}"
-                    changesets += f"{commit.sha}: [{perp}] {commit.subject}\n"
+            for commit in push.commits_touching([".asf.yaml"]):
+                perp = commit.committer_email
+                if commit.committer_email != commit.author_email:
+                    perp = f"{commit.committer_email}/{commit.author_email}"
+                changesets += f"{commit.sha}: [{perp}] {commit.subject}\n"
         # If in test mode, bail!
         if "quietmode" in self.instance.environments_enabled:
             return
@@ -187,6 +186,8 @@ These changes were caused by the following commits to the {self.instance.branch}
 With regards,
 ASF Infra.
 """
+        import asfpy.messaging  # Only needed (and imported) when we actually send mail
+
         asfpy.messaging.mail(
             sender="GitBox <gitbox@apache.org>",
             recipients=[f"private@{self.repository.hostname}.apache.org"],
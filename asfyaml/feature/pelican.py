@@ -17,9 +17,10 @@
 
 import strictyaml
 from asfyaml.asfyaml import ASFYamlFeature
-import requests
+from asfyaml import transport
 import fnmatch
 
+
 # Pelican website builds via CI2
 CI_HOSTNAME = "ci2.apache.org"
 CI_HOSTNAME_TEST = "ci2-test.apache.org"
@@ -97,9 +98,13 @@ class ASFPelicanFeature(ASFYamlFeature, name="pelican", env="production", priori
         if not self.noop("pelican"):
             # Contact buildbot 2
             bbusr, bbpwd = open("/x1/gitbox/auth/bb2.txt").read().strip().split(":", 1)
-            s = requests.Session()
-            s.get(f"https://{CI_HOSTNAME}/auth/login", auth=(bbusr, bbpwd))
-            s.post(f"https://{CI_HOSTNAME}/api/v2/forceschedulers/pelican_websites", json=payload)
+            # The shared sessions keep no cookies, so the login cookie is passed on to the call that follows
+            login = transport.get(f"https://{CI_HOSTNAME}/auth/login", auth=(bbusr, bbpwd))
+            transport.post(
+                f"https://{CI_HOSTNAME}/api/v2/forceschedulers/pelican_websites",
+                json=payload,
+                cookies=transport.cookies(login),
+            )
         else:
             print(payload)
         print("Done!")
@@ -177,9 +182,13 @@ class ASFPelicanTestFeature(ASFYamlFeature, name="pelicantest", env="citest", pr
         if not self.noop("pelican"):
             # Contact buildbot 2
             bbusr, bbpwd = open("/x1/gitbox/auth/bb2.txt").read().strip().split(":", 1)
-            s = requests.Session()
-            s.get(f"https://{CI_HOSTNAME_TEST}/auth/login", auth=(bbusr, bbpwd))
-            s.post(f"https://{CI_HOSTNAME_TEST}/api/v2/forceschedulers/pelican_websites", json=payload)
+            # The shared sessions keep no cookies, so the login cookie is passed on to the call that follows
+            login = transport.get(f"https://{CI_HOSTNAME_TEST}/auth/login", auth=(bbusr, bbpwd))
+            transport.post(
+                f"https://{CI_HOSTNAME_TEST}/api/v2/forceschedulers/pelican_websites",
+                json=payload,
+                cookies=transport.cookies(login),
+            )
         else:
             print(payload)
         print("Done!")
@@ -18,11 +18,13 @@
 import json
 from urllib.parse import urlparse
 
-import requests
 import strictyaml
-from defusedxml.ElementTree import ParseError, fromstring
 
 from asfyaml.asfyaml import ASFYamlFeature
+from asfyaml import transport
+from asfyaml.lazyimport import lazy_import
+
+ElementTree = lazy_import("defusedxml.ElementTree")
 
 # DOAP / RDF / ASF-extension XML namespaces, as used in ASF project DOAP files.
 _DOAP_NS = "{http://usefulinc.com/ns/doap#}"
@@ -126,6 +128,12 @@ class ASFATRFeature(ASFYamlFeature, name="project", env="production", priority=5
         }
     )
 
+    @property
+    def idempotent(self):
+        """Syncing the same metadata again changes nothing, unless it comes from a DOAP file, which may have
+        changed in the meantime."""
+        return "doap" not in (self.yaml.get("metadata") or {})
+
     def run(self):
         """
         Sync project metadata to ATR. Sample entry:
@@ -192,7 +200,7 @@ class ASFATRFeature(ASFYamlFeature, name="project", env="production", priority=5
             "Content-Type": "application/json",
         }
         print(f"[project] POST {url} for project {project_key}")
-        resp = requests.post(url, json=payload, headers=headers, timeout=30)
+        resp = transport.post(url, json=payload, headers=headers, timeout=30)
         if not resp.ok:
             # Surface the API's error body — it's the most useful thing to put in the bounce email.
             raise Exception(f"ATR API call failed ({resp.status_code}): {resp.text}")
@@ -214,7 +222,7 @@ def _exchange_token_for_jwt(base_url: str, token: str) -> str:
     /project/config is gated to system bearer tokens, and ATR issues those JWTs via
     /api/jwt/create.
     """
-    resp = requests.post(
+    resp = transport.post(
         f"{base_url}/api/jwt/create",
         json={"asfuid": _ATR_SYSTEM_UID, "pat": token},
         timeout=30,
@@ -266,7 +274,7 @@ def _parse_doap(url: str) -> dict:
     _validate_doap_url(url)
     # Don't follow redirects: a redirect could hop off an allowed host (SSRF), and the
     # validation above only vetted the URL we were given.
-    resp = requests.get(url, timeout=30, allow_redirects=False)
+    resp = transport.get(url, timeout=30, allow_redirects=False)
     if resp.is_redirect:
         raise Exception(
             f"DOAP URL {url} returned a redirect ({resp.status_code}); point at the final https URL instead"
@@ -283,8 +291,8 @@ def _doap_metadata(content: bytes, source: str = "DOAP file") -> dict:
     datasources/apache.py). Only fields present in the DOAP file are included.
     """
     try:
-        root = fromstring(content)
-    except ParseError as e:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError as e:
         raise Exception(f"Could not parse {source}: {e}")
 
     project = root.find(f"{_DOAP_NS}Project")
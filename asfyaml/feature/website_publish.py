@@ -20,7 +20,7 @@
 import asfyaml.mappings as mappings
 from asfyaml.asfyaml import ASFYamlFeature
 import re
-import requests
+from asfyaml import transport
 import strictyaml
 
 
@@ -99,6 +99,6 @@ class ASFWebsitePublishingFeature(ASFYamlFeature, name="publish", priority=9):
                 }
 
                 # Send to pubsub.a.o
-                requests.post(f"https://pubsub.apache.org:2070/publish/{self.repository.project}", json=payload)
+                transport.post(f"https://pubsub.apache.org:2070/publish/{self.repository.project}", json=payload)
             except Exception as e:
                 print(e)
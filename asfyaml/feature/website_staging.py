@@ -21,7 +21,7 @@ from asfyaml.asfyaml import ASFYamlFeature
 import asfyaml.validators
 import re
 import fnmatch
-import requests
+from asfyaml import transport
 import strictyaml
 
 
@@ -112,7 +112,7 @@ class ASFWebsiteStagingFeature(ASFYamlFeature, name="staging", priority=9):
                 }
 
                 # Send to pubsub.a.o
-                requests.post(f"https://pubsub.apache.org:2070/staging/{self.repository.project}", json=payload)
+                transport.post(f"https://pubsub.apache.org:2070/staging/{self.repository.project}", json=payload)
 
             except Exception as e:
                 print(e)
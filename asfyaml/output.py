@@ -0,0 +1,96 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Per-context capturing of printed output, so features running in parallel do not garble each other's output."""
+
+import contextlib
+import contextvars
+import io
+import sys
+import threading
+import typing
+
+# The buffer or stream output is currently sent to, if any. As a context variable, this is private to each thread
+# as well as to each asyncio task, and is carried over into threads started with a copy of the context.
+_capture_target: contextvars.ContextVar[typing.TextIO | None] = contextvars.ContextVar("capture_target", default=None)
+
+
+class OutputRouter(io.TextIOBase):
+    """A stand-in for sys.stdout that sends output from threads or tasks currently capturing it
+    (see :func:`capture`) to their own buffer, and everything else to the original stream."""
+
+    def __init__(self, stream: typing.TextIO):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def _target(self) -> typing.TextIO:
+        target = _capture_target.get()
+        return target if target is not None else self.stream
+
+    def write(self, s: str) -> int:
+        return self._target().write(s)
+
+    def flush(self):
+        self._target().flush()
+
+    @contextlib.contextmanager
+    def capture(self) -> typing.Iterator[io.StringIO]:
+        """Captures everything the current thread or task prints, and writes it in one go once done. Captures
+        can be nested, in which case the output ends up in the enclosing capture rather than the original stream."""
+        buffer = io.StringIO()
+        token = _capture_target.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _capture_target.reset(token)
+            with self.lock:
+                target = self._target()
+                target.write(buffer.getvalue())
+                target.flush()
+
+    @contextlib.contextmanager
+    def redirect(self, stream: typing.TextIO) -> typing.Iterator[typing.TextIO]:
+        """Sends everything the current thread or task prints to another stream instead of the original one,
+        including the output of captures that end while redirected."""
+        token = _capture_target.set(stream)
+        try:
+            yield stream
+        finally:
+            _capture_target.reset(token)
+
+
+@contextlib.contextmanager
+def routed_stdout() -> typing.Iterator[OutputRouter]:
+    """Replaces sys.stdout with an :class:`OutputRouter` for the duration of the context. If sys.stdout
+    already is a router, that router is used as-is, so overlapping runs never have to untangle their routers.
+
+    Example use::
+
+        with routed_stdout() as router:
+            with router.capture():
+                print("Only written to stdout once the capture ends")
+    """
+    if isinstance(sys.stdout, OutputRouter):
+        yield sys.stdout
+        return
+    router = OutputRouter(sys.stdout)
+    sys.stdout = router
+    try:
+        yield router
+    finally:
+        if sys.stdout is router:
+            sys.stdout = router.stream
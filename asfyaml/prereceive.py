@@ -0,0 +1,90 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Pre-receive hook rejecting pushes with an invalid .asf.yaml file.
+
+git hands pre-receive hooks a line of ``oldsha newsha refname`` on stdin for every ref being pushed. For each
+branch, the sha of the .asf.yaml blob before and after the push is looked up in the trees (a single cat-file
+query each), and only branches where it changed are validated, each distinct blob once. Pushes that do not
+touch .asf.yaml never import the YAML parser or any feature, so they are done within a few milliseconds.
+
+Example hook, run from the bare repository::
+
+    #!/bin/sh
+    exec asfyaml-pre-receive
+"""
+
+import os
+import sys
+
+from asfyaml import dataobjects
+
+CONFIG_PATH = ".asf.yaml"
+
+
+def changed_configs(repo: dataobjects.Repository) -> list[tuple[dataobjects.ChangeSet, str]]:
+    """Returns the branch updates of a push that change the .asf.yaml file, along with the sha of the new
+    .asf.yaml blob. Deleted branches, tags and pushes that remove the .asf.yaml file are left out."""
+    changed = []
+    for changeset in repo.changesets:
+        if changeset.deleted or not changeset.is_branch:
+            continue
+        blob = repo.file_sha(changeset.newsha, CONFIG_PATH)
+        if blob is None:
+            continue
+        if changeset.created or blob != repo.file_sha(changeset.oldsha, CONFIG_PATH):
+            changed.append((changeset, blob))
+    return changed
+
+
+def validate_push(repo: dataobjects.Repository) -> list[tuple[dataobjects.ChangeSet, str, str]]:
+    """Validates the .asf.yaml file on each branch where the push changes it, and returns the branch update,
+    failed feature and error message for every branch where it is not valid"""
+    changed = changed_configs(repo)
+    if not changed:
+        return []
+
+    # Only needed once there is something to validate, as this imports the YAML parser and the features.
+    from asfyaml import revisions
+
+    failures = []
+    outcomes: dict[str, tuple[str, str | None]] = {}
+    for changeset, blob in changed:
+        if blob not in outcomes:  # Several branches are often pushed with the same .asf.yaml
+            outcomes[blob] = revisions.validate_config(repo, repo.objects.blob(blob) or "", changeset.name)
+        feature, error = outcomes[blob]
+        if error is not None:
+            failures.append((changeset, feature, error))
+    return failures
+
+
+def main():
+    repo = dataobjects.Repository(os.path.abspath(os.environ.get("GIT_DIR", ".")), reflog=sys.stdin.read())
+    try:
+        failures = validate_push(repo)
+    finally:
+        repo.close()
+    for changeset, feature, error in failures:
+        branch = changeset.name.removeprefix("refs/heads/")
+        print(f"The .asf.yaml file on branch {branch} is not valid ({feature}):\n{error}\n", file=sys.stderr)
+    if failures:
+        print("Push rejected, please fix the .asf.yaml file(s) and try again.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
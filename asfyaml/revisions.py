@@ -0,0 +1,112 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Validation of .asf.yaml files as stored in git, at any revision.
+
+The .asf.yaml file is read straight from the object database of the repository, so this works on bare
+repositories, without checking anything out. Validating a range of revisions looks up the blob sha of the
+.asf.yaml file in each commit (which is cheap), and only parses and validates each distinct blob once.
+
+Example use::
+
+    repo = dataobjects.Repository("/x1/repos/asf/whimsy-website.git")
+    result = revisions.validate_revision(repo, "refs/heads/main")
+    for result in revisions.validate_history(repo, "v1.0..main"):
+        if not result.valid:
+            print(f"{result.revision}: {result.error}")
+"""
+
+import typing
+
+from asfyaml import dataobjects
+from asfyaml.asfyaml import ASFYamlInstance, ASFYAMLException
+
+CONFIG_PATH = ".asf.yaml"
+
+
+class ValidationResult:
+    """The outcome of validating the .asf.yaml file at a revision"""
+
+    def __init__(self, revision: str, blob: str | None, feature: str = "", error: str | None = None):
+        #: str: The revision that was looked at
+        self.revision = revision
+        #: str: The sha of the .asf.yaml blob at this revision, or None if there is no .asf.yaml file there
+        self.blob = blob
+        #: str: The feature that did not validate, if any, or "main" if the file itself could not be parsed
+        self.feature = feature
+        #: str: The validation error, or None if the file is valid (or missing)
+        self.error = error
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None
+
+
+def config_blob(repo: dataobjects.Repository, revision: str) -> str | None:
+    """Returns the sha of the .asf.yaml blob at a revision, or None if there is none"""
+    return repo.file_sha(revision, CONFIG_PATH)
+
+
+def validate_config(
+    repo: dataobjects.Repository, config_data: str, branch: str | None = None
+) -> tuple[str, str | None]:
+    """Validates .asf.yaml contents for a repository, and returns the feature that failed and the error message,
+    or ("", None) if the configuration is valid. Files that cannot be parsed, or that configure a feature that
+    does not exist, are reported as failing in "main"."""
+    environ = {"PATH_INFO": repo.path.name, "GIT_PROJECT_ROOT": str(repo.path.parent)}
+    try:
+        a = ASFYamlInstance(repo, "anonymous", config_data, branch, environ=environ)
+        a.environments_enabled.add("production")
+        a.run_parts(validate_only=True)
+    except ASFYAMLException as e:
+        return e.feature, e.error_message
+    return "", None
+
+
+def _branch_of(revision: str) -> str | None:
+    # Tags are not processed at all, so only branch names are handed on.
+    return revision if revision.startswith("refs/heads/") else None
+
+
+def validate_revision(repo: dataobjects.Repository, revision: str, branch: str | None = None) -> ValidationResult:
+    """Validates the .asf.yaml file at a revision, such as a branch, tag or commit sha. If the revision is a
+    full branch name (refs/heads/...), the configuration is validated for that branch, unless another branch
+    is given."""
+    blob = config_blob(repo, revision)
+    if blob is None:
+        return ValidationResult(revision, None)
+    config_data = repo.objects.blob(blob) or ""
+    return ValidationResult(revision, blob, *validate_config(repo, config_data, branch or _branch_of(revision)))
+
+
+def validate_history(
+    repo: dataobjects.Repository, revisions: str | typing.Iterable[str], branch: str | None = None
+) -> typing.Iterator[ValidationResult]:
+    """Validates the .asf.yaml file of every commit in a range of revisions (anything git rev-list takes, such
+    as :samp:`main` or :samp:`v1.0..main`, or a list of those), newest first. Each distinct .asf.yaml blob is
+    only validated once, and its result is reused for every other commit with the same blob."""
+    if isinstance(revisions, str):
+        revisions = [revisions]
+    outcomes: dict[str, tuple[str, str | None]] = {}
+    for sha in repo.rev_list(*revisions):
+        blob = config_blob(repo, sha)
+        if blob is None:
+            yield ValidationResult(sha, None)
+            continue
+        if blob not in outcomes:
+            outcomes[blob] = validate_config(repo, repo.objects.blob(blob) or "", branch)
+        yield ValidationResult(sha, blob, *outcomes[blob])
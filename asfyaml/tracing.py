@@ -0,0 +1,163 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tracing of where the time goes when processing .asf.yaml.
+
+Spans are timed sections of a run, such as loading the YAML, validating or running a feature, or running a
+single GitHub directive. Each finished span is sent to the configured sink as a dictionary::
+
+    {"span": "run", "id": 3, "parent": null, "start": 1718000000.123, "duration": 0.412,
+     "repo": "whimsy-site", "feature": "github", "outcome": "ok"}
+
+Failed spans have an outcome of ``error``, and carry the error message as ``error``. Tracing is disabled
+until a sink is set with :func:`configure`, in which case :func:`span` hands out a shared no-op span.
+
+Example use::
+
+    tracing.configure("/tmp/asfyaml-trace.json")  # Append spans to a file, one JSON object per line
+
+    with tracing.span("run", repo=repo.name, feature="github"):
+        ...
+        tracing.annotate(skipped=True)  # Adds details to the innermost span that is currently open
+"""
+
+import contextvars
+import itertools
+import json
+import sys
+import threading
+import time
+import typing
+
+Sink = typing.Callable[[dict], None]
+
+_sink: Sink | None = None
+_lock = threading.Lock()
+_span_ids = itertools.count(1)
+# The innermost open span, which new spans are nested under. Private to each thread and asyncio task.
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+
+
+def configure(sink: str | typing.TextIO | Sink | None):
+    """Sets where finished spans are sent. This can be a file path (spans are appended as JSON lines, with
+    ``-`` meaning stderr), an open text stream, or a function that is called with each span. If set to None,
+    tracing is disabled."""
+    global _sink
+    if sink is None or callable(sink):
+        _sink = sink
+        return
+    if isinstance(sink, str):
+        stream = sys.stderr if sink == "-" else open(sink, "a")
+    else:
+        stream = sink
+
+    def write_json(record: dict):
+        with _lock:
+            stream.write(json.dumps(record, default=str) + "\n")
+            stream.flush()
+
+    _sink = write_json
+
+
+def enabled() -> bool:
+    """Returns True if spans are currently being recorded"""
+    return _sink is not None
+
+
+class Span:
+    """A timed section of a run. Use :func:`span` to create one."""
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.id = next(_span_ids)
+        self.parent: Span | None = None
+        self._token: contextvars.Token | None = None
+        self._start = 0.0
+        self._started = 0.0
+
+    def set(self, **attributes):
+        """Adds details to the span"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self._start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self._started
+        if self._token is not None:
+            _current_span.reset(self._token)
+        record = {
+            "span": self.name,
+            "id": self.id,
+            "parent": self.parent.id if self.parent else None,
+            "start": round(self._start, 6),
+            "duration": round(duration, 6),
+            **self.attributes,
+            "outcome": "ok" if exc_value is None else "error",
+        }
+        if exc_value is not None:
+            record["error"] = str(exc_value)
+        sink = _sink
+        if sink is not None:
+            sink(record)
+        return False
+
+
+class NoopSpan:
+    """Stand-in for :class:`Span` while tracing is disabled"""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NOOP_SPAN = NoopSpan()
+
+
+def span(name: str, **attributes) -> Span | NoopSpan:
+    """Returns a span to use as a context manager around the section of code to time. Any keyword arguments
+    are included in the span, for instance the repository and feature names."""
+    if _sink is None:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def event(name: str, **attributes):
+    """Records a span without a duration, for details that do not belong to any section of code in particular"""
+    if _sink is None:
+        return
+    with Span(name, attributes):
+        pass
+
+
+def annotate(**attributes):
+    """Adds details to the innermost span that is currently open, if any"""
+    if _sink is None:
+        return
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
@@ -0,0 +1,148 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Shared HTTP transport for every outbound call of the features.
+
+Each host gets a single requests session, with a pool of keep-alive connections, kept for the lifetime of the
+process. In the daemon, or when running over a batch of repositories, the TCP and TLS handshakes with a host
+are therefore only paid once, rather than for every call. Requests time out after :data:`CONNECT_TIMEOUT`
+seconds trying to connect and :data:`READ_TIMEOUT` seconds waiting for a response, unless the caller passes
+its own timeout, and are retried on connection errors and on the gateway errors (502, 503, 504) that proxies
+answer with when a service restarts. Only idempotent requests are retried once they may have reached the
+server, so a POST is never sent twice.
+
+As the sessions are shared by every feature, and in the daemon by every push, they never keep cookies. Calls
+that depend on a cookie set by an earlier one (such as a login) pass it on themselves, see :func:`cookies`.
+The PyGithub requester has sessions of its own, with its own retry policy (which also waits out rate
+limits), see :mod:`asfyaml.feature.github.connection`.
+
+Example use::
+
+    rv = transport.post(f"https://pubsub.apache.org:2070/publish/{project}", json=payload)
+
+    login = transport.get("https://ci2.apache.org/auth/login", auth=(username, password))
+    transport.post("https://ci2.apache.org/api/v2/forceschedulers/jekyll_websites", cookies=transport.cookies(login))
+"""
+
+import threading
+import typing
+import urllib.parse
+
+from asfyaml.lazyimport import lazy_import
+
+if typing.TYPE_CHECKING:
+    import requests
+else:
+    requests = lazy_import("requests")
+
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+RETRIES = 3
+BACKOFF_FACTOR = 0.5  # Waits 0.5, 1 and 2 seconds between tries, unless the server sends a Retry-After header
+RETRY_STATUSES = (502, 503, 504)
+POOL_SIZE = 10  # Connections kept open per host
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Sessions by origin, and whether the caller brought its own retry policy
+_sessions: dict[tuple[str, bool], "requests.Session"] = {}
+_lock = threading.Lock()
+
+
+def retry_policy() -> typing.Any:
+    """Returns the retry policy of the transport, as a urllib3 Retry object"""
+    # Imported here, so the transport costs nothing to import until a request is made.
+    from urllib3.util.retry import Retry
+
+    return Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Hand the last response to the caller, which checks its status
+    )
+
+
+def _origin(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    # PyGithub spells out the port, so https://api.github.com:443 and https://api.github.com share a session.
+    if parts.port is None or parts.port == DEFAULT_PORTS.get(scheme):
+        return f"{scheme}://{parts.hostname}"
+    return f"{scheme}://{parts.hostname}:{parts.port}"
+
+
+def session(url: str, retry: typing.Any = None) -> "requests.Session":
+    """Returns the shared session for the host of a URL, using the retry policy of the transport. Callers with
+    a retry policy of their own (a urllib3 Retry object) get a separate session for the host, set up with the
+    policy of the first of them, so the transport's own calls always use its policy, whoever used a host first."""
+    # Imported here, as it is slow to import, and the git hook hardly ever needs a session.
+    import http.cookiejar
+
+    key = (_origin(url), retry is not None)
+    with _lock:
+        if key not in _sessions:
+            adapter = requests.adapters.HTTPAdapter(
+                max_retries=retry if retry is not None else retry_policy(),
+                pool_connections=1,  # A session only ever talks to one host
+                pool_maxsize=POOL_SIZE,
+            )
+            new_session = requests.Session()
+            new_session.mount("https://", adapter)
+            new_session.mount("http://", adapter)
+            # Cookies set by a response are not kept, so they never end up in calls made for someone else.
+            new_session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            _sessions[key] = new_session
+        return _sessions[key]
+
+
+def request(method: str, url: str, **kwargs) -> "requests.Response":
+    """Sends a request through the shared session for the host of the URL. This takes the same arguments as
+    requests.request, and applies the default timeout if none is given."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return session(url).request(method, url, **kwargs)
+
+
+def cookies(response: "requests.Response") -> "requests.cookies.RequestsCookieJar":
+    """Returns the cookies set by a response, and by any redirects leading up to it, for passing on to the
+    calls that need them with the cookies argument"""
+    jar = requests.cookies.RequestsCookieJar()
+    for step in (*response.history, response):
+        jar.update(step.cookies)
+    return jar
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> "requests.Response":
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs) -> "requests.Response":
+    return request("PUT", url, **kwargs)
+
+
+def close():
+    """Closes every shared session, along with their open connections"""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for closing in sessions:
+        closing.close()
@@ -0,0 +1,142 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""On-disk cache of validated .asf.yaml feature data.
+
+Entries are keyed on a hash of the raw .asf.yaml contents, and record a fingerprint of the schema
+each feature was validated against. An entry is only used if every one of those fingerprints still
+matches the feature classes enabled for the run, so changing a schema invalidates its entries.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import typing
+
+import strictyaml
+
+from asfyaml import BASE_CACHE_PATH
+
+if typing.TYPE_CHECKING:
+    from asfyaml.asfyaml import ASFYamlFeature
+
+CACHE_DIR = os.path.join(BASE_CACHE_PATH, "validation-cache")
+# Once the cache grows beyond this many bytes, the least recently used entries are evicted.
+MAX_CACHE_SIZE = 32 * 1024 * 1024
+# Custom validators used by feature schemas. Changes in here affect every schema using them.
+VALIDATORS_FILE = pathlib.Path(__file__).parent.joinpath("validators.py")
+
+_fingerprints: dict[type, str] = {}
+
+
+def config_key(config_data: str) -> str:
+    """Returns the cache key for a raw .asf.yaml configuration"""
+    return hashlib.sha256(config_data.encode("utf-8")).hexdigest()
+
+
+def schema_fingerprint(feature_class: type["ASFYamlFeature"]) -> str:
+    """Returns a fingerprint of the schema a feature class validates against. As the repr of a strictyaml
+    schema leaves out defaults and the logic of custom validators, the source of the module defining the
+    feature and of our custom validators is included as well."""
+    if feature_class not in _fingerprints:
+        digest = hashlib.sha256()
+        digest.update(strictyaml.__version__.encode("utf-8"))
+        digest.update(f"{feature_class.__module__}.{feature_class.__qualname__}".encode("utf-8"))
+        digest.update(repr(getattr(feature_class, "schema", None)).encode("utf-8"))
+        for source_file in (getattr(sys.modules.get(feature_class.__module__), "__file__", None), VALIDATORS_FILE):
+            if source_file:
+                digest.update(pathlib.Path(source_file).read_bytes())
+        _fingerprints[feature_class] = digest.hexdigest()
+    return _fingerprints[feature_class]
+
+
+def get(config_data: str) -> dict | None:
+    """Looks up a cache entry for a raw .asf.yaml configuration. Returns the entry, or None if not found"""
+    entry_path = os.path.join(CACHE_DIR, f"{config_key(config_data)}.json")
+    try:
+        with open(entry_path) as f:
+            entry = json.load(f)
+        os.utime(entry_path)  # Mark as recently used, for eviction purposes
+    except (OSError, ValueError):
+        return None
+    return entry
+
+
+def is_current(entry: dict, enabled_features: dict[str, type["ASFYamlFeature"]]) -> bool:
+    """Checks whether every feature in a cache entry is still enabled and validates against the same schema"""
+    for feature_name, fingerprint in entry["fingerprints"].items():
+        feature_class = enabled_features.get(feature_name)
+        if feature_class is None or schema_fingerprint(feature_class) != fingerprint:
+            return False
+    return True
+
+
+def put(
+    config_data: str,
+    environments: typing.Iterable[str],
+    no_cache: bool,
+    features: list[tuple[str, type["ASFYamlFeature"], typing.Any]],
+):
+    """Stores the validated data for each feature (as feature name, class and data) in a raw .asf.yaml
+    configuration, along with the environments and cache settings found in its meta section."""
+    if not os.path.isdir(BASE_CACHE_PATH):
+        return
+    entry = {
+        "environments": sorted(environments),
+        "no_cache": no_cache,
+        "fingerprints": {name: schema_fingerprint(feature_class) for name, feature_class, _data in features},
+        "features": [[name, data] for name, _feature_class, data in features],
+    }
+    try:
+        entry_json = json.dumps(entry)
+    except TypeError:  # Validated data we cannot represent in JSON, don't cache it.
+        return
+    entry_path = os.path.join(CACHE_DIR, f"{config_key(config_data)}.json")
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first, so concurrent runs never read a partially written entry.
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(entry_json)
+        os.replace(tmp_path, entry_path)
+        evict()
+    except OSError as e:
+        print(f"Could not write validation cache entry: {e}")
+
+
+def evict():
+    """Removes the least recently used entries until the cache is no larger than MAX_CACHE_SIZE bytes"""
+    entries = []
+    total_size = 0
+    with os.scandir(CACHE_DIR) as it:
+        for dirent in it:
+            if dirent.name.endswith(".json"):
+                stat = dirent.stat()
+                entries.append((stat.st_mtime, stat.st_size, dirent.path))
+                total_size += stat.st_size
+    if total_size <= MAX_CACHE_SIZE:
+        return
+    for _mtime, size, path in sorted(entries):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:  # Evicted by a concurrent run already
+            pass
+        total_size -= size
+        if total_size <= MAX_CACHE_SIZE:
+            break
@@ -0,0 +1,89 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Shared parts of the benchmarks: running code in a fresh interpreter, and the command line handling for
+comparing results against a stored baseline (or storing them as the new baseline).
+
+Example use::
+
+    parser = argparse.ArgumentParser(description="Some benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    harness.main(parser, BASELINE_FILE, lambda args: run_benchmarks(args.repeat), print_report, compare)
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import typing
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+
+def run_python(
+    args: list[str], cwd: str | pathlib.Path = ROOT_DIR, env: typing.Mapping[str, str] | None = None, stdin: str = ""
+) -> subprocess.CompletedProcess:
+    """Runs a fresh interpreter with the given arguments, and the repository on its path. Extra environment
+    variables can be given as env. An exception is raised if it fails."""
+    full_env = dict(os.environ)
+    full_env["PYTHONPATH"] = str(ROOT_DIR)
+    full_env.update(env or {})
+    rv = subprocess.run(
+        [sys.executable, *args], input=stdin, capture_output=True, text=True, env=full_env, cwd=cwd, check=False
+    )
+    if rv.returncode != 0:
+        raise Exception(f"Benchmark subprocess failed: {rv.stderr}")
+    return rv
+
+
+def is_regression(value: float, baseline: float, tolerance: float, slack: float) -> bool:
+    """A measurement is a regression if it exceeds baseline * tolerance + slack"""
+    return value > baseline * tolerance + slack
+
+
+def main(
+    parser: argparse.ArgumentParser,
+    baseline_file: pathlib.Path,
+    run: typing.Callable[[argparse.Namespace], dict],
+    print_report: typing.Callable[[dict, dict], None],
+    compare: typing.Callable[[dict, dict], list[str]],
+):
+    """Runs a benchmark from the command line. The arguments of the benchmark itself are set up in parser, and
+    run is called with the parsed arguments. The results are then reported, and either stored as the new
+    baseline (--update), or compared against it, exiting with a non-zero status if any regressions are found."""
+    parser.add_argument("--update", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--baseline", type=pathlib.Path, default=baseline_file, help="baseline file to use")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    results = run(args)
+    print_report(results, baseline)
+
+    if args.update:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Stored new baseline in {args.baseline}")
+        return
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print("Regressions found:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print("No regressions found.")
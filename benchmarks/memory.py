@@ -0,0 +1,167 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Memory benchmark for processing a very large push.
+
+Builds a synthetic repository (using `git fast-import`) with a single branch of 50,000 commits by a few
+hundred authors, and pushes it as a new branch. In a fresh interpreter, it then goes through the commits of
+that push with `ChangeSet.iter_commits` in a few ways, measuring with tracemalloc:
+  - the memory kept per commit, when all commits are kept around (as a list),
+  - the peak memory use, both when keeping the commits and when only streaming through them.
+
+The results are compared against the stored baseline (memory_baseline.json). Memory use that exceeds the
+baseline by more than the allowed tolerance is reported as a regression, and the script exits with a non-zero
+status. Timings are reported as well, but are not compared, as they depend on the machine.
+
+Usage:
+    python3 benchmarks/memory.py             # Compare against the baseline
+    python3 benchmarks/memory.py --update    # Store the results as the new baseline
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import tempfile
+
+import harness
+
+BASELINE_FILE = pathlib.Path(__file__).resolve().parent.joinpath("memory_baseline.json")
+GIT_CMD = "/usr/bin/git"
+
+# A measurement is a regression if it exceeds baseline * TOLERANCE + SLACK. Memory use hardly varies between
+# runs, so this is a lot tighter than for the startup benchmark.
+TOLERANCE = 1.1
+SLACK_BYTES_PER_COMMIT = 32
+SLACK_PEAK_MB = 1.0
+
+NUM_COMMITS = 50_000
+NUM_AUTHORS = 250
+NUM_FILES = 500
+
+SCENARIOS = {
+    # Every field loaded, and every commit kept, as when building a commit email for each of them.
+    "all_fields_kept": {"keep": True},
+    # Every field loaded, but each commit dropped once looked at.
+    "all_fields_streamed": {"keep": False},
+    # Only the fields needed for a short summary loaded, and every commit kept.
+    "summary_fields_kept": {"keep": True, "fields": ["subject", "committer", "committed_unix"]},
+}
+
+# Run inside a fresh interpreter, in the synthetic repository: goes through the commits of the push in the
+# way given by the scenario, and prints the measurements as JSON.
+PUSH_SCRIPT = """
+import json, sys, time, tracemalloc
+import asfyaml.dataobjects
+head, scenario = sys.argv[1], json.loads(sys.argv[2])
+repo = asfyaml.dataobjects.Repository(".", reflog=f"{'0' * 40} {head} refs/heads/import")
+changeset = next(repo.changesets)
+repo.refs  # Not part of the measurement
+tracemalloc.start()
+start = time.perf_counter()
+kept, count = [], 0
+for commit in changeset.iter_commits(fields=scenario.get("fields")):
+    count += 1
+    if scenario["keep"]:
+        kept.append(commit)
+elapsed = time.perf_counter() - start
+current, peak = tracemalloc.get_traced_memory()
+print(json.dumps({
+    "commits": count,
+    "bytes_per_commit": round(current / count),
+    "peak_mb": round(peak / 2**20, 2),
+    "seconds": round(elapsed, 2),
+}))
+"""
+
+
+def fast_import_stream(num_commits: int) -> bytes:
+    """Returns a git fast-import stream for a branch of num_commits commits, each changing a single file"""
+    chunks = []
+    for i in range(1, num_commits + 1):
+        author = i % NUM_AUTHORS
+        identity = f"Author {author} <author{author}@apache.org> {1700000000 + i * 60} +0000"
+        message = f"Change number {i}\n\nThis explains change number {i} in some detail.\n\nCloses: #{i}\n"
+        contents = f"Contents of file {i % NUM_FILES} after change {i}\n"
+        chunks.append(
+            f"commit refs/heads/import\nmark :{i}\nauthor {identity}\ncommitter {identity}\n"
+            f"data {len(message)}\n{message}" + (f"from :{i - 1}\n" if i > 1 else "") + f"M 644 inline "
+            f"dir{i % 20}/file{i % NUM_FILES}.txt\ndata {len(contents)}\n{contents}\n"
+        )
+    return "".join(chunks).encode("utf-8")
+
+
+def make_repository(path: str, num_commits: int) -> str:
+    """Creates the synthetic repository at path, and returns the sha of its newest commit"""
+    subprocess.run([GIT_CMD, "init", "-q", "--bare", path], check=True)
+    subprocess.run([GIT_CMD, "fast-import", "--quiet"], input=fast_import_stream(num_commits), cwd=path, check=True)
+    return subprocess.check_output([GIT_CMD, "rev-parse", "refs/heads/import"], cwd=path, text=True).strip()
+
+
+def run_scenario(repo_path: str, head: str, scenario: dict) -> dict:
+    return json.loads(harness.run_python(["-c", PUSH_SCRIPT, head, json.dumps(scenario)], cwd=repo_path).stdout)
+
+
+def run_benchmarks(num_commits: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo_path = os.path.join(tmp_dir, "import.git")
+        head = make_repository(repo_path, num_commits)
+        for name, scenario in SCENARIOS.items():
+            results[name] = run_scenario(repo_path, head, scenario)
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Compares benchmark results to the baseline, returning a list of regressions found"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or base["commits"] != result["commits"]:
+            continue
+        if harness.is_regression(
+            result["bytes_per_commit"], base["bytes_per_commit"], TOLERANCE, SLACK_BYTES_PER_COMMIT
+        ):
+            regressions.append(
+                f"Scenario '{name}' kept {result['bytes_per_commit']} bytes per commit, "
+                f"baseline is {base['bytes_per_commit']}"
+            )
+        if harness.is_regression(result["peak_mb"], base["peak_mb"], TOLERANCE, SLACK_PEAK_MB):
+            regressions.append(f"Scenario '{name}' peaked at {result['peak_mb']}MB, baseline is {base['peak_mb']}MB")
+    return regressions
+
+
+def print_report(results: dict, baseline: dict):
+    print("Memory use going through the commits of a large push:")
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        print(
+            f"  {name:<22} {result['commits']} commits, {result['bytes_per_commit']:>6} bytes/commit "
+            f"(baseline {base.get('bytes_per_commit', 'n/a')}), peak {result['peak_mb']:>8}MB "
+            f"(baseline {base.get('peak_mb', 'n/a')}), {result['seconds']}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory benchmark for processing a very large push")
+    parser.add_argument("--commits", type=int, default=NUM_COMMITS, help="number of commits in the push")
+    harness.main(parser, BASELINE_FILE, lambda args: run_benchmarks(args.commits), print_report, compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Startup-time benchmark for the .asf.yaml git hook path.
+
+Measures, each in fresh interpreters:
+  - the import cost of every feature module under asfyaml/feature, on top of asfyaml.asfyaml, broken down
+    by the third-party packages it pulls in (as reported by `python -X importtime`),
+  - the time taken to `import asfyaml.asfyaml` and run `ASFYamlInstance(...).run_parts(validate_only=True)`
+    for a few sample configurations, with an empty and with a populated validation cache.
+
+The results are compared against the stored baseline (startup_baseline.json). Timings that exceed the
+baseline by more than the allowed tolerance, or heavyweight third-party imports that a feature did not
+have before, are reported as regressions, and the script exits with a non-zero status. As timings depend
+on the machine, the baseline should be regenerated (using --update) on the machine running the comparison.
+
+Usage:
+    python3 benchmarks/startup.py             # Compare against the baseline
+    python3 benchmarks/startup.py --update    # Store the results as the new baseline
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import harness
+from harness import ROOT_DIR
+
+BASELINE_FILE = pathlib.Path(__file__).resolve().parent.joinpath("startup_baseline.json")
+
+# A timing is a regression if it exceeds baseline * TOLERANCE + SLACK_MS. Startup timings are noisy,
+# so this is only meant to catch substantial slowdowns, such as a new heavyweight import.
+TOLERANCE = 1.5
+SLACK_MS = 5.0
+# Third-party packages with a cumulative import time above this many milliseconds count as heavyweight.
+HEAVY_IMPORT_MS = 5.0
+
+SCENARIOS = {
+    # The most common case, a repository that only sets up notifications.
+    "notifications": """
+notifications:
+  commits: commits@infra.apache.org
+""",
+    # Every production feature at once.
+    "all_features": """
+notifications:
+  commits: commits@infra.apache.org
+  issues: issues@infra.apache.org
+github:
+  description: Apache Infrastructure benchmark
+  homepage: https://infra.apache.org/
+  labels:
+    - infrastructure
+  features:
+    issues: true
+  protected_branches:
+    main:
+      required_linear_history: true
+publish:
+  whoami: asf-site
+staging:
+  whoami: asf-staging
+  profile: ~
+pelican:
+  whoami: main
+  target: asf-site
+jekyll:
+  whoami: jekyll
+project:
+  metadata:
+    key: infrastructure-benchmark
+    committee: infrastructure
+""",
+}
+
+# Run inside a fresh interpreter: imports asfyaml, validates the configuration from stdin once and prints the
+# timings as JSON. The validation cache in the directory given is used (and filled) as it would be by the hook.
+HOOK_SCRIPT = """
+import json, sys, time
+config = sys.stdin.read()
+start = time.perf_counter()
+import asfyaml.asfyaml
+import asfyaml.dataobjects
+import asfyaml.validation_cache
+imported = time.perf_counter()
+asfyaml.validation_cache.BASE_CACHE_PATH = asfyaml.validation_cache.CACHE_DIR = sys.argv[1]
+repo = asfyaml.dataobjects.Repository(sys.argv[1] + "/infrastructure-benchmark.git")
+asfyaml.asfyaml.ASFYamlInstance(repo, "benchmark", config, "refs/heads/main").run_parts(validate_only=True)
+print(json.dumps({"import_ms": (imported - start) * 1000, "validate_ms": (time.perf_counter() - imported) * 1000}))
+"""
+
+
+def feature_modules() -> list[str]:
+    """Returns the names of all feature modules in asfyaml/feature"""
+    sys.path.insert(0, str(ROOT_DIR))
+    import asfyaml.feature
+
+    return sorted(set(asfyaml.feature.FEATURE_MODULES.values()))
+
+
+def run_python(args: list[str], cache_dir: str, stdin: str = "") -> subprocess.CompletedProcess:
+    env = {"PATH_INFO": "infrastructure-benchmark.git", "GIT_PROJECT_ROOT": cache_dir}
+    return harness.run_python(args, env=env, stdin=stdin)
+
+
+def parse_importtime(output: str, after: str) -> list[tuple[str, float, int]]:
+    """Parses the output of `python -X importtime`, returning (module, cumulative ms, depth) for every
+    module imported after the top-level import of :samp:`after` finished."""
+    entries = []
+    seen_marker = False
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        module = name.strip()
+        if not seen_marker:
+            seen_marker = module == after and depth == 0
+            continue
+        entries.append((module, int(cumulative_us) / 1000, depth))
+    return entries
+
+
+def measure_feature_imports(module_name: str, repeat: int, cache_dir: str) -> dict:
+    """Measures the import cost of a single feature module, on top of asfyaml.asfyaml"""
+    qualified_name = f"asfyaml.feature.{module_name}"
+    code = f"import asfyaml.asfyaml; import {qualified_name}"
+    totals = []
+    packages: dict[str, list[float]] = {}
+    for _ in range(repeat):
+        entries = parse_importtime(run_python(["-X", "importtime", "-c", code], cache_dir).stderr, "asfyaml.asfyaml")
+        totals.append(next(ms for module, ms, _depth in entries if module == qualified_name))
+        # Attribute the cost of each third-party package to its outermost import in the tree.
+        run_packages: dict[str, float] = {}
+        for module, ms, _depth in entries:
+            package = module.split(".")[0]
+            if package == "asfyaml" or package in sys.stdlib_module_names:
+                continue
+            run_packages[package] = max(run_packages.get(package, 0.0), ms)
+        for package, ms in run_packages.items():
+            packages.setdefault(package, []).append(ms)
+    return {
+        "import_ms": round(statistics.median(totals), 2),
+        "packages": {
+            package: round(statistics.median(timings), 2)
+            for package, timings in sorted(packages.items())
+            if statistics.median(timings) >= HEAVY_IMPORT_MS
+        },
+    }
+
+
+def measure_hook(config: str, repeat: int) -> dict:
+    """Measures importing asfyaml and validating a configuration, with and without the validation cache.
+    Each hook run is a new process, so the cached timing is taken in a second interpreter, reading the cache
+    that the first one left behind, rather than in the process that just filled it."""
+    runs: dict[str, list[float]] = {}
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            start = time.perf_counter()
+            timings = json.loads(run_python(["-c", HOOK_SCRIPT, cache_dir], cache_dir, stdin=config).stdout)
+            total_ms = (time.perf_counter() - start) * 1000
+            cached = json.loads(run_python(["-c", HOOK_SCRIPT, cache_dir], cache_dir, stdin=config).stdout)
+            timings["validate_cached_ms"] = cached["validate_ms"]
+            timings["total_ms"] = total_ms
+        for key, value in timings.items():
+            runs.setdefault(key, []).append(value)
+    return {key: round(statistics.median(values), 2) for key, values in runs.items()}
+
+
+def run_benchmarks(repeat: int) -> dict:
+    results: dict = {"features": {}, "hook": {}}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Warm-up run, so that byte-compiling the sources does not end up in the timings.
+        run_python(["-c", "import asfyaml.asfyaml, asfyaml.feature; asfyaml.feature.load_all_features()"], cache_dir)
+        for module_name in feature_modules():
+            results["features"][module_name] = measure_feature_imports(module_name, repeat, cache_dir)
+    for scenario, config in SCENARIOS.items():
+        results["hook"][scenario] = measure_hook(config, repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Compares benchmark results to the baseline, returning a list of regressions found"""
+    regressions = []
+    for module_name, result in results["features"].items():
+        base = baseline.get("features", {}).get(module_name)
+        if not base:
+            continue
+        if harness.is_regression(result["import_ms"], base["import_ms"], TOLERANCE, SLACK_MS):
+            regressions.append(
+                f"Importing feature module '{module_name}' took {result['import_ms']}ms, baseline is {base['import_ms']}ms"
+            )
+        for package, ms in result["packages"].items():
+            if package not in base["packages"]:
+                regressions.append(
+                    f"Feature module '{module_name}' now imports heavyweight package '{package}' ({ms}ms)"
+                )
+    for scenario, result in results["hook"].items():
+        base = baseline.get("hook", {}).get(scenario)
+        if not base:
+            continue
+        for key, value in result.items():
+            if key in base and harness.is_regression(value, base[key], TOLERANCE, SLACK_MS):
+                regressions.append(f"Hook scenario '{scenario}': {key} is {value}ms, baseline is {base[key]}ms")
+    return regressions
+
+
+def print_report(results: dict, baseline: dict):
+    print("Feature module import costs (on top of asfyaml.asfyaml):")
+    for module_name, result in results["features"].items():
+        base = baseline.get("features", {}).get(module_name, {})
+        packages = ", ".join(f"{package}={ms}ms" for package, ms in result["packages"].items()) or "-"
+        print(f"  {module_name:<20} {result['import_ms']:>9}ms (baseline {base.get('import_ms', 'n/a')})  {packages}")
+    print("Hook path (import asfyaml.asfyaml + run_parts(validate_only=True)):")
+    for scenario, result in results["hook"].items():
+        base = baseline.get("hook", {}).get(scenario, {})
+        timings = ", ".join(f"{key}={value}ms (baseline {base.get(key, 'n/a')})" for key, value in result.items())
+        print(f"  {scenario:<20} {timings}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark for the .asf.yaml git hook path")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs per measurement (median is used)")
+    harness.main(parser, BASELINE_FILE, lambda args: run_benchmarks(args.repeat), print_report, compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,16 @@ import pytest
 from pathlib import Path
 
 import asfyaml.dataobjects
+import asfyaml.validation_cache
+
+
+@pytest.fixture(autouse=True)
+def validation_cache_dir(tmp_path, monkeypatch) -> Path:
+    """Keeps the validation cache of each test in its own temporary directory, rather than in /tmp, where entries
+    would be left behind, and could be picked up by a later test"""
+    monkeypatch.setattr(asfyaml.validation_cache, "BASE_CACHE_PATH", str(tmp_path))
+    monkeypatch.setattr(asfyaml.validation_cache, "CACHE_DIR", str(tmp_path.joinpath("validation-cache")))
+    return tmp_path.joinpath("validation-cache")
 
 
 @pytest.fixture
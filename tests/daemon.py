@@ -0,0 +1,123 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for processing pushes through the .asf.yaml daemon"""
+
+import io
+import os
+import stat
+import threading
+
+import pytest
+
+import asfyaml.asfyaml
+import asfyaml.daemon
+import asfyaml.dataobjects
+import asfyaml.output
+
+TEST_ENV = "daemontest"
+
+
+class ASFGreetingFeature(asfyaml.asfyaml.ASFYamlFeature, name="greeting", env=TEST_ENV):
+    def run(self):
+        print(f"Hello {self.yaml.to}, from {self.instance.environment.repo_name} ({self.committer.username})")
+
+
+class ASFBrokenFeature(asfyaml.asfyaml.ASFYamlFeature, name="broken", env=TEST_ENV):
+    def run(self):
+        print("About to fail")
+        raise Exception("This feature always fails")
+
+
+@pytest.fixture
+def allowed_uids():
+    """The users the daemon accepts push events from, None for anyone able to connect"""
+    return None
+
+
+@pytest.fixture
+def daemon_socket(tmp_path, allowed_uids):
+    """Runs a daemon in the background, and returns the path of its socket"""
+    socket_path = str(tmp_path.joinpath("asfyaml.sock"))
+    with asfyaml.daemon.PushServer(socket_path, allowed_uids) as server, asfyaml.output.routed_stdout() as router:
+        server.router = router
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield socket_path
+        server.shutdown()
+        thread.join()
+
+
+def submit(test_repo: asfyaml.dataobjects.Repository, socket_path: str, config: str) -> str:
+    output = io.StringIO()
+    asfyaml.daemon.submit(
+        str(test_repo.path),
+        "humbedooh",
+        asfyaml.dataobjects.DEFAULT_BRANCH,
+        environ={"PATH_INFO": "whimsy-site.git/git-receive-pack", "GIT_PROJECT_ROOT": "/tmp"},
+        config_data=f"meta:\n  environment: {TEST_ENV}\n{config}",
+        socket_path=socket_path,
+        output=output,
+    )
+    return output.getvalue()
+
+
+def test_daemon_run(test_repo: asfyaml.dataobjects.Repository, daemon_socket: str):
+    output = submit(test_repo, daemon_socket, "greeting:\n  to: world\n")
+    assert "Hello world, from whimsy-site (humbedooh)\n" in output
+
+
+def test_daemon_concurrent_runs(test_repo: asfyaml.dataobjects.Repository, daemon_socket: str):
+    outputs = {}
+
+    def run(name):
+        outputs[name] = submit(test_repo, daemon_socket, f"greeting:\n  to: {name}\n")
+
+    threads = [threading.Thread(target=run, args=(f"client{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Every client only gets the output of its own run
+    assert len(outputs) == 8
+    for name, output in outputs.items():
+        assert [line for line in output.splitlines() if line.startswith("Hello")] == [
+            f"Hello {name}, from whimsy-site (humbedooh)"
+        ]
+
+
+def test_daemon_failure(test_repo: asfyaml.dataobjects.Repository, daemon_socket: str):
+    with pytest.raises(asfyaml.daemon.DaemonError, match="This feature always fails") as e:
+        submit(test_repo, daemon_socket, "broken:\n  foo: bar\n")
+    assert e.value.feature == "broken"
+
+
+def test_daemon_not_running(test_repo: asfyaml.dataobjects.Repository, tmp_path):
+    with pytest.raises(OSError):
+        submit(test_repo, str(tmp_path.joinpath("nothing.sock")), "greeting:\n  to: world\n")
+
+
+def test_daemon_socket_mode(daemon_socket: str):
+    mode = os.stat(daemon_socket).st_mode
+    assert stat.S_ISSOCK(mode)
+    assert stat.S_IMODE(mode) == asfyaml.daemon.SOCKET_MODE
+
+
+@pytest.mark.parametrize("allowed_uids", [{os.getuid() + 1}])
+def test_daemon_refuses_user(test_repo: asfyaml.dataobjects.Repository, daemon_socket: str):
+    with pytest.raises(asfyaml.daemon.DaemonError, match=f"User {os.getuid()} is not allowed"):
+        submit(test_repo, daemon_socket, "greeting:\n  to: world\n")
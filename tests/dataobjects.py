@@ -0,0 +1,346 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for the git data objects"""
+
+import subprocess
+
+import pytest
+
+import asfyaml.dataobjects
+
+ZERO_SHA = "0" * 40
+
+
+def git(repo: asfyaml.dataobjects.Repository, *args) -> str:
+    """Runs git in the work tree of a test repository"""
+    command = [asfyaml.dataobjects.GIT_CMD, "-C", str(repo.path.parent), *args]
+    return subprocess.check_output(command, universal_newlines=True).strip()
+
+
+def make_changeset(repo: asfyaml.dataobjects.Repository, oldsha: str, newsha: str, name: str = "refs/heads/main"):
+    return asfyaml.dataobjects.ChangeSet(name, oldsha, newsha, repository=repo)
+
+
+def loaded_fields(commit: asfyaml.dataobjects.Commit) -> dict:
+    """Returns the attributes of a commit that have been set so far, without loading any others"""
+    values = {}
+    for name in asfyaml.dataobjects.Commit.__slots__:
+        try:
+            values[name] = object.__getattribute__(commit, name)
+        except AttributeError:
+            pass
+    return values
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch) -> asfyaml.dataobjects.Repository:
+    """A small git repository with a main branch of five commits"""
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "Jane Doe")
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "jane@example.org")
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "Humbedooh")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "humbedooh@apache.org")
+    repo = asfyaml.dataobjects.Repository(str(tmp_path.joinpath(".git")))
+    subprocess.run([asfyaml.dataobjects.GIT_CMD, "init", "-q", "-b", "main", str(tmp_path)], check=True)
+    for i in range(5):
+        tmp_path.joinpath(f"file{i}.txt").write_text(f"Line {i}\n" * (i + 1))
+        if i == 3:
+            tmp_path.joinpath(".asf.yaml").write_text("notifications:\n  commits: commits@foo.apache.org\n")
+        git(repo, "add", "-A")
+        git(repo, "commit", "-q", "-m", f"Commit {i}", "-m", f"Body of commit {i}\n\nWith two paragraphs.")
+    return repo
+
+
+def test_log_commits(git_repo: asfyaml.dataobjects.Repository):
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    ref = make_changeset(git_repo, ZERO_SHA, ZERO_SHA)
+    commits = list(asfyaml.dataobjects.log_commits(ref, "main"))
+    assert [commit.sha for commit in commits] == shas
+    for commit in commits:
+        # Every field must match what loading the commit on its own gives us
+        single = asfyaml.dataobjects.Commit(ref, commit.sha)
+        assert loaded_fields(commit) == loaded_fields(single)
+    assert commits[0].subject == "Commit 4"
+    assert commits[0].body == "Commit 4\n\nBody of commit 4\n\nWith two paragraphs.\n"
+    assert commits[0].committer_uname == "humbedooh"
+    assert "file4.txt | 5 +++++" in commits[0].stats
+
+
+def test_changeset_commits(git_repo: asfyaml.dataobjects.Repository):
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    changeset = make_changeset(git_repo, shas[3], shas[0])
+    assert [commit.sha for commit in changeset.commits] == shas[:3]
+    assert all(commit.ref is changeset for commit in changeset.commits)
+
+    # A new branch only lists the commits that are not on any other branch yet
+    git(git_repo, "checkout", "-q", "-b", "feature")
+    git(git_repo, "branch", "-f", "main", shas[1])
+    new_branch = make_changeset(git_repo, ZERO_SHA, shas[0], name="refs/heads/feature")
+    assert [commit.sha for commit in new_branch.commits] == shas[:1]
+
+
+def test_deleted_changeset(git_repo: asfyaml.dataobjects.Repository):
+    changeset = make_changeset(git_repo, git(git_repo, "rev-parse", "main"), ZERO_SHA)
+    assert list(changeset.commits) == []
+
+
+def test_object_reader(git_repo: asfyaml.dataobjects.Repository):
+    reader = git_repo.objects
+    assert git_repo.read_file("main", ".asf.yaml") == "notifications:\n  commits: commits@foo.apache.org\n"
+    assert git_repo.read_file("main~2", ".asf.yaml") is None
+    assert reader.info("main:file0.txt") == (git(git_repo, "rev-parse", "main:file0.txt"), "blob", 7)
+
+    headers, message = reader.commit("main")
+    assert headers["sha"] == git(git_repo, "rev-parse", "main")
+    assert headers["parent"] == [git(git_repo, "rev-parse", "main~1")]
+    assert headers["tree"] == git(git_repo, "rev-parse", "main^{tree}")
+    assert message == "Commit 4\n\nBody of commit 4\n\nWith two paragraphs.\n"
+
+    entries = reader.tree("main")
+    assert [name for _mode, _kind, _sha, name in entries] == [".asf.yaml"] + [f"file{i}.txt" for i in range(5)]
+    assert entries[1] == ("100644", "blob", git(git_repo, "rev-parse", "main:file0.txt"), "file0.txt")
+
+
+def test_object_reader_restarts(git_repo: asfyaml.dataobjects.Repository):
+    reader = git_repo.objects
+    assert reader.blob("main:file0.txt") == "Line 0\n"
+    reader._batch._proc.kill()  # The reader should notice, and start a new git process
+    assert reader.blob("main:file1.txt") == "Line 1\nLine 1\n"
+    git_repo.close()
+    assert reader.blob("main:file0.txt") == "Line 0\n"
+    git_repo.close()
+
+
+def test_commits_touching(git_repo: asfyaml.dataobjects.Repository):
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    changeset = make_changeset(git_repo, shas[4], shas[0])
+    assert [commit.sha for commit in changeset.commits_touching([".asf.yaml"])] == [shas[1]]
+    assert [commit.sha for commit in changeset.commits_touching(["file3.txt", "file4.txt"])] == shas[:2]
+    assert list(changeset.commits_touching(["*.txt"])) == [], "Paths should not be treated as patterns"
+
+
+def test_commits_touching_merges(git_repo: asfyaml.dataobjects.Repository):
+    git(git_repo, "checkout", "-q", "-b", "side", "main~1")
+    git_repo.path.parent.joinpath(".asf.yaml").write_text("notifications:\n  commits: side@foo.apache.org\n")
+    git(git_repo, "commit", "-q", "-a", "-m", "Side commit")
+    git(git_repo, "checkout", "-q", "main")
+    git(git_repo, "merge", "-q", "--no-edit", "-s", "recursive", "-X", "theirs", "side")
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    changeset = make_changeset(git_repo, shas[-1], shas[0])
+    touching = [commit.subject for commit in changeset.commits_touching([".asf.yaml"])]
+    # The same commits as looking through the files of every commit, without the merge that brought in the change
+    assert touching == [commit.subject for commit in changeset.commits_with_files() if ".asf.yaml" in commit.files]
+    assert touching == ["Side commit", "Commit 3"]
+
+
+def test_commits_touching_directory(git_repo: asfyaml.dataobjects.Repository):
+    docs = git_repo.path.parent.joinpath("docs")
+    docs.mkdir()
+    docs.joinpath("index.md").write_text("Base\n")
+    git(git_repo, "add", "docs")
+    git(git_repo, "commit", "-q", "-m", "Add docs")
+    git(git_repo, "checkout", "-q", "-b", "side")
+    docs.joinpath("index.md").write_text("Side\n")
+    git(git_repo, "commit", "-q", "-a", "-m", "Side docs")
+    git(git_repo, "checkout", "-q", "main")
+    docs.joinpath("index.md").write_text("Main\n")
+    git(git_repo, "commit", "-q", "-a", "-m", "Main docs")
+    # Resolving the conflict changes the docs in the merge itself
+    subprocess.run(
+        [asfyaml.dataobjects.GIT_CMD, "-C", str(git_repo.path.parent), "merge", "-q", "side"], capture_output=True
+    )
+    docs.joinpath("index.md").write_text("Resolved\n")
+    git(git_repo, "commit", "-q", "-a", "--no-edit")
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    changeset = make_changeset(git_repo, shas[-1], shas[0])
+    for paths in (["docs"], ["docs/"]):
+        touching = [commit.subject for commit in changeset.commits_touching(paths)]
+        assert touching == [
+            commit.subject
+            for commit in changeset.commits_with_files()
+            if any(file.startswith("docs/") for file in commit.files)
+        ]
+        assert touching[0].startswith("Merge branch 'side'")
+        assert sorted(touching[1:]) == ["Add docs", "Main docs", "Side docs"]
+
+
+def test_load_files(git_repo: asfyaml.dataobjects.Repository):
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    changeset = make_changeset(git_repo, ZERO_SHA, shas[0])
+    commits = changeset.commits_with_files()
+    assert [commit.sha for commit in commits] == shas
+    assert commits[1].changes == [("A", ".asf.yaml"), ("A", "file3.txt")]
+    for commit in commits:
+        # Loaded in bulk, the file lists must match what git show gives for each commit
+        files = git(git_repo, "show", "--name-only", "--format=format:", commit.sha).split()
+        assert commit.files == files
+        assert commit._diffs == {}
+
+    commits = changeset.commits_with_files(diffs=True)
+    assert commits[1].diff("file3.txt") == git(git_repo, "show", "--format=format:", shas[1], "--", "file3.txt") + "\n"
+    assert commits[1].diff(".asf.yaml").startswith("diff --git a/.asf.yaml b/.asf.yaml\n")
+
+    # Once the byte cap is reached, diffs are no longer kept, but can still be loaded one by one
+    commits = changeset.commits_with_files(diffs=True, max_diff_bytes=200)
+    kept = [path for commit in commits for path in commit._diffs]
+    assert 0 < len(kept) < 6
+    assert sum(len(diff) for commit in commits for diff in commit._diffs.values()) <= 200
+    assert "file0.txt" not in commits[4]._diffs
+    assert commits[4].diff("file0.txt") == git(git_repo, "show", "--format=format:", shas[4], "--", "file0.txt") + "\n"
+
+
+def test_load_files_merge(git_repo: asfyaml.dataobjects.Repository):
+    git(git_repo, "checkout", "-q", "-b", "side", "main~1")
+    git_repo.path.parent.joinpath("side.txt").write_text("Side\n")
+    git(git_repo, "add", "side.txt")
+    git(git_repo, "commit", "-q", "-m", "Side commit")
+    git(git_repo, "checkout", "-q", "main")
+    git(git_repo, "merge", "-q", "--no-edit", "side")
+    commit = asfyaml.dataobjects.Commit(
+        make_changeset(git_repo, ZERO_SHA, ZERO_SHA), git(git_repo, "rev-parse", "main")
+    )
+    assert commit.is_merge
+    assert commit.files == []  # A clean merge changes nothing of its own
+
+
+def test_log_commits_merge_stats(git_repo: asfyaml.dataobjects.Repository):
+    git(git_repo, "checkout", "-q", "-b", "side", "main~1")
+    git_repo.path.parent.joinpath("side.txt").write_text("Side\n")
+    git(git_repo, "add", "side.txt")
+    git(git_repo, "commit", "-q", "-m", "Side commit")
+    git(git_repo, "checkout", "-q", "main")
+    git(git_repo, "merge", "-q", "--no-edit", "side")
+    ref = make_changeset(git_repo, ZERO_SHA, ZERO_SHA)
+    merge = next(asfyaml.dataobjects.log_commits(ref, "-n", "1", "main"))
+    assert merge.is_merge
+    # Listed in bulk, a merge has the same diffstat as when loaded on its own with git show
+    assert "side.txt | 1 +" in merge.stats
+    assert loaded_fields(merge) == loaded_fields(asfyaml.dataobjects.Commit(ref, merge.sha))
+
+
+def test_log_commits_separator_in_message(git_repo: asfyaml.dataobjects.Repository):
+    # The character marking the start of each record in the output of git log, even followed by something that
+    # looks like a sha, is just part of the message
+    message = "Odd message\n\nBefore\x1edeadbeef after\n"
+    git_repo.path.parent.joinpath("file4.txt").write_text("Odd\n")
+    git(git_repo, "commit", "-q", "-a", "-m", message)
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    ref = make_changeset(git_repo, ZERO_SHA, ZERO_SHA)
+    commits = list(asfyaml.dataobjects.log_commits(ref, "main"))
+    assert [commit.sha for commit in commits] == shas
+    assert commits[0].body == message
+    assert commits[1].subject == "Commit 4"
+    assert "1 file changed" in commits[0].stats
+
+
+def test_repository_context(tmp_path):
+    repo_path = tmp_path.joinpath("private", "whimsy-site.git")
+    repo_path.mkdir(parents=True)
+    repo_path.joinpath("HEAD").write_text("ref: refs/heads/trunk\n")
+    repo_path.joinpath("description").write_text("Whimsy website")
+    repo = asfyaml.dataobjects.Repository(str(repo_path))
+    context = repo.context
+    assert repo.context is context, "The context should only be loaded once"
+    assert (context.name, context.project, context.hostname) == ("whimsy-site", "whimsy", "whimsical")
+    assert context.is_private and repo.is_private
+    assert context.default_branch == repo.default_branch == "trunk"
+    assert context.metadata_file("description") == "Whimsy website"
+    assert context.metadata_file("github_collaborators.txt") is None
+
+    # The snapshot does not change along with the files, and cannot be changed itself
+    repo_path.joinpath("HEAD").write_text("ref: refs/heads/main\n")
+    assert repo.default_branch == "trunk"
+    with pytest.raises(AttributeError):
+        context.default_branch = "main"
+
+    missing = asfyaml.dataobjects.Repository(str(tmp_path.joinpath("foo.git")))
+    assert missing.default_branch == "main"
+    assert missing.project == "foo"
+
+
+def test_new_branches_share_refs(git_repo: asfyaml.dataobjects.Repository, monkeypatch):
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    git(git_repo, "checkout", "-q", "-b", "feature")
+    git(git_repo, "checkout", "-q", "-b", "other", "main~1")
+    git(git_repo, "branch", "-f", "main", shas[2])
+    # Lots of branches should not end up on the git command line
+    updates = "".join(f"create refs/heads/old-{i} {shas[3]}\n" for i in range(5000))
+    subprocess.run(
+        [asfyaml.dataobjects.GIT_CMD, f"--git-dir={git_repo.path}", "update-ref", "--stdin"],
+        input=updates,
+        text=True,
+        check=True,
+    )
+
+    loads = []
+    load = asfyaml.dataobjects.RefSnapshot.load
+    monkeypatch.setattr(asfyaml.dataobjects.RefSnapshot, "load", lambda path: loads.append(1) or load(path))
+    git_repo._reflog = f"{ZERO_SHA} {shas[0]} refs/heads/feature\n{ZERO_SHA} {shas[1]} refs/heads/other\n"
+    feature, other = git_repo.changesets
+    assert [commit.sha for commit in feature.commits] == shas[:1]
+    assert [commit.sha for commit in other.commits] == []  # Reachable from feature
+    assert [commit.sha for commit in feature.commits_touching(["file4.txt"])] == shas[:1]
+    assert len(loads) == 1, "The refs should only be listed once per push"
+    assert sorted(git_repo.refs.branch_heads(exclude="refs/heads/feature")) == sorted(shas[1:4])
+
+
+def test_iter_commits(git_repo: asfyaml.dataobjects.Repository, monkeypatch):
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    changeset = make_changeset(git_repo, shas[4], shas[0])
+    assert [commit.sha for commit in changeset.iter_commits(limit=2)] == shas[:2]
+    assert [commit.sha for commit in changeset.iter_commits(reverse=True)] == shas[3::-1]
+    assert [commit.sha for commit in changeset.iter_commits(limit=2, reverse=True)] == [shas[1], shas[0]]
+
+    commits = list(changeset.iter_commits(fields=("subject", "committer_uname")))
+    assert set(loaded_fields(commits[0])) >= {"subject", "committer_email", "committer_uname", "committer_domain"}
+    assert "body" not in loaded_fields(commits[0]) and "stats" not in loaded_fields(commits[0])
+    assert commits[0].subject == "Commit 4"
+    assert commits[0].committer_domain == "apache.org"
+
+    # Fields that were left out are loaded when first used
+    shows = []
+    gitcmd = asfyaml.dataobjects.gitcmd
+    monkeypatch.setattr(asfyaml.dataobjects, "gitcmd", lambda *args: shows.append(args) or gitcmd(*args))
+    assert commits[0].body == "Commit 4\n\nBody of commit 4\n\nWith two paragraphs.\n"
+    assert "file4.txt | 5 +++++" in commits[0].stats
+    assert loaded_fields(commits[0]) == loaded_fields(asfyaml.dataobjects.Commit(changeset, shas[0]))
+    assert len(shows) == 2
+    with pytest.raises(AttributeError):
+        commits[1].no_such_field
+    assert len(shows) == 2
+
+    with pytest.raises(ValueError):
+        list(changeset.iter_commits(fields=("subject", "colour")))
+
+
+def test_git_runs_outside_repository(git_repo: asfyaml.dataobjects.Repository, tmp_path_factory, monkeypatch):
+    # The daemon and the deferred worker never change into the repository they process
+    monkeypatch.chdir(tmp_path_factory.mktemp("elsewhere"))
+    shas = git(git_repo, "rev-list", "main").splitlines()
+    git_repo._reflog = f"{shas[4]} {shas[0]} refs/heads/main\n"
+    (changeset,) = git_repo.changesets
+    assert [commit.sha for commit in changeset.commits] == shas[:4]
+    assert [commit.sha for commit in changeset.commits_touching([".asf.yaml"])] == [shas[1]]
+    assert changeset.commits_with_files()[0].files == ["file4.txt"]
+    assert changeset.merge_base == shas[4] and not changeset.is_rewrite
+
+    commit = next(changeset.iter_commits(fields=("subject",)))
+    assert "file4.txt | 5 +++++" in commit.stats  # Loaded on its own, with git show
+    assert commit.diff("file4.txt").startswith("diff --git a/file4.txt b/file4.txt\n")
+
+    new_branch = make_changeset(git_repo, ZERO_SHA, shas[0], name="refs/heads/feature")
+    assert list(new_branch.commits) == []  # Everything is on main already
@@ -0,0 +1,131 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for deferring .asf.yaml runs to a job queue"""
+
+import subprocess
+
+import pytest
+
+import asfyaml.asfyaml
+import asfyaml.dataobjects
+import asfyaml.deferred
+
+TEST_ENV = "deferredtest"
+runs: list[tuple[str, str]] = []
+
+
+class ASFRecordingFeature(asfyaml.asfyaml.ASFYamlFeature, name="recording", env=TEST_ENV):
+    def run(self):
+        runs.append((self.yaml.value, self.instance.environment.repo_name))
+        if self.yaml.value == "fail":
+            raise Exception("Failing as requested")
+
+
+class ASFCommitListFeature(asfyaml.asfyaml.ASFYamlFeature, name="commitlist", env=TEST_ENV):
+    def run(self):
+        for changeset in self.repository.changesets:
+            runs.extend((commit.subject, changeset.name) for commit in changeset.commits)
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(asfyaml.deferred, "BACKOFF_BASE", 0)
+    runs.clear()
+    return asfyaml.deferred.JobQueue(str(tmp_path.joinpath("deferred.sqlite")))
+
+
+def defer_yaml(repo: asfyaml.dataobjects.Repository, queue: asfyaml.deferred.JobQueue, value: str) -> int | None:
+    a = asfyaml.asfyaml.ASFYamlInstance(
+        repo=repo,
+        committer="humbedooh",
+        config_data=f"meta:\n  environment: {TEST_ENV}\nrecording:\n  value: {value}\n",
+        branch=asfyaml.dataobjects.DEFAULT_BRANCH,
+    )
+    return a.defer_parts(queue)
+
+
+def test_deferred_run(test_repo: asfyaml.dataobjects.Repository, queue: asfyaml.deferred.JobQueue, capsys):
+    defer_yaml(test_repo, queue, "first")
+    defer_yaml(test_repo, queue, "second")
+    assert "has been queued for applying" in capsys.readouterr().out
+    assert runs == [], "Expected nothing to run until the worker picks up the jobs"
+    assert queue.counts() == {"queued": 2}
+
+    asfyaml.deferred.work(queue, once=True)
+    # Jobs run in order, in the hook environment they were queued from
+    assert runs == [("first", "whimsy-site"), ("second", "whimsy-site")]
+    assert queue.counts() == {}
+
+
+def test_invalid_not_queued(test_repo: asfyaml.dataobjects.Repository, queue: asfyaml.deferred.JobQueue):
+    a = asfyaml.asfyaml.ASFYamlInstance(
+        repo=test_repo,
+        committer="humbedooh",
+        config_data="staging:\n  blorp: foo\n",
+        branch=asfyaml.dataobjects.DEFAULT_BRANCH,
+    )
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException):
+        a.defer_parts(queue)
+    assert queue.counts() == {}
+
+
+def test_retries(test_repo: asfyaml.dataobjects.Repository, queue: asfyaml.deferred.JobQueue, monkeypatch):
+    monkeypatch.setattr(asfyaml.deferred, "MAX_ATTEMPTS", 3)
+    defer_yaml(test_repo, queue, "fail")
+    asfyaml.deferred.work(queue, once=True)
+    assert len(runs) == 3
+    assert queue.counts() == {"failed": 1}
+
+
+def test_one_job_per_repository(test_repo: asfyaml.dataobjects.Repository, queue: asfyaml.deferred.JobQueue):
+    first = defer_yaml(test_repo, queue, "first")
+    defer_yaml(test_repo, queue, "second")
+    queue.put({"repo": "/x1/repos/asf/other.git"})
+    claimed = queue.claim()
+    assert claimed is not None and claimed[0] == first
+    # The second job for the same repository has to wait for the first one, but other repositories do not
+    claimed = queue.claim()
+    assert claimed is not None and claimed[1] == {"repo": "/x1/repos/asf/other.git"}
+    assert queue.claim() is None
+
+
+def test_worker_reads_commits(tmp_path, queue: asfyaml.deferred.JobQueue, monkeypatch):
+    # The worker does not change into the repository, so git has to be pointed at it
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "Jane Doe")
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "jane@example.org")
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "Humbedooh")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "humbedooh@apache.org")
+    work_tree = tmp_path.joinpath("work")
+    subprocess.run(["git", "init", "-q", "-b", "main", str(work_tree)], check=True)
+    for subject in ("First commit", "Second commit"):
+        subprocess.run(["git", "-C", str(work_tree), "commit", "-q", "--allow-empty", "-m", subject], check=True)
+    repo_path = tmp_path.joinpath("whimsy-site.git")
+    subprocess.run(["git", "clone", "-q", "--bare", str(work_tree), str(repo_path)], check=True)
+    shas = subprocess.check_output(["git", f"--git-dir={repo_path}", "rev-list", "main"], text=True).split()
+
+    repo = asfyaml.dataobjects.Repository(str(repo_path), reflog=f"{shas[1]} {shas[0]} refs/heads/main\n")
+    a = asfyaml.asfyaml.ASFYamlInstance(
+        repo=repo,
+        committer="humbedooh",
+        config_data=f"meta:\n  environment: {TEST_ENV}\ncommitlist:\n  enabled: true\n",
+        branch=asfyaml.dataobjects.DEFAULT_BRANCH,
+    )
+    a.defer_parts(queue)
+    asfyaml.deferred.work(queue, once=True)
+    assert runs == [("Second commit", "refs/heads/main")]
+    assert queue.counts() == {}
@@ -0,0 +1,35 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for the .asf.yaml feature registry"""
+
+import pkgutil
+
+import asfyaml.asfyaml
+import asfyaml.feature
+
+
+def test_all_features_registered():
+    """Every feature module should be registered, and every registered name should provide a feature"""
+    feature_modules = {module.name for module in pkgutil.iter_modules(asfyaml.feature.__path__)}
+    assert feature_modules == set(asfyaml.feature.FEATURE_MODULES.values())
+
+    asfyaml.feature.load_all_features()
+    known_features = {feature.name: feature for feature in asfyaml.asfyaml.ASFYamlFeature.features}
+    for name, module_name in asfyaml.feature.FEATURE_MODULES.items():
+        assert name in known_features, f"No feature named '{name}' found in {module_name}"
+        assert known_features[name].__module__ == f"asfyaml.feature.{module_name}"
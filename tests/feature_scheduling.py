@@ -0,0 +1,146 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for running .asf.yaml features by priority and dependencies, in parallel"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import asfyaml.asfyaml
+import asfyaml.dataobjects
+
+
+TEST_ENV = "schedulingtest"
+events: list[str] = []
+barrier = threading.Barrier(2, timeout=5)
+
+
+class ASFParallelOneFeature(asfyaml.asfyaml.ASFYamlFeature, name="parallel_one", env=TEST_ENV, priority=4):
+    def run(self):
+        barrier.wait()  # Only passes if parallel_two runs at the same time
+        events.append(self.name)
+
+
+class ASFParallelTwoFeature(asfyaml.asfyaml.ASFYamlFeature, name="parallel_two", env=TEST_ENV, priority=4):
+    def run(self):
+        barrier.wait()
+        events.append(self.name)
+
+
+class ASFSlowFeature(asfyaml.asfyaml.ASFYamlFeature, name="slow", env=TEST_ENV):
+    def run(self):
+        time.sleep(0.2)
+        events.append(self.name)
+
+
+class ASFDependentFeature(asfyaml.asfyaml.ASFYamlFeature, name="dependent", env=TEST_ENV, depends_on=("slow",)):
+    def run(self):
+        events.append(self.name)
+
+
+class ASFLateFeature(asfyaml.asfyaml.ASFYamlFeature, name="late", env=TEST_ENV, priority=9):
+    def run(self):
+        events.append(self.name)
+
+
+class ASFFailingFeature(asfyaml.asfyaml.ASFYamlFeature, name="failing", env=TEST_ENV):
+    def run(self):
+        raise Exception("This feature always fails")
+
+
+class ASFCircularFeature(asfyaml.asfyaml.ASFYamlFeature, name="circular", env=TEST_ENV, depends_on=("circular2",)):
+    def run(self):
+        pass
+
+
+class ASFCircular2Feature(asfyaml.asfyaml.ASFYamlFeature, name="circular2", env=TEST_ENV, depends_on=("circular",)):
+    def run(self):
+        pass
+
+
+class ASFWaitingFeature(asfyaml.asfyaml.ASFYamlFeature, name="waiting", env=TEST_ENV):
+    def run(self):
+        raise Exception("Only runs asynchronously")
+
+    async def arun(self):
+        await asyncio.wait_for(signal.wait(), timeout=5)  # Only passes if signalling runs at the same time
+        events.append(self.name)
+
+
+class ASFSignallingFeature(asfyaml.asfyaml.ASFYamlFeature, name="signalling", env=TEST_ENV):
+    def run(self):
+        raise Exception("Only runs asynchronously")
+
+    async def arun(self):
+        print("Signalling")
+        signal.set()
+        events.append(self.name)
+
+
+signal = asyncio.Event()
+
+
+def make_instance(repo: asfyaml.dataobjects.Repository, features: list[str]) -> asfyaml.asfyaml.ASFYamlInstance:
+    events.clear()
+    config = f"meta:\n  environment: {TEST_ENV}\n" + "".join(f"{name}:\n  foo: bar\n" for name in features)
+    return asfyaml.asfyaml.ASFYamlInstance(
+        repo=repo, committer="humbedooh", config_data=config, branch=asfyaml.dataobjects.DEFAULT_BRANCH
+    )
+
+
+def run_yaml(repo: asfyaml.dataobjects.Repository, features: list[str]):
+    make_instance(repo, features).run_parts()
+
+
+def test_scheduling(test_repo: asfyaml.dataobjects.Repository):
+    # Listed in the opposite order of how they must run
+    run_yaml(test_repo, ["late", "dependent", "slow", "parallel_two", "parallel_one"])
+    assert sorted(events[:2]) == ["parallel_one", "parallel_two"]
+    assert events[2:] == ["slow", "dependent", "late"]
+
+
+def test_failure(test_repo: asfyaml.dataobjects.Repository):
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException, match="This feature always fails") as e:
+        run_yaml(test_repo, ["failing", "slow", "late"])
+    assert e.value.feature == "failing"
+    assert events == ["slow"], "Expected features of the same priority to finish, but no later features to run"
+
+
+def test_circular_dependencies(test_repo: asfyaml.dataobjects.Repository):
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException, match="circular feature dependencies"):
+        run_yaml(test_repo, ["circular", "circular2"])
+
+
+@pytest.mark.asyncio
+async def test_scheduling_async(test_repo: asfyaml.dataobjects.Repository, capsys):
+    signal.clear()
+    # Synchronous features run in worker threads, while the others share the event loop.
+    await make_instance(test_repo, ["late", "waiting", "signalling", "dependent", "slow"]).run_parts_async()
+    assert sorted(events[:2]) == ["signalling", "waiting"]
+    assert events[2:] == ["slow", "dependent", "late"]
+    assert "Signalling" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_failure_async(test_repo: asfyaml.dataobjects.Repository):
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException, match="This feature always fails") as e:
+        await make_instance(test_repo, ["failing", "slow", "late"]).run_parts_async()
+    assert e.value.feature == "failing"
+    assert events == ["slow"]
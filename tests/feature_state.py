@@ -0,0 +1,114 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for skipping idempotent features whose configuration has not changed"""
+
+import pytest
+
+import asfyaml.asfyaml
+import asfyaml.dataobjects
+
+TEST_ENV = "statetest"
+runs: list[str] = []
+
+
+class ASFIdempotentFeature(asfyaml.asfyaml.ASFYamlFeature, name="idempotent", env=TEST_ENV):
+    idempotent = True
+
+    def run(self):
+        runs.append(self.name)
+        if self.yaml.get("fail"):
+            raise Exception("Failing as requested")
+
+
+class ASFRegularFeature(asfyaml.asfyaml.ASFYamlFeature, name="regular", env=TEST_ENV):
+    def run(self):
+        runs.append(self.name)
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(asfyaml.asfyaml, "FEATURE_STATE_DIR", str(tmp_path))
+    runs.clear()
+    return tmp_path
+
+
+def run_yaml(
+    repo: asfyaml.dataobjects.Repository,
+    config: str,
+    branch: str = asfyaml.dataobjects.DEFAULT_BRANCH,
+    meta: str = f"{{environment: {TEST_ENV}}}",
+    noop: bool = False,
+):
+    a = asfyaml.asfyaml.ASFYamlInstance(
+        repo=repo, committer="humbedooh", config_data=f"meta: {meta}\n{config}", branch=branch
+    )
+    if noop:
+        a.environments_enabled.add("noop")
+    a.run_parts()
+
+
+def test_unchanged_skipped(test_repo: asfyaml.dataobjects.Repository, state_dir):
+    config = "idempotent:\n  foo: bar\nregular:\n  foo: bar\n"
+    run_yaml(test_repo, config)
+    run_yaml(test_repo, config)
+    assert runs == ["idempotent", "regular", "regular"]
+
+    # Changing the configuration, or running on another branch, runs the feature again
+    run_yaml(test_repo, "idempotent:\n  foo: baz\n")
+    run_yaml(test_repo, "idempotent:\n  foo: baz\n", branch="refs/heads/other")
+    assert runs[3:] == ["idempotent", "idempotent"]
+
+
+@pytest.mark.parametrize(
+    "meta",
+    [
+        f"{{environment: {TEST_ENV}, cache: false}}",
+        f"{{environments: [{TEST_ENV}], cache: false}}",
+        f"\n  cache: no\n  environment: {TEST_ENV}",
+    ],
+)
+def test_no_cache(test_repo: asfyaml.dataobjects.Repository, state_dir, meta):
+    run_yaml(test_repo, "idempotent:\n  foo: bar\n")
+    run_yaml(test_repo, "idempotent:\n  foo: bar\n", meta=meta)
+    assert runs == ["idempotent", "idempotent"]
+
+
+def test_cache_true(test_repo: asfyaml.dataobjects.Repository, state_dir):
+    run_yaml(test_repo, "idempotent:\n  foo: bar\n")
+    run_yaml(test_repo, "idempotent:\n  foo: bar\n", meta=f"{{environment: {TEST_ENV}, cache: true}}")
+    assert runs == ["idempotent"]
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException, match="boolean"):
+        run_yaml(test_repo, "idempotent:\n  foo: bar\n", meta=f"{{environment: {TEST_ENV}, cache: sometimes}}")
+
+
+def test_not_recorded(test_repo: asfyaml.dataobjects.Repository, state_dir):
+    # Neither failed runs nor noop runs count as having applied the configuration
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException):
+        run_yaml(test_repo, "idempotent:\n  fail: yes\n")
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException):
+        run_yaml(test_repo, "idempotent:\n  fail: yes\n")
+    run_yaml(test_repo, "idempotent:\n  foo: bar\n", noop=True)
+    run_yaml(test_repo, "idempotent:\n  foo: bar\n")
+    assert runs == ["idempotent"] * 4
+
+
+def test_removed_feature_forgotten(test_repo: asfyaml.dataobjects.Repository, state_dir):
+    run_yaml(test_repo, "idempotent:\n  foo: bar\n")
+    run_yaml(test_repo, "regular:\n  foo: bar\n")
+    run_yaml(test_repo, "idempotent:\n  foo: bar\n")
+    assert runs == ["idempotent", "regular", "idempotent"]
@@ -23,16 +23,16 @@ from typing import Any
 
 import asfyaml.asfyaml
 import asfyaml.dataobjects
+from asfyaml.feature.github.plan import Plan
+from asfyaml.feature.github.snapshot import RepoSnapshot
 from asfyaml.feature.github.copilot_code_review import (
     RULESET_NAME,
     _build_copilot_ruleset_payload,
-    copilot_code_review,
+    copilot_code_review as copilot_code_review_directive,
 )
+from asfyaml.feature.github.rulesets import rulesets as rulesets_directive
 from helpers import YamlTest
 
-# Set .asf.yaml to debug mode
-asfyaml.asfyaml.DEBUG = True
-
 
 valid_copilot_code_review = YamlTest(
     None,
@@ -66,6 +66,9 @@ class FakeRequester:
     def requestJson(self, method: str, url: str, input: dict[str, Any] | None = None):  # noqa: N802
         self.calls.append({"method": method, "url": url, "input": input})
         match method:
+            case "GET" if not url.endswith("/rulesets"):
+                ruleset_id = int(url.rsplit("/", 1)[1])
+                return 200, {}, json.dumps(next(r for r in self.rulesets if r["id"] == ruleset_id))
             case "GET":
                 return 200, {}, json.dumps(self.rulesets)
             case "POST":
@@ -89,6 +92,8 @@ class FakeFeature:
         self.previous_yaml = previous_yaml
         self.repository = SimpleNamespace(org_id="apache", name="infrastructure-asfyaml")
         self.ghrepo = SimpleNamespace(_requester=requester)
+        self.snapshot = RepoSnapshot(self.ghrepo, "apache", "infrastructure-asfyaml", prefetch=False)
+        self.plan = Plan()
         self._noop_enabled = noop_enabled
 
     def noop(self, directive: str) -> bool:
@@ -98,6 +103,12 @@ class FakeFeature:
         return False
 
 
+def copilot_code_review(feature: FakeFeature):
+    """Runs the copilot_code_review directive, then makes the changes it planned"""
+    copilot_code_review_directive(feature)
+    feature.plan.apply()
+
+
 def test_basic_yaml(test_repo: asfyaml.dataobjects.Repository):
     print("[github] Testing copilot code review")
 
@@ -148,9 +159,25 @@ def test_enable_copilot_code_review_updates_existing_ruleset():
 
     copilot_code_review(feature)
 
-    assert [call["method"] for call in requester.calls] == ["GET", "PUT"]
-    assert requester.calls[1]["url"] == "/repos/apache/infrastructure-asfyaml/rulesets/73"
-    assert requester.calls[1]["input"] == _build_copilot_ruleset_payload(True, False)
+    assert [call["method"] for call in requester.calls] == ["GET", "GET", "PUT"]
+    assert requester.calls[2]["url"] == "/repos/apache/infrastructure-asfyaml/rulesets/73"
+    assert requester.calls[2]["input"] == {**_build_copilot_ruleset_payload(True, False), "bypass_actors": []}
+
+
+def test_copilot_code_review_moved_from_rulesets():
+    # The ruleset was managed through rulesets before, and is deleted there, so it has to be created anew
+    existing_rulesets = [{"id": 73, "name": RULESET_NAME, "rules": []}]
+    requester = FakeRequester(rulesets=existing_rulesets)
+    feature = FakeFeature(
+        yaml={"copilot_code_review": {"enabled": True}},
+        previous_yaml={"rulesets": [{"name": RULESET_NAME}]},
+        requester=requester,
+    )
+
+    rulesets_directive(feature)
+    copilot_code_review(feature)
+
+    assert [call["method"] for call in requester.calls] == ["GET", "DELETE", "POST"]
 
 
 def test_disable_copilot_code_review_deletes_existing_ruleset():
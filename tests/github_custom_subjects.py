@@ -21,9 +21,6 @@ from helpers import YamlTest
 import asfyaml.asfyaml
 import asfyaml.dataobjects
 
-# Set .asf.yaml to debug mode
-asfyaml.asfyaml.DEBUG = True
-
 
 valid_custom_subjects = YamlTest(
     None,
@@ -17,13 +17,16 @@
 
 """Unit tests for .asf.yaml GitHub Deployment Environments feature"""
 import re
+from types import SimpleNamespace
+
+from github.EnvironmentDeploymentBranchPolicy import EnvironmentDeploymentBranchPolicyParams
+from github.EnvironmentProtectionRuleReviewer import ReviewerParams
 
 import asfyaml.asfyaml
 import asfyaml.dataobjects
+from asfyaml.feature.github.deployment_environments import _environment_matches
 from helpers import YamlTest
 
-# Set .asf.yaml to debug mode
-asfyaml.asfyaml.DEBUG = True
 
 valid_github_deployment_environments = YamlTest(
     None,
@@ -117,3 +120,26 @@ def test_basic_yaml(test_repo: asfyaml.dataobjects.Repository):
             a.environments_enabled.add("noop")
             a.no_cache = True
             a.run_parts()
+
+
+def test_environment_matches():
+    live = SimpleNamespace(
+        protection_rules=[
+            SimpleNamespace(type="wait_timer", wait_timer=30),
+            SimpleNamespace(
+                type="required_reviewers",
+                prevent_self_review=True,
+                reviewers=[SimpleNamespace(type="Team", reviewer=SimpleNamespace(id=1234))],
+            ),
+        ],
+        deployment_branch_policy=SimpleNamespace(protected_branches=True, custom_branch_policies=False),
+    )
+    reviewers = [ReviewerParams(type_="Team", id_=1234)]
+    policy = EnvironmentDeploymentBranchPolicyParams(protected_branches=True)
+
+    assert _environment_matches(live, 30, reviewers, True, policy)
+    assert not _environment_matches(None, 30, reviewers, True, policy)
+    assert not _environment_matches(live, 0, reviewers, True, policy)
+    assert not _environment_matches(live, 30, [], True, policy)
+    assert not _environment_matches(live, 30, reviewers, False, policy)
+    assert not _environment_matches(live, 30, reviewers, True, None)
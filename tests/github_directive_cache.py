@@ -0,0 +1,91 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for only running the GitHub directives whose settings changed"""
+
+from types import SimpleNamespace
+
+import asfyaml.asfyaml
+import asfyaml.dataobjects
+import asfyaml.feature.github
+from asfyaml.feature.github import directive_fingerprint, directives_to_run
+
+CONFIG = """
+github:
+    description: Apache Whimsy
+    labels:
+      - whimsy
+      - ruby
+"""
+
+
+def run_github(test_repo: asfyaml.dataobjects.Repository, config: str):
+    a = asfyaml.asfyaml.ASFYamlInstance(test_repo, "humbedooh", config, asfyaml.dataobjects.DEFAULT_BRANCH)
+    a.environments_enabled.add("noop")
+    a.run_parts()
+
+
+def test_fingerprints():
+    config = {"labels": ["whimsy"], "description": "Apache Whimsy"}
+    fingerprint = directive_fingerprint("set_labels", config)
+    assert directive_fingerprint("set_labels", {**config, "description": "Whimsy"}) == fingerprint
+    assert directive_fingerprint("set_labels", {**config, "labels": ["ruby"]}) != fingerprint
+
+
+def test_extra_inputs():
+    def make_feature(targets: dict):
+        notifications = SimpleNamespace(valid_targets=targets)
+        return SimpleNamespace(instance=SimpleNamespace(features=SimpleNamespace(notifications=notifications)))
+
+    config = {"features": {"discussions": True}}
+    target = {"discussions": "dev@whimsical.apache.org"}
+    fingerprint = directive_fingerprint("config_features", config, make_feature(target))
+    assert directive_fingerprint("config_features", config, make_feature({**target, "commits": "x"})) == fingerprint
+    # Removing the mailing list target for discussions has to run the check again, even if the features did not change
+    assert directive_fingerprint("config_features", config, make_feature({})) != fingerprint
+
+
+def test_coupled_directives():
+    fingerprints = {"set_labels": "a", "rulesets": "b", "copilot_code_review": "c"}
+    assert directives_to_run(fingerprints, fingerprints) == set()
+    assert directives_to_run(fingerprints, {**fingerprints, "set_labels": "x"}) == {"set_labels"}
+    # Changing either of rulesets and copilot_code_review runs both
+    assert directives_to_run(fingerprints, {**fingerprints, "rulesets": "x"}) == {"rulesets", "copilot_code_review"}
+    assert directives_to_run(fingerprints, {**fingerprints, "copilot_code_review": "x"}) == {
+        "rulesets",
+        "copilot_code_review",
+    }
+    assert directives_to_run(fingerprints, {}) == set(fingerprints)
+
+
+def test_only_changed_directives_run(test_repo: asfyaml.dataobjects.Repository, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(asfyaml.feature.github, "BASE_CACHE_PATH", str(tmp_path))
+
+    run_github(test_repo, CONFIG)
+    output = capsys.readouterr().out
+    assert "[github::labels]" in output and "[github::description]" in output
+    assert tmp_path.joinpath(f"ghsettings.{test_repo.name}.fingerprints.json").exists()
+
+    # Nothing changed, so nothing runs
+    run_github(test_repo, CONFIG)
+    assert "[github::" not in capsys.readouterr().out
+
+    # Only the labels changed
+    run_github(test_repo, CONFIG.replace("ruby", "rails"))
+    output = capsys.readouterr().out
+    assert "Only running directives with changed settings: set_labels" in output
+    assert "[github::labels]" in output and "[github::description]" not in output
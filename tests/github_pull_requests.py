@@ -21,9 +21,6 @@ from helpers import YamlTest
 import asfyaml.asfyaml
 import asfyaml.dataobjects
 
-# Set .asf.yaml to debug mode
-asfyaml.asfyaml.DEBUG = True
-
 
 legacy_setting = YamlTest(
     None,
@@ -0,0 +1,169 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for sending the GitHub repository settings of all directives in one request"""
+
+import github
+import pytest
+
+import asfyaml.asfyaml
+import asfyaml.dataobjects
+import asfyaml.feature.github
+
+CONFIG = """
+github:
+    description: Apache Whimsy
+    homepage: https://whimsical.apache.org/
+    features:
+      issues: true
+      wiki: false
+    enabled_merge_buttons:
+      squash: true
+      merge: false
+      rebase: false
+    pull_requests:
+      del_branch_on_merge: true
+"""
+
+
+class FakeRequester:
+    """Answers the GraphQL query of the snapshot with the given live repository settings"""
+
+    def __init__(self, live: dict):
+        self.live = live
+
+    def graphql_query(self, query: str, variables: dict):
+        connection = {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}
+        fields = ("repositoryTopics", "refs", "branchProtectionRules", "rulesets", "environments")
+        return {}, {"data": {"repository": {**self.live, **dict.fromkeys(fields, connection)}}}
+
+
+class FakeRepo:
+    url = "/repos/apache/whimsy-site"
+
+    def __init__(self, rejected: set[str] | None = None, live: dict | None = None):
+        self.rejected = rejected or set()
+        self.edits: list[dict] = []
+        self._requester = FakeRequester(live or {})
+
+    def edit(self, **settings):
+        self.edits.append(settings)
+        if self.rejected & set(settings):
+            raise github.GithubException(422, {"message": "Validation Failed"})
+
+
+class FakeGithub:
+    repo = FakeRepo()
+
+    def __init__(self, auth=None):
+        pass
+
+    def withLazy(self, lazy):  # noqa: N802
+        return self
+
+    def get_repo(self, name):
+        return FakeGithub.repo
+
+
+@pytest.fixture
+def run_github(tmp_path, monkeypatch):
+    """Runs the github feature against a fake GitHub repository"""
+    monkeypatch.setenv("GH_TOKEN", "fake-token")
+    monkeypatch.setattr(asfyaml.feature.github.pygithub, "Github", FakeGithub)
+    repo_path = tmp_path.joinpath("whimsy-site.git")
+    repo_path.mkdir()
+
+    def run(fake_repo: FakeRepo, noop: bool = False):
+        FakeGithub.repo = fake_repo
+        repo = asfyaml.dataobjects.Repository(str(repo_path))
+        environ = {"PATH_INFO": "whimsy-site.git", "GIT_PROJECT_ROOT": str(tmp_path)}
+        a = asfyaml.asfyaml.ASFYamlInstance(
+            repo, "humbedooh", CONFIG, asfyaml.dataobjects.DEFAULT_BRANCH, environ=environ
+        )
+        if noop:
+            a.environments_enabled.add("noop")
+        a.no_cache = True
+        a.run_parts()
+
+    return run
+
+
+def test_single_edit(run_github):
+    fake_repo = FakeRepo()
+    run_github(fake_repo)
+    assert fake_repo.edits == [
+        {
+            "description": "Apache Whimsy",
+            "homepage": "https://whimsical.apache.org/",
+            "has_issues": True,
+            "has_wiki": False,
+            "has_projects": False,
+            "has_discussions": False,
+            "allow_squash_merge": True,
+            "allow_merge_commit": False,
+            "allow_rebase_merge": False,
+            "delete_branch_on_merge": True,
+        }
+    ]
+
+
+def test_noop(run_github):
+    fake_repo = FakeRepo()
+    run_github(fake_repo, noop=True)
+    assert fake_repo.edits == []
+
+
+def test_error_attribution(run_github):
+    fake_repo = FakeRepo(rejected={"allow_rebase_merge"})
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException, match="enabled_merge_buttons: could not update") as e:
+        run_github(fake_repo)
+    assert "homepage" not in str(e.value)
+    # After the combined request failed, each directive's settings were sent on their own
+    assert len(fake_repo.edits) == 6
+
+
+def test_conflicting_settings():
+    feature = object.__new__(asfyaml.feature.github.ASFGitHubFeature)
+    feature._repo_edits = {}
+    feature.edit_repo("pull_requests", delete_branch_on_merge=True, allow_auto_merge=github.GithubObject.NotSet)
+    assert feature._repo_edits == {"pull_requests": {"delete_branch_on_merge": True}}
+    feature.edit_repo("legacy", delete_branch_on_merge=True)
+    with pytest.raises(Exception, match="'delete_branch_on_merge' is also set by pull_requests"):
+        feature.edit_repo("other", delete_branch_on_merge=False)
+
+
+def test_unchanged_settings_are_not_sent(run_github, capsys):
+    live = {
+        "description": "Apache Whimsy",
+        "homepageUrl": "https://whimsical.apache.org/",
+        "hasIssuesEnabled": True,
+        "hasWikiEnabled": False,
+        "hasProjectsEnabled": False,
+        "hasDiscussionsEnabled": False,
+        "squashMergeAllowed": True,
+        "mergeCommitAllowed": False,
+        "rebaseMergeAllowed": True,
+        "deleteBranchOnMerge": True,
+    }
+    fake_repo = FakeRepo(live=live)
+    run_github(fake_repo)
+    assert fake_repo.edits == [{"allow_rebase_merge": False}]
+    assert "[edit_repo] Update repository settings: allow_rebase_merge=False" in capsys.readouterr().out
+
+    fake_repo = FakeRepo(live={**live, "rebaseMergeAllowed": False})
+    run_github(fake_repo)
+    assert fake_repo.edits == []
@@ -23,14 +23,13 @@ from typing import Any
 
 import asfyaml.asfyaml
 import asfyaml.dataobjects
+from asfyaml.feature.github.plan import Plan
+from asfyaml.feature.github.snapshot import RepoSnapshot
 import pytest
 from github import UnknownObjectException
-from asfyaml.feature.github.rulesets import COPILOT_RULESET_NAME, rulesets as configure_rulesets
+from asfyaml.feature.github.rulesets import COPILOT_RULESET_NAME, rulesets as rulesets_directive
 from helpers import YamlTest
 
-# Set .asf.yaml to debug mode
-asfyaml.asfyaml.DEBUG = True
-
 
 valid_rulesets = YamlTest(
     None,
@@ -146,6 +145,9 @@ class FakeRequester:
         self.calls.append({"method": method, "url": url, "input": input})
         error_body = json.dumps({"message": "Validation Failed", "errors": [{"field": "rules", "code": "invalid"}]})
         match method:
+            case "GET" if not url.endswith("/rulesets"):
+                ruleset_id = int(url.rsplit("/", 1)[1])
+                return 200, {}, json.dumps(next(r for r in self.rulesets if r["id"] == ruleset_id))
             case "GET":
                 return self.list_status, {}, json.dumps(self.rulesets)
             case "POST":
@@ -172,6 +174,8 @@ class FakeFeature:
         self.previous_yaml = previous_yaml
         self.repository = SimpleNamespace(org_id="apache", name="infrastructure-asfyaml")
         self.ghrepo = SimpleNamespace(_requester=requester)
+        self.snapshot = RepoSnapshot(self.ghrepo, "apache", "infrastructure-asfyaml", prefetch=False)
+        self.plan = Plan()
         self.gh = gh
         self._noop_enabled = noop_enabled
         self.instance = SimpleNamespace(environments_enabled={"production", "github_rulesets"})
@@ -183,6 +187,12 @@ class FakeFeature:
         return False
 
 
+def configure_rulesets(feature: FakeFeature):
+    """Runs the rulesets directive, then makes the changes it planned"""
+    rulesets_directive(feature)
+    feature.plan.apply()
+
+
 def test_basic_yaml(test_repo: asfyaml.dataobjects.Repository):
     print("[github] Testing rulesets")
 
@@ -714,9 +724,52 @@ def test_rulesets_update_existing_ruleset():
 
     configure_rulesets(feature)
 
-    assert [call["method"] for call in requester.calls] == ["GET", "PUT"]
+    assert [call["method"] for call in requester.calls] == ["GET", "GET", "PUT"]
     assert requester.calls[1]["url"] == "/repos/apache/infrastructure-asfyaml/rulesets/22"
-    assert requester.calls[1]["input"] == payload
+    assert requester.calls[2]["url"] == "/repos/apache/infrastructure-asfyaml/rulesets/22"
+    # Without bypass actors in the configuration, any live ones are cleared
+    assert requester.calls[2]["input"] == {**payload, "bypass_actors": []}
+
+
+def test_rulesets_removed_bypass_actors_are_cleared():
+    payload = _build_ruleset_payload("Default branch checks")
+    bypass_actor = {"actor_id": 5, "actor_type": "Team", "bypass_mode": "always"}
+    live = {**payload, "id": 22, "bypass_actors": [bypass_actor]}
+    requester = FakeRequester(rulesets=[live])
+    feature = FakeFeature(
+        yaml={"rulesets": [payload]},
+        previous_yaml={"rulesets": [{**payload, "bypass_actors": [bypass_actor]}]},
+        requester=requester,
+    )
+
+    configure_rulesets(feature)
+
+    assert [call["method"] for call in requester.calls] == ["GET", "GET", "PUT"]
+    assert requester.calls[2]["input"]["bypass_actors"] == []
+
+    # Once cleared, the ruleset matches, also if GitHub leaves the empty list out
+    del live["bypass_actors"]
+    requester.calls.clear()
+    feature = FakeFeature(yaml={"rulesets": [payload]}, previous_yaml={"rulesets": [payload]}, requester=requester)
+    configure_rulesets(feature)
+    assert [call["method"] for call in requester.calls] == ["GET", "GET"]
+
+
+def test_rulesets_unchanged_ruleset_is_not_updated():
+    payload = _build_ruleset_payload("Default branch checks")
+    # GitHub returns more than was sent, such as ids and links
+    live = {**payload, "id": 22, "source": "apache/infrastructure-asfyaml", "_links": {}}
+    requester = FakeRequester(rulesets=[live])
+    feature = FakeFeature(
+        yaml={"rulesets": [payload]},
+        previous_yaml={"rulesets": [payload]},
+        requester=requester,
+    )
+
+    configure_rulesets(feature)
+
+    assert [call["method"] for call in requester.calls] == ["GET", "GET"]
+    assert len(feature.plan) == 0
 
 
 def test_rulesets_removed_section_deletes_previously_managed_rulesets():
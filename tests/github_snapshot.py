@@ -0,0 +1,229 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for the snapshot of the live state of a GitHub repository"""
+
+from types import SimpleNamespace
+from typing import Any
+
+import github
+
+from asfyaml.feature.github.branch_protection import branch_protection
+from asfyaml.feature.github.metadata import set_labels
+from asfyaml.feature.github.plan import Plan
+from asfyaml.feature.github.snapshot import RepoSnapshot
+
+PROTECTION_RULE = {
+    "pattern": "main",
+    "allowsForcePushes": False,
+    "requiresCommitSignatures": True,
+    "requiresLinearHistory": True,
+    "requiresConversationResolution": False,
+    "requiresApprovingReviews": True,
+    "requiredApprovingReviewCount": 1,
+    "requiresCodeOwnerReviews": False,
+    "dismissesStaleReviews": True,
+    "requireLastPushApproval": False,
+    "requiresStatusChecks": True,
+    "requiresStrictStatusChecks": True,
+    "requiredStatusChecks": [{"context": "ci/build", "app": None}, {"context": "ci/lint", "app": {"databaseId": 15}}],
+}
+
+
+def connection(nodes: list, cursor: str | None = None) -> dict:
+    return {"nodes": nodes, "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor}}
+
+
+class FakeRequester:
+    """Answers GraphQL queries for the snapshot, with the refs split over two pages"""
+
+    def __init__(self):
+        self.queries: list[tuple[str, dict]] = []
+
+    def graphql_query(self, query: str, variables: dict[str, Any]):
+        self.queries.append((query, variables))
+        if variables.get("refsCursor") == "page2":
+            return {}, {"data": {"repository": {"refs": connection([{"name": "dev", "branchProtectionRule": None}])}}}
+        repository = {
+            "description": "Apache Whimsy",
+            "homepageUrl": "https://whimsical.apache.org/",
+            "hasWikiEnabled": False,
+            "squashMergeAllowed": True,
+            "repositoryTopics": connection([{"topic": {"name": "ruby"}}, {"topic": {"name": "whimsy"}}]),
+            "refs": connection([{"name": "main", "branchProtectionRule": {"pattern": "main"}}], cursor="page2"),
+            "branchProtectionRules": connection([PROTECTION_RULE]),
+            "rulesets": connection(
+                [{"databaseId": 42, "name": "Default branch", "target": "BRANCH", "enforcement": "ACTIVE"}]
+            ),
+            "environments": connection([{"databaseId": 7, "name": "production"}]),
+        }
+        return {}, {"data": {"repository": repository}}
+
+
+def make_snapshot(requester: FakeRequester) -> RepoSnapshot:
+    ghrepo = SimpleNamespace(_requester=requester, url="/repos/apache/whimsy")
+    return RepoSnapshot(ghrepo, "apache", "whimsy")  # type: ignore[arg-type]
+
+
+def test_snapshot_sections():
+    requester = FakeRequester()
+    snapshot = make_snapshot(requester)
+    unused = lambda: None  # noqa: E731
+
+    assert snapshot.get("settings", unused) == {
+        "description": "Apache Whimsy",
+        "homepage": "https://whimsical.apache.org/",
+        "has_wiki": False,
+        "allow_squash_merge": True,
+    }
+    assert snapshot.get("topics", unused) == ["ruby", "whimsy"]
+    assert [ref["name"] for ref in snapshot.get("refs", unused)] == ["main", "dev"]
+    assert snapshot.get("rulesets", unused) == [
+        {"id": 42, "name": "Default branch", "target": "branch", "enforcement": "active"}
+    ]
+    assert snapshot.get("environments", unused) == ["production"]
+
+    rule = snapshot.get("protection_rules", unused)["main"]
+    assert rule.required_signatures and rule.required_linear_history and not rule.allow_force_pushes
+    assert rule.required_pull_request_reviews.required_approving_review_count == 1
+    assert rule.required_status_checks.strict
+    assert [(check.context, check.app_id) for check in rule.required_status_checks.checks] == [
+        ("ci/build", None),
+        ("ci/lint", 15),
+    ]
+
+    # One query for everything, and one more for the second page of refs only
+    assert len(requester.queries) == 2
+    query, variables = requester.queries[1]
+    assert "refs(" in query and "rulesets(" not in query and "homepageUrl" not in query
+    assert variables == {"owner": "apache", "name": "whimsy", "refsCursor": "page2"}
+
+
+def test_snapshot_rest_sections():
+    requester = FakeRequester()
+    snapshot = make_snapshot(requester)
+    loads = []
+
+    def load_autolinks():
+        loads.append("autolinks")
+        return ["INFRA-"]
+
+    assert snapshot.get("autolinks", load_autolinks) == ["INFRA-"]
+    assert snapshot.get("autolinks", load_autolinks) == ["INFRA-"]
+    assert loads == ["autolinks"]
+    assert not requester.queries  # Sections only available over REST do not need the GraphQL query
+
+    # Forgotten sections are loaded through the loader, without querying again
+    snapshot.get("rulesets", lambda: None)
+    snapshot.forget("rulesets")
+    assert snapshot.get("rulesets", lambda: [{"id": 43, "name": "New"}]) == [{"id": 43, "name": "New"}]
+    assert len(requester.queries) == 2
+
+
+def test_snapshot_without_prefetch():
+    requester = FakeRequester()
+    snapshot = RepoSnapshot(SimpleNamespace(_requester=requester), "apache", "whimsy", prefetch=False)  # type: ignore[arg-type]
+    assert snapshot.get("topics", lambda: ["from-rest"]) == ["from-rest"]
+    assert not requester.queries
+
+
+def test_snapshot_graphql_failure(capsys):
+    class FailingRequester(FakeRequester):
+        def graphql_query(self, query: str, variables: dict[str, Any]):
+            self.queries.append((query, variables))
+            error = {"type": "FORBIDDEN", "message": "Resource not accessible by integration"}
+            raise github.GithubException(400, {"errors": [error]})
+
+    class RestRepo:
+        url = "/repos/apache/whimsy"
+        topics = ["ruby", "whimsy"]
+
+        def __init__(self, requester: FakeRequester):
+            self._requester = requester
+
+        def get_topics(self):
+            return list(self.topics)
+
+        def replace_topics(self, topics: list[str]):
+            self.topics = topics
+
+    requester = FailingRequester()
+    ghrepo = RestRepo(requester)
+    feature = SimpleNamespace(
+        yaml={"labels": ["whimsy", "ruby"]},
+        ghrepo=ghrepo,
+        snapshot=RepoSnapshot(ghrepo, "apache", "whimsy"),  # type: ignore[arg-type]
+        plan=Plan(),
+        noop=lambda directive: False,
+    )
+
+    # The topics are read over REST instead, and match the configuration
+    set_labels(feature)
+    assert len(feature.plan) == 0
+    assert "falling back to REST" in capsys.readouterr().out
+
+    # Later sections go straight to their loaders, without trying GraphQL again
+    feature.yaml["labels"] = ["asf"]
+    set_labels(feature)
+    assert [change.description for change in feature.plan.changes] == ["Set topics to asf"]
+    assert feature.snapshot.get("settings", dict) == {}
+    assert len(requester.queries) == 1
+
+
+def test_branch_protection_reads_snapshot(capsys):
+    class UnusedRepo:
+        url = "/repos/apache/whimsy"
+
+        def __init__(self, requester: FakeRequester):
+            self._requester = requester
+
+        def get_branch(self, branch: str):
+            raise AssertionError(f"Branch {branch} should not be looked up")
+
+    protection = {
+        "required_signatures": True,
+        "required_linear_history": True,
+        "required_pull_request_reviews": {
+            "dismiss_stale_reviews": True,
+            "require_code_owner_reviews": False,
+            "require_last_push_approval": False,
+            "required_approving_review_count": 1,
+        },
+        "required_status_checks": {
+            "strict": True,
+            "contexts": ["ci/build"],
+            "checks": [{"context": "ci/lint", "app_id": 15}],
+        },
+    }
+    ghrepo = UnusedRepo(FakeRequester())
+    feature = SimpleNamespace(
+        yaml={"protected_branches": {"main": protection}},
+        ghrepo=ghrepo,
+        snapshot=RepoSnapshot(ghrepo, "apache", "whimsy"),  # type: ignore[arg-type]
+        plan=Plan(),
+        noop=lambda directive: False,
+    )
+    branch_protection(feature)
+
+    # The live settings of main already match, and dev is not protected, so there is nothing to change
+    assert capsys.readouterr().out == ""
+    assert len(feature.plan) == 0
+
+    protection["required_linear_history"] = False
+    branch_protection(feature)
+    assert [change.description for change in feature.plan.changes] == ["Update the protection of branch main"]
+    assert "Set required linear history to False" in capsys.readouterr().out
@@ -0,0 +1,140 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for the pre-receive fast path"""
+
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+import asfyaml.dataobjects
+import asfyaml.prereceive
+
+ZERO_SHA = "0" * 40
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+# Prints whether the YAML parser was imported, after running the hook
+HOOK_SCRIPT = """
+import sys
+import asfyaml.prereceive
+try:
+    asfyaml.prereceive.main()
+finally:
+    print("strictyaml" in sys.modules)
+"""
+
+
+def git(*args, cwd=None) -> str:
+    return subprocess.check_output([asfyaml.dataobjects.GIT_CMD, *args], cwd=cwd, universal_newlines=True).strip()
+
+
+@pytest.fixture
+def pushes(tmp_path, monkeypatch) -> dict:
+    """A bare repository, along with the shas of the commits pushed to it: a first commit with a valid .asf.yaml,
+    then one that only changes the README, one with an invalid .asf.yaml, and one that removes it"""
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "Jane Doe")
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "jane@example.org")
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "Humbedooh")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "humbedooh@apache.org")
+    work = tmp_path.joinpath("work")
+    work.mkdir()
+    git("init", "-q", "-b", "main", cwd=work)
+    shas = {}
+    steps = {
+        "valid": "jekyll:\n  whoami: main\n",
+        "readme": None,
+        "invalid": "jekyll:\n  colour: blue\n",
+        "removed": "",
+    }
+    for name, config in steps.items():
+        work.joinpath("README").write_text(f"Step {name}\n")
+        if config:
+            work.joinpath(".asf.yaml").write_text(config)
+        elif config == "":
+            work.joinpath(".asf.yaml").unlink()
+        git("add", "-A", cwd=work)
+        git("commit", "-q", "-m", f"Step {name}", cwd=work)
+        shas[name] = git("rev-parse", "HEAD", cwd=work)
+    bare = tmp_path.joinpath("whimsy-site.git")
+    git("clone", "-q", "--bare", str(work), str(bare))
+    shas["path"] = str(bare)
+    return shas
+
+
+def run_hook(repo_path: str, reflog: str) -> tuple[int, bool, str]:
+    """Runs the hook in a fresh interpreter, and returns its exit code, whether it imported the YAML parser, and
+    what it printed to stderr"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT_DIR), GIT_DIR=".")
+    rv = subprocess.run(
+        [sys.executable, "-c", HOOK_SCRIPT], input=reflog, capture_output=True, text=True, env=env, cwd=repo_path
+    )
+    return rv.returncode, rv.stdout.strip() == "True", rv.stderr
+
+
+def test_changed_configs(pushes: dict):
+    reflog = (
+        f"{pushes['valid']} {pushes['readme']} refs/heads/main\n"
+        f"{ZERO_SHA} {pushes['valid']} refs/heads/new\n"
+        f"{pushes['readme']} {pushes['invalid']} refs/heads/other\n"
+        f"{pushes['invalid']} {pushes['removed']} refs/heads/gone\n"
+        f"{ZERO_SHA} {pushes['invalid']} refs/tags/v1\n"
+        f"{pushes['invalid']} {ZERO_SHA} refs/heads/deleted\n"
+    )
+    repo = asfyaml.dataobjects.Repository(pushes["path"], reflog=reflog)
+    changed = asfyaml.prereceive.changed_configs(repo)
+    assert [changeset.name for changeset, _blob in changed] == ["refs/heads/new", "refs/heads/other"]
+    failures = asfyaml.prereceive.validate_push(repo)
+    assert [(changeset.name, feature) for changeset, feature, _error in failures] == [("refs/heads/other", "jekyll")]
+    repo.close()
+
+
+def test_hook(pushes: dict):
+    # Pushes that do not change .asf.yaml should not even load the YAML parser
+    assert run_hook(pushes["path"], f"{pushes['valid']} {pushes['readme']} refs/heads/main\n") == (0, False, "")
+
+    exit_code, parsed, _stderr = run_hook(pushes["path"], f"{ZERO_SHA} {pushes['valid']} refs/heads/main\n")
+    assert (exit_code, parsed) == (0, True)
+
+    exit_code, _parsed, stderr = run_hook(pushes["path"], f"{pushes['readme']} {pushes['invalid']} refs/heads/main\n")
+    assert exit_code == 1
+    assert "The .asf.yaml file on branch main is not valid (jekyll)" in stderr
+    assert "unexpected key not in schema 'colour'" in stderr
+
+
+@pytest.mark.parametrize(
+    "config, error",
+    [
+        ("colour: blue\n", "No such .asf.yaml feature: colour"),
+        ("jekyll:\n  whoami: [main\n", "expected ',' or ']'"),
+    ],
+)
+def test_hook_broken_config(pushes: dict, config: str, error: str):
+    # Unknown features and broken YAML get the same rejection message as any other invalid .asf.yaml
+    work = pathlib.Path(pushes["path"]).parent.joinpath("work")
+    work.joinpath(".asf.yaml").write_text(config)
+    git("add", "-A", cwd=work)
+    git("commit", "-q", "-m", "Broken .asf.yaml", cwd=work)
+    git("push", "-q", pushes["path"], "HEAD:refs/heads/broken", cwd=work)
+    exit_code, _parsed, stderr = run_hook(
+        pushes["path"], f"{pushes['removed']} {git('rev-parse', 'HEAD', cwd=work)} refs/heads/main\n"
+    )
+    assert exit_code == 1
+    assert "The .asf.yaml file on branch main is not valid (main)" in stderr
+    assert error in stderr
+    assert "Traceback" not in stderr
@@ -412,7 +412,7 @@ def test_parse_doap_downloads_then_maps(monkeypatch):
         captured["allow_redirects"] = allow_redirects
         return FakeResponse()
 
-    monkeypatch.setattr("asfyaml.feature.project.requests.get", fake_get)
+    monkeypatch.setattr("asfyaml.feature.project.transport.get", fake_get)
     metadata = _parse_doap("https://tooling.apache.org/doap.rdf")
     assert captured["url"] == "https://tooling.apache.org/doap.rdf"
     assert captured["allow_redirects"] is False
@@ -426,7 +426,7 @@ def test_parse_doap_download_failure_raises(monkeypatch):
         status_code = 404
 
     monkeypatch.setattr(
-        "asfyaml.feature.project.requests.get", lambda url, timeout=None, allow_redirects=True: FakeResponse()
+        "asfyaml.feature.project.transport.get", lambda url, timeout=None, allow_redirects=True: FakeResponse()
     )
     with pytest.raises(Exception, match="Could not download DOAP file"):
         _parse_doap("https://tooling.apache.org/missing.rdf")
@@ -439,7 +439,7 @@ def test_parse_doap_redirect_rejected(monkeypatch):
         status_code = 302
 
     monkeypatch.setattr(
-        "asfyaml.feature.project.requests.get", lambda url, timeout=None, allow_redirects=True: FakeResponse()
+        "asfyaml.feature.project.transport.get", lambda url, timeout=None, allow_redirects=True: FakeResponse()
     )
     with pytest.raises(Exception, match="returned a redirect"):
         _parse_doap("https://tooling.apache.org/moved.rdf")
@@ -449,7 +449,7 @@ def test_parse_doap_rejects_disallowed_host_before_fetching(monkeypatch):
     def explode(*args, **kwargs):
         raise AssertionError("requests.get must not be called for a disallowed host")
 
-    monkeypatch.setattr("asfyaml.feature.project.requests.get", explode)
+    monkeypatch.setattr("asfyaml.feature.project.transport.get", explode)
     with pytest.raises(Exception, match="host not allowed"):
         _parse_doap("https://evil.example.com/doap.rdf")
 
@@ -583,7 +583,7 @@ def test_exchange_token_for_jwt_posts_system_pat(monkeypatch):
         captured["json"] = json
         return FakeResponse()
 
-    monkeypatch.setattr("asfyaml.feature.project.requests.post", fake_post)
+    monkeypatch.setattr("asfyaml.feature.project.transport.post", fake_post)
     jwt = _exchange_token_for_jwt("https://atr.example", "the-system-pat")
     assert jwt == "a-short-lived-jwt"
     assert captured["url"] == "https://atr.example/api/jwt/create"
@@ -597,7 +597,7 @@ def test_exchange_token_for_jwt_failure_raises(monkeypatch):
         text = "unauthorized"
 
     monkeypatch.setattr(
-        "asfyaml.feature.project.requests.post", lambda url, json=None, timeout=None: FakeResponse()
+        "asfyaml.feature.project.transport.post", lambda url, json=None, timeout=None: FakeResponse()
     )
     with pytest.raises(Exception, match="ATR token exchange failed"):
         _exchange_token_for_jwt("https://atr.example", "bad-pat")
@@ -613,7 +613,7 @@ def test_exchange_token_for_jwt_missing_jwt_raises(monkeypatch):
             return {"asfuid": "system"}
 
     monkeypatch.setattr(
-        "asfyaml.feature.project.requests.post", lambda url, json=None, timeout=None: FakeResponse()
+        "asfyaml.feature.project.transport.post", lambda url, json=None, timeout=None: FakeResponse()
     )
     with pytest.raises(Exception, match="returned no JWT"):
         _exchange_token_for_jwt("https://atr.example", "the-system-pat")
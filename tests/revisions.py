@@ -0,0 +1,115 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for validating .asf.yaml straight from git"""
+
+import subprocess
+
+import pytest
+
+import asfyaml.dataobjects
+import asfyaml.revisions
+import asfyaml.validation_cache
+
+VALID_CONFIG = "notifications:\n  commits: commits@whimsical.apache.org\n"
+INVALID_CONFIG = "jekyll:\n  colour: blue\n"
+
+
+def git(*args, cwd=None) -> str:
+    return subprocess.check_output([asfyaml.dataobjects.GIT_CMD, *args], cwd=cwd, universal_newlines=True).strip()
+
+
+@pytest.fixture
+def bare_repo(tmp_path, monkeypatch) -> asfyaml.dataobjects.Repository:
+    """A bare repository whose main branch has six commits: one without .asf.yaml, then a valid one, an
+    unrelated change, an invalid one, and the valid one again (twice)"""
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "Jane Doe")
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "jane@example.org")
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "Humbedooh")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "humbedooh@apache.org")
+    work = tmp_path.joinpath("work")
+    work.mkdir()
+    git("init", "-q", "-b", "main", cwd=work)
+    for i, config in enumerate((None, VALID_CONFIG, VALID_CONFIG, INVALID_CONFIG, VALID_CONFIG, VALID_CONFIG)):
+        work.joinpath("README").write_text(f"Version {i}\n")
+        if config is not None:
+            work.joinpath(".asf.yaml").write_text(config)
+        git("add", "-A", cwd=work)
+        git("commit", "-q", "-m", f"Commit {i}", cwd=work)
+    git("clone", "-q", "--bare", str(work), str(tmp_path.joinpath("whimsy-site.git")))
+    repo = asfyaml.dataobjects.Repository(str(tmp_path.joinpath("whimsy-site.git")))
+    yield repo
+    repo.close()
+
+
+def test_validate_revision(bare_repo: asfyaml.dataobjects.Repository):
+    result = asfyaml.revisions.validate_revision(bare_repo, "refs/heads/main")
+    assert result.valid and result.blob == git("rev-parse", "main:.asf.yaml", cwd=bare_repo.path)
+
+    result = asfyaml.revisions.validate_revision(bare_repo, "main~2")
+    assert not result.valid
+    assert result.feature == "jekyll"
+
+    result = asfyaml.revisions.validate_revision(bare_repo, "main~5")
+    assert result.blob is None and result.valid
+
+
+def test_validate_history(bare_repo: asfyaml.dataobjects.Repository, monkeypatch):
+    validated = []
+    validate_config = asfyaml.revisions.validate_config
+    monkeypatch.setattr(
+        asfyaml.revisions,
+        "validate_config",
+        lambda repo, config, branch=None: validated.append(config) or validate_config(repo, config, branch),
+    )
+    results = list(asfyaml.revisions.validate_history(bare_repo, "main"))
+    assert [result.revision for result in results] == git("rev-list", "main", cwd=bare_repo.path).split()
+    assert [result.valid for result in results] == [True, True, False, True, True, True]
+    assert results[-1].blob is None
+    assert results[0].blob == results[1].blob == results[3].blob == results[4].blob
+    assert validated == [VALID_CONFIG, INVALID_CONFIG], "Each distinct blob should only be validated once"
+
+    assert len(list(asfyaml.revisions.validate_history(bare_repo, ["main~3..main", "^main~2"]))) == 2
+
+
+@pytest.mark.parametrize(
+    "config, error",
+    [
+        ("colour: blue\n", "No such .asf.yaml feature: colour"),
+        ("notifications:\n  commits: [commits@whimsical.apache.org\n", "expected ',' or ']'"),
+        ("notifications:\n  commits: a@apache.org\nnotifications:\n  issues: b@apache.org\n", "Duplicate key"),
+    ],
+)
+def test_validate_broken_config(bare_repo: asfyaml.dataobjects.Repository, config: str, error: str):
+    feature, message = asfyaml.revisions.validate_config(bare_repo, config)
+    assert feature == "main" and message is not None and error in message
+
+    # A broken revision is reported like any other invalid one, without stopping the audit of the others
+    work = bare_repo.path.parent.joinpath("work")
+    work.joinpath(".asf.yaml").write_text(config)
+    git("commit", "-q", "-a", "-m", "Broken .asf.yaml", cwd=work)
+    git("push", "-q", str(bare_repo.path), "main", cwd=work)
+    results = list(asfyaml.revisions.validate_history(bare_repo, "main"))
+    assert [result.valid for result in results] == [False, True, True, False, True, True, True]
+    assert results[0].feature == "main" and error in results[0].error
+
+
+def test_validate_internal_error(bare_repo: asfyaml.dataobjects.Repository, monkeypatch):
+    # Something going wrong on our side is not the fault of the configuration, so it is not reported as invalid
+    monkeypatch.setattr(asfyaml.validation_cache, "get", lambda config_data: {"environments": []})
+    with pytest.raises(KeyError):
+        asfyaml.revisions.validate_config(bare_repo, VALID_CONFIG)
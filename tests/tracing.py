@@ -0,0 +1,118 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for tracing .asf.yaml runs"""
+
+import io
+import json
+
+import pytest
+import strictyaml
+
+import asfyaml.asfyaml
+import asfyaml.dataobjects
+import asfyaml.tracing
+import asfyaml.validation_cache
+
+TEST_ENV = "tracingtest"
+
+
+class ASFTracedFeature(asfyaml.asfyaml.ASFYamlFeature, name="traced", env=TEST_ENV):
+    schema = strictyaml.Map({"foo": strictyaml.Str()})
+
+    def run(self):
+        pass
+
+
+class ASFTracedFailingFeature(asfyaml.asfyaml.ASFYamlFeature, name="traced_failing", env=TEST_ENV):
+    def run(self):
+        raise Exception("This feature always fails")
+
+
+@pytest.fixture
+def spans():
+    """Records spans for the duration of a test"""
+    recorded: list[dict] = []
+    asfyaml.tracing.configure(recorded.append)
+    yield recorded
+    asfyaml.tracing.configure(None)
+
+
+def run_yaml(repo: asfyaml.dataobjects.Repository, config: str):
+    a = asfyaml.asfyaml.ASFYamlInstance(
+        repo=repo,
+        committer="humbedooh",
+        config_data=f"meta:\n  environment: {TEST_ENV}\n{config}",
+        branch=asfyaml.dataobjects.DEFAULT_BRANCH,
+    )
+    a.no_cache = True
+    a.run_parts()
+
+
+def test_feature_spans(test_repo: asfyaml.dataobjects.Repository, spans: list[dict]):
+    run_yaml(test_repo, "traced:\n  foo: bar\n")
+    by_name = {span["span"]: span for span in spans}
+    assert by_name["load_yaml"]["repo"] == test_repo.name
+    assert by_name["configuration"]["configured_features"] == ["meta", "traced"]
+    assert by_name["validate"]["feature"] == "traced"
+    assert by_name["run"]["feature"] == "traced"
+    assert all(span["outcome"] == "ok" and span["duration"] >= 0 for span in spans)
+
+
+def test_failure_span(test_repo: asfyaml.dataobjects.Repository, spans: list[dict]):
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException):
+        run_yaml(test_repo, "traced_failing:\n  foo: bar\n")
+    run_span = next(span for span in spans if span["span"] == "run")
+    assert run_span["outcome"] == "error"
+    assert run_span["error"] == "This feature always fails"
+
+
+def test_directive_spans(test_repo: asfyaml.dataobjects.Repository, spans: list[dict]):
+    a = asfyaml.asfyaml.ASFYamlInstance(
+        repo=test_repo,
+        committer="humbedooh",
+        config_data="github:\n  description: Tracing test\n",
+        branch=asfyaml.dataobjects.DEFAULT_BRANCH,
+    )
+    a.environments_enabled.add("noop")
+    a.no_cache = True
+    a.run_parts()
+    run_span = next(span for span in spans if span["span"] == "run" and span["feature"] == "github")
+    directives = [span for span in spans if span["span"] == "directive"]
+    assert "set_homepage_desc" in [span["directive"] for span in directives]
+    assert all(span["parent"] == run_span["id"] for span in directives)
+
+
+def test_nested_spans():
+    stream = io.StringIO()
+    asfyaml.tracing.configure(stream)
+    try:
+        with asfyaml.tracing.span("outer", repo="foo") as outer:
+            with asfyaml.tracing.span("inner"):
+                asfyaml.tracing.annotate(skipped=True)
+    finally:
+        asfyaml.tracing.configure(None)
+    inner, outer_record = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert inner["parent"] == outer.id
+    assert inner["skipped"] is True
+    assert outer_record["repo"] == "foo"
+
+
+def test_disabled():
+    assert not asfyaml.tracing.enabled()
+    # Nothing is recorded, and every span is the same no-op span
+    assert asfyaml.tracing.span("foo") is asfyaml.tracing.span("bar")
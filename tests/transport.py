@@ -0,0 +1,113 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for the shared HTTP transport"""
+
+import http.server
+import threading
+
+import github.Requester
+import pytest
+
+from asfyaml import transport
+from asfyaml.feature.github import connection
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions():
+    transport.close()
+    yield
+    transport.close()
+
+
+def test_session_per_host():
+    session = transport.session("https://pubsub.apache.org:2070/publish/whimsy")
+    assert transport.session("https://pubsub.apache.org:2070/staging/whimsy") is session
+    assert transport.session("https://pubsub.apache.org/") is not session
+    # Default ports are the same host
+    assert transport.session("https://api.github.com:443/repos") is transport.session("https://api.github.com/")
+
+    adapter = session.get_adapter("https://pubsub.apache.org:2070/publish/whimsy")
+    assert adapter.max_retries.total == transport.RETRIES
+    assert set(adapter.max_retries.status_forcelist) == {502, 503, 504}
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+
+def test_default_timeout(monkeypatch):
+    calls = []
+    session = transport.session("https://ci2.apache.org/")
+    monkeypatch.setattr(session, "request", lambda method, url, **kwargs: calls.append((method, url, kwargs)))
+
+    transport.get("https://ci2.apache.org/auth/login", auth=("user", "pass"))
+    transport.post("https://ci2.apache.org/api/v2/forceschedulers/jekyll_websites", json={}, timeout=5)
+    assert calls == [
+        ("GET", "https://ci2.apache.org/auth/login", {"auth": ("user", "pass"), "timeout": transport.DEFAULT_TIMEOUT}),
+        ("POST", "https://ci2.apache.org/api/v2/forceschedulers/jekyll_websites", {"json": {}, "timeout": 5}),
+    ]
+
+
+def test_pygithub_connection_shares_session():
+    # Other calls to the host, made first, do not decide the retry policy of PyGithub's session, or the other way round
+    own_session = transport.session("https://api.github.com/repos/apache/whimsy")
+    retry = transport.retry_policy()
+    first = connection.PooledConnection("api.github.com", 443, timeout=15, retry=retry)
+    first.close()
+    second = connection.PooledConnection("api.github.com", timeout=15)
+    assert first.session is second.session is transport.session("https://api.github.com/", retry=retry)
+    assert first.session is not own_session
+    assert first.session.get_adapter("https://api.github.com:443/repos").max_retries is retry
+    assert own_session.get_adapter("https://api.github.com/repos").max_retries is not retry
+    assert first.session.auth is github.Requester.Requester.noopAuth
+
+
+class CookieHandler(http.server.BaseHTTPRequestHandler):
+    """Sets a cookie on /login, through a redirect, and echoes the cookies sent to any other path"""
+
+    def do_GET(self):  # noqa: N802
+        if self.path == "/login":
+            self.send_response(302)
+            self.send_header("Set-Cookie", "session=secret; Path=/")
+            self.send_header("Location", "/")
+        else:
+            self.send_response(200)
+        body = (self.headers.get("Cookie") or "").encode("utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cookie_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), CookieHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_cookies_not_shared(cookie_server):
+    login = transport.get(f"{cookie_server}/login")
+    # The redirect after the login carries the cookie, but the shared session does not keep it for other calls
+    assert login.text == "session=secret"
+    assert transport.get(f"{cookie_server}/api").text == ""
+    assert transport.get(f"{cookie_server}/api", cookies=transport.cookies(login)).text == "session=secret"
+    assert transport.get(f"{cookie_server}/api").text == ""
@@ -0,0 +1,89 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unit tests for the .asf.yaml validation cache"""
+
+import pytest
+
+import asfyaml.asfyaml
+import asfyaml.dataobjects
+import asfyaml.validation_cache
+
+
+cached_yaml = """
+meta:
+  environment: noop
+staging:
+  subdir: foo
+  profile: foo
+  autostage: foo/*
+publish:
+  whoami: main
+"""
+
+
+@pytest.fixture
+def cache_dir(validation_cache_dir, monkeypatch):
+    monkeypatch.setattr(asfyaml.validation_cache, "_fingerprints", {})
+    return validation_cache_dir
+
+
+def make_instance(repo: asfyaml.dataobjects.Repository, config_data: str) -> asfyaml.asfyaml.ASFYamlInstance:
+    return asfyaml.asfyaml.ASFYamlInstance(
+        repo=repo, committer="humbedooh", config_data=config_data, branch=asfyaml.dataobjects.DEFAULT_BRANCH
+    )
+
+
+def test_cache_hit(test_repo: asfyaml.dataobjects.Repository, cache_dir):
+    a = make_instance(test_repo, cached_yaml)
+    assert a.yaml is not None, "Expected the first run to parse the YAML"
+    a.environments_enabled.add("quietmode")  # Added by the caller, should not be cached
+    a.run_parts(validate_only=True)
+    assert len(list(cache_dir.iterdir())) == 1
+
+    b = make_instance(test_repo, cached_yaml)
+    assert b.yaml is None, "Expected the second run to be served from the validation cache"
+    assert b.environments_enabled == {"production", "noop"}
+    b.run_parts(validate_only=True)
+    assert list(b.features.keys()) == list(a.features.keys())
+    for name, feature in a.features.items():
+        assert b.features[name].yaml_raw == feature.yaml_raw
+
+
+def test_cache_invalid_yaml_not_stored(test_repo: asfyaml.dataobjects.Repository, cache_dir):
+    a = make_instance(test_repo, "staging:\n  blorp: foo\n")
+    with pytest.raises(asfyaml.asfyaml.ASFYAMLException):
+        a.run_parts(validate_only=True)
+    assert not cache_dir.exists() or not list(cache_dir.iterdir())
+
+
+def test_cache_schema_change(test_repo: asfyaml.dataobjects.Repository, cache_dir, monkeypatch):
+    make_instance(test_repo, cached_yaml).run_parts(validate_only=True)
+    staging = next(f for f in asfyaml.asfyaml.ASFYamlFeature.features if f.name == "staging")
+    monkeypatch.setitem(asfyaml.validation_cache._fingerprints, staging, "changed")
+    b = make_instance(test_repo, cached_yaml)
+    assert b.yaml is not None, "Expected a schema change to invalidate the cached validation"
+    b.run_parts(validate_only=True)
+
+
+def test_cache_eviction(test_repo: asfyaml.dataobjects.Repository, cache_dir, monkeypatch):
+    monkeypatch.setattr(asfyaml.validation_cache, "MAX_CACHE_SIZE", 1024)
+    for i in range(20):
+        make_instance(test_repo, f"publish:\n  whoami: branch-{i}\n").run_parts(validate_only=True)
+    assert sum(p.stat().st_size for p in cache_dir.iterdir()) <= 1024
+    # The most recent entry should always survive eviction
+    assert asfyaml.validation_cache.get("publish:\n  whoami: branch-19\n") is not None
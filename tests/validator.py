@@ -22,9 +22,6 @@ from pathlib import Path
 import asfyaml.asfyaml
 import asfyaml.dataobjects
 
-# Set .asf.yaml to debug mode
-asfyaml.asfyaml.DEBUG = True
-
 
 def test_basic_yaml(base_path: Path, test_repo: asfyaml.dataobjects.Repository):
     # Rewire the notifications path, so we can test with a mock json file
@@ -50,3 +47,25 @@ def test_basic_yaml(base_path: Path, test_repo: asfyaml.dataobjects.Repository):
     # Assert that we know the project name and the hostname
     assert test_repo.project == "whimsy", f"Expected project name whimsy, but got {test_repo.project}"
     assert test_repo.hostname == "whimsical", f"Expected project hostname whimsical, but got {test_repo.hostname}"
+
+
+def test_validation_error_location(test_repo: asfyaml.dataobjects.Repository):
+    """Schema errors should point at the feature sub-tree, with line numbers relative to it"""
+    bad_yaml = """
+meta:
+  environment: noop
+github:
+    description: Apache Foo
+    features:
+        issues: maybe
+"""
+    a = asfyaml.asfyaml.ASFYamlInstance(
+        repo=test_repo, committer="humbedooh", config_data=bad_yaml, branch=asfyaml.dataobjects.DEFAULT_BRANCH
+    )
+    try:
+        a.run_parts(validate_only=True)
+    except asfyaml.asfyaml.ASFYAMLException as e:
+        assert e.feature == "github"
+        assert f'in "{test_repo.name}.git/.asf.yaml::github", line 3' in e.error_message
+    else:
+        raise AssertionError("Expected a validation error for github::features::issues")
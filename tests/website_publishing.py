@@ -21,8 +21,6 @@ import asfyaml.asfyaml
 import asfyaml.dataobjects
 from helpers import YamlTest
 
-# Set .asf.yaml to debug mode
-asfyaml.asfyaml.DEBUG = True
 
 valid_staging = YamlTest(
     None,